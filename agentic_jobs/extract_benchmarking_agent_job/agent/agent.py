@@ -1,19 +1,68 @@
 """
     This file contains code to create our root agent.
 
-    Root agent triggers the following agents in order (SequentialAgent):-
+    Root agent runs the following stages as a dependency graph (DagAgent), each one starting as soon
+    as the state keys it reads are available:-
+        - prepare_rag_corpus (alongside the extraction)
         - extraction_pitch_deck_agent
+        - queue_pitch_deck_for_ingestion (once the corpus and the extracted pitch deck exist)
         - benchmarking_startup_agent
+        - investment_recommendation_sub_agent and generate_qna_agent (concurrently, once the benchmarking results exist)
+
+    The extraction, investment recommendation and question stages (and every benchmarking sub agent) are
+    checkpointed, so a retried job restores the stages that already completed with the same inputs
+    instead of running them again.
 
     Created By:- Arnab Ghosh (https://github.com/ARNABGHOSH123)
 """
 
-from google.adk.agents import SequentialAgent
-from sub_agents import benchmarking_startup_agent, extraction_pitch_deck_agent, generate_qna_agent, investment_recommendation_sub_agent
+from sub_agents import benchmarking_startup_agent, extraction_pitch_deck_agent, generate_qna_agent, \
+    investment_recommendation_sub_agent, queue_pitch_deck_for_ingestion
+from utils import finalize_corpus_ingestion, prepare_rag_corpus, get_stage_checkpoint_store, PITCH_DECK_PROJECTIONS, \
+    CallbackStageAgent, DagAgent, StageIO
+
+BENCHMARKING_RESULT_KEYS = tuple(agent.output_key for agent in benchmarking_startup_agent.sub_agents)
+# generate_qna_agent asks about the gaps reported by every benchmarking sub agent except the competitor analysis
+QNA_GAP_RESULT_KEYS = tuple(key for key in BENCHMARKING_RESULT_KEYS if key != "competitor_analysis_sub_agent_result")
+
+prepare_rag_corpus_stage = CallbackStageAgent(
+    name="prepare_rag_corpus",
+    description="Reuses or creates the company's RAG corpus and registers it with the ingestion queue.",
+    before_agent_callback=prepare_rag_corpus,
+)
+
+queue_pitch_deck_for_ingestion_stage = CallbackStageAgent(
+    name="queue_pitch_deck_for_ingestion",
+    description="Queues the extracted pitch deck JSON for the company's RAG corpus.",
+    before_agent_callback=queue_pitch_deck_for_ingestion,
+)
 
-root_agent = SequentialAgent(
+root_agent = DagAgent(
     name="ai_analyst_root_agent",
-    sub_agents=[extraction_pitch_deck_agent,
+    sub_agents=[prepare_rag_corpus_stage, extraction_pitch_deck_agent, queue_pitch_deck_for_ingestion_stage,
                 benchmarking_startup_agent, investment_recommendation_sub_agent, generate_qna_agent],
-    description="The main coordinator root agent that manages the workflow for analyzing startup pitch decks and benchmarking startups. Coordinator: extract -> benchmark (sequential pipeline).",
+    stage_io={
+        prepare_rag_corpus_stage.name: StageIO(reads=("firestore_doc_id",),
+                                               writes=("rag_corpus_name",)),
+        # input_deck_md5 (set by main.py) makes a re-uploaded deck with the same name invalidate the checkpoint
+        extraction_pitch_deck_agent.name: StageIO(reads=("founder_id", "input_deck_filename", "file_extension", "input_deck_md5"),
+                                                  writes=("pitch_deck", "extraction_pitch_deck_sub_agent_gcs_uri",
+                                                          *PITCH_DECK_PROJECTIONS),
+                                                  checkpoint=True),
+        queue_pitch_deck_for_ingestion_stage.name: StageIO(reads=("rag_corpus_name", "extraction_pitch_deck_sub_agent_gcs_uri")),
+        # the sub agents queue their results for the corpus, so they need its name
+        benchmarking_startup_agent.name: StageIO(reads=("rag_corpus_name", *(key for key in PITCH_DECK_PROJECTIONS
+                                                                             if key != "generate_qna_pitch_deck")),
+                                                 writes=BENCHMARKING_RESULT_KEYS),
+        investment_recommendation_sub_agent.name: StageIO(reads=BENCHMARKING_RESULT_KEYS,
+                                                          writes=(investment_recommendation_sub_agent.output_key,),
+                                                          checkpoint=True),
+        generate_qna_agent.name: StageIO(reads=("generate_qna_pitch_deck", *QNA_GAP_RESULT_KEYS),
+                                         writes=(generate_qna_agent.output_key,), checkpoint=True),
+    },
+    checkpoint_store_factory=get_stage_checkpoint_store,
+    description="The main coordinator root agent that manages the workflow for analyzing startup pitch decks and benchmarking startups. Coordinator: corpus + extract -> benchmark -> recommendation + questions (dependency graph).",
+    # imports whatever was queued after the benchmarking flush (investment recommendation result)
+    # and prunes corpus documents whose source was replaced or removed
+    after_agent_callback=finalize_corpus_ingestion,
 )
@@ -0,0 +1,128 @@
+"""
+    Latency, cost and schema validity of each agent's final answer per model, on recorded fixtures.
+
+    Fixtures are the final requests of real runs: run the job with MODEL_TIER_FIXTURES_DIR=<dir> and
+    every agent appends its last model request (system instruction, tool results, ...) and answer to
+    <dir>/<agent name>.jsonl. Each fixture is replayed against every --models entry with tool calls
+    disabled and the agent's output schema; the answer is checked with validate_agent_output (the check
+    that escalates a tiered agent) and priced with the token budget's list prices. The "tiered" row is
+    the fast model with the escalation model replayed wherever the fast answer was invalid, i.e. what
+    AGENT_MODEL_TIERS=tiered costs.
+
+    Usage (from the job directory, with its .env.development):
+        python benchmarks/eval_model_tiers.py --fixtures ./fixtures
+        python benchmarks/eval_model_tiers.py --fixtures ./fixtures --agents traction_sub_agent \\
+            --models gemini-2.5-flash gemini-2.5-pro --json report.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# run against the job sources next to this script
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from google import genai  # noqa: E402
+from google.genai import types  # noqa: E402
+from config import Config  # noqa: E402
+from llm_model_config import validate_agent_output, agent_model_tier  # noqa: E402
+from utils.output_schemas import AGENT_OUTPUT_SCHEMAS  # noqa: E402
+from utils.token_budget import estimate_cost_usd  # noqa: E402
+
+
+def load_fixtures(directory: Path, agents):
+    fixtures = {}
+    for path in sorted(directory.glob("*.jsonl")):
+        if agents and path.stem not in agents:
+            continue
+        with open(path, encoding="utf-8") as f:
+            fixtures[path.stem] = [json.loads(line) for line in f if line.strip()]
+    return fixtures
+
+
+async def replay(client, fixture, model):
+    config = types.GenerateContentConfig.model_validate(fixture["config"])
+    # the final answer only: the recorded tool results are in the contents
+    config.tool_config = types.ToolConfig(function_calling_config=types.FunctionCallingConfig(mode="NONE"))
+    # the output schema is not recorded (a pydantic class), it is applied again here
+    if fixture["agent"] in AGENT_OUTPUT_SCHEMAS:
+        config.response_schema = AGENT_OUTPUT_SCHEMAS[fixture["agent"]]
+        config.response_mime_type = "application/json"
+    contents = [types.Content.model_validate(content) for content in fixture["contents"]]
+    started = time.perf_counter()
+    try:
+        response = await client.aio.models.generate_content(model=model, contents=contents, config=config)
+    except Exception as e:
+        return {"seconds": time.perf_counter() - started, "cost_usd": 0.0, "invalid_reason": f"request failed: {e}"}
+    seconds = time.perf_counter() - started
+    usage = response.usage_metadata
+    prompt_tokens = (usage.prompt_token_count or 0) if usage else 0
+    output_tokens = ((usage.candidates_token_count or 0) + (usage.thoughts_token_count or 0)) if usage else 0
+    return {"seconds": seconds, "cost_usd": estimate_cost_usd(model, prompt_tokens, output_tokens) or 0.0,
+            "invalid_reason": validate_agent_output(fixture["agent"], response.text or "")}
+
+
+def summarize(results):
+    latencies = sorted(r["seconds"] for r in results)
+    return {
+        "fixtures": len(results),
+        "valid": round(sum(1 for r in results if not r["invalid_reason"]) / len(results), 3),
+        "p50_seconds": round(statistics.median(latencies), 2),
+        "p95_seconds": round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 2),
+        "mean_cost_usd": round(statistics.fmean(r["cost_usd"] for r in results), 5),
+    }
+
+
+async def evaluate(client, fixtures, models, fast_model, escalation_model):
+    report = {}
+    for agent, agent_fixtures in fixtures.items():
+        per_model = {model: [await replay(client, fixture, model) for fixture in agent_fixtures] for model in models}
+        report[agent] = {model: summarize(results) for model, results in per_model.items()}
+        if fast_model in per_model and escalation_model in per_model:
+            tiered = [fast if not fast["invalid_reason"] else
+                      {"seconds": fast["seconds"] + escalated["seconds"],
+                       "cost_usd": fast["cost_usd"] + escalated["cost_usd"],
+                       "invalid_reason": escalated["invalid_reason"]}
+                      for fast, escalated in zip(per_model[fast_model], per_model[escalation_model])]
+            report[agent]["tiered"] = {**summarize(tiered),
+                                       "escalated": sum(1 for r in per_model[fast_model] if r["invalid_reason"])}
+        report[agent]["configured_tier"] = agent_model_tier(agent)
+    return report
+
+
+def print_report(report):
+    print(f"{'agent':<48} {'model':<22} {'n':>3} {'valid':>6} {'p50 s':>7} {'p95 s':>7} {'mean $':>9}")
+    for agent, rows in report.items():
+        for model, row in rows.items():
+            if model == "configured_tier":
+                continue
+            print(f"{agent:<48} {model:<22} {row['fixtures']:>3} {row['valid']:>6.0%} {row['p50_seconds']:>7} "
+                  f"{row['p95_seconds']:>7} {row['mean_cost_usd']:>9.5f}"
+                  + (f"  ({row['escalated']} escalated)" if "escalated" in row else ""))
+        print(f"{agent:<48} configured tier: {rows['configured_tier']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", type=Path, required=True, help="directory of <agent name>.jsonl fixtures")
+    parser.add_argument("--agents", nargs="*", help="only these agents (default: every fixture file)")
+    parser.add_argument("--models", nargs="+",
+                        default=[Config.FAST_AGENT_MODEL, Config.REPORT_GENERATION_AGENT_MODEL])
+    parser.add_argument("--json", type=Path, help="also write the report to this file")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures, args.agents)
+    if not fixtures:
+        parser.error(f"no fixtures in {args.fixtures}")
+    client = genai.Client(vertexai=True, project=Config.GOOGLE_CLOUD_PROJECT, location=Config.GOOGLE_CLOUD_REGION)
+    report = asyncio.run(evaluate(client, fixtures, args.models,
+                                  Config.FAST_AGENT_MODEL, Config.REPORT_GENERATION_AGENT_MODEL))
+    print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -60,3 +60,11 @@ class Config:
         "FIRESTORE_COMPANY_COLLECTION", "companies_applied")
     SUB_AGENTS_RAG_CORPUS_PREFIX = os.getenv(
         "SUB_AGENTS_RAG_CORPUS_PREFIX", "sub_agents_rag_corpus")
+    # "single": process the company given by the environment variables; "worker": process queued companies
+    JOB_MODE = os.getenv("JOB_MODE", "single")
+    WORKER_QUEUE_COLLECTION = os.getenv(
+        "WORKER_QUEUE_COLLECTION", "extract_benchmark_job_queue")
+    WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "3"))
+    WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "5"))
+    # the worker exits after the queue stayed empty this long (0: never)
+    WORKER_IDLE_EXIT_SECONDS = float(os.getenv("WORKER_IDLE_EXIT_SECONDS", "300"))
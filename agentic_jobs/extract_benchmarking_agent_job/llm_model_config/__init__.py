@@ -1 +1,2 @@
-from .model_config import base_model, report_generation_model
\ No newline at end of file
+from .model_config import base_model, report_generation_model
+from .model_tiering import tiered_model, validate_agent_output, parse_json_output, agent_model_tier, AGENT_MODEL_TIERS
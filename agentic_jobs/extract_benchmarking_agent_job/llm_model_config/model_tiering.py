@@ -0,0 +1,158 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, AsyncGenerator, Optional
+from google.adk.models.google_llm import Gemini
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from pydantic import ValidationError
+from config import Config
+from utils.output_schemas import AGENT_OUTPUT_SCHEMAS, SET_MODEL_RESPONSE_TOOL_NAME
+from utils.token_budget import model_call_downgraded
+
+FAST, TIERED, PRO = "fast", "tiered", "pro"
+
+# tier of every agent, overridable per agent with MODEL_TIER_<AGENT NAME> (e.g. MODEL_TIER_TRACTION_SUB_AGENT=pro):
+# fast = FAST_AGENT_MODEL only, pro = REPORT_GENERATION_AGENT_MODEL only, tiered = the fast model first and
+# the report generation model only when the fast model's final answer fails validate_agent_output
+AGENT_MODEL_TIERS = {
+    "business_model_sub_agent": TIERED,
+    "competitor_analysis_sub_agent": TIERED,
+    "funding_and_financials_sub_agent": TIERED,
+    "industry_trends_sub_agent": TIERED,
+    "overview_sub_agent": TIERED,
+    "partnerships_and_strategic_analysis_sub_agent": TIERED,
+    "team_profiling_sub_agent": TIERED,
+    "traction_sub_agent": TIERED,
+    "generate_qna_agent": TIERED,
+    # weighs the eight analyses against each other; a valid but shallow answer would pass validation
+    "investment_recommendation_sub_agent": PRO,
+}
+
+# when set, the final request and answer of every agent are appended to <dir>/<agent name>.jsonl,
+# the fixtures of benchmarks/eval_model_tiers.py
+MODEL_TIER_FIXTURES_DIR = os.getenv("MODEL_TIER_FIXTURES_DIR")
+
+
+def agent_model_tier(agent_name: str) -> str:
+    return os.getenv(f"MODEL_TIER_{agent_name.upper()}", AGENT_MODEL_TIERS.get(agent_name, PRO)).lower()
+
+
+def parse_json_output(text: str) -> Any:
+    """The JSON of an agent's answer (the same fence stripping as load_agent_result)."""
+    return json.loads(text.strip().removeprefix("```json").removesuffix("```").strip())
+
+
+def validate_agent_output(agent_name: str, text: str) -> Optional[str]:
+    """Why the final answer of `agent_name` is unusable (see AGENT_OUTPUT_SCHEMAS), None when it is valid."""
+    try:
+        output = parse_json_output(text)
+    except ValueError as e:
+        return f"invalid JSON ({e})"
+    if not isinstance(output, dict):
+        return f"expected a JSON object, got {type(output).__name__}"
+    schema = AGENT_OUTPUT_SCHEMAS.get(agent_name)
+    if schema is None:
+        return None
+    try:
+        schema.model_validate(output)
+    except ValidationError as e:
+        first = e.errors()[0]
+        return f"does not match {schema.__name__} ({e.error_count()} errors, first: {first['loc']} {first['msg']})"
+    return None
+
+
+def _final_text(llm_response: LlmResponse) -> Optional[str]:
+    """
+    Text of a final answer, None for a turn that calls tools (or carries no content). Agents with an
+    output schema and tools may answer with a set_model_response call; its arguments are the answer.
+    """
+    parts = llm_response.content.parts if llm_response.content and llm_response.content.parts else []
+    function_calls = [part.function_call for part in parts if part.function_call]
+    if function_calls:
+        if len(function_calls) == 1 and function_calls[0].name == SET_MODEL_RESPONSE_TOOL_NAME:
+            return json.dumps(function_calls[0].args or {})
+        return None
+    if not parts:
+        return None
+    return "".join(part.text for part in parts if part.text and not part.thought)
+
+
+def _merge_usage(discarded: Optional[types.GenerateContentResponseUsageMetadata],
+                 usage: Optional[types.GenerateContentResponseUsageMetadata]):
+    # the discarded answer was paid for too; the token budget prices it as the escalation model
+    if discarded is None or usage is None:
+        return usage or discarded
+    fields = ("prompt_token_count", "candidates_token_count", "thoughts_token_count", "cached_content_token_count",
+              "total_token_count")
+    return usage.model_copy(update={field: (getattr(usage, field) or 0) + (getattr(discarded, field) or 0)
+                                    for field in fields})
+
+
+def _record_fixture(agent_name: str, llm_request: LlmRequest, text: str, model: str) -> None:
+    try:
+        config = llm_request.config.model_dump(mode="json", exclude_none=True, exclude={"http_options", "response_schema", "response_json_schema"})
+        fixture = {"agent": agent_name, "model": model, "config": config,
+                   "contents": [content.model_dump(mode="json", exclude_none=True) for content in llm_request.contents],
+                   "response_text": text}
+        Path(MODEL_TIER_FIXTURES_DIR).mkdir(parents=True, exist_ok=True)
+        with open(Path(MODEL_TIER_FIXTURES_DIR) / f"{agent_name}.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(fixture) + "\n")
+    except Exception as e:
+        print(f"Could not record the model fixture of {agent_name}: {e}")
+
+
+class TieredGemini(Gemini):
+    """
+    Gemini model of one agent that answers with `model` and, when its final answer fails
+    validate_agent_output, asks `escalation_model` again with the same request (research tool calling
+    turns are never escalated; a set_model_response call is a final answer). The escalated response carries the usage of both calls.
+
+    No escalation once the token budget switched the agent to the fast model (see utils/token_budget.py).
+    """
+
+    agent_name: str
+    escalation_model: Optional[str] = None
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        # Gemini appends to the request's contents; the escalation needs the original ones
+        escalation_request = llm_request.model_copy(update={"contents": list(llm_request.contents)})
+        responses = [response async for response in super().generate_content_async(llm_request, stream)]
+        final_response = responses[-1] if responses else None
+        text = _final_text(final_response) if final_response and not final_response.partial else None
+        if text is None:
+            for response in responses:
+                yield response
+            return
+        invalid_reason = validate_agent_output(self.agent_name, text)
+        if MODEL_TIER_FIXTURES_DIR:
+            _record_fixture(self.agent_name, escalation_request, text, llm_request.model)
+        if not invalid_reason or not self.escalation_model or model_call_downgraded():
+            for response in responses:
+                yield response
+            return
+
+        print(f"Escalating {self.agent_name} from {llm_request.model} to {self.escalation_model}: {invalid_reason}")
+        escalation_request.model = self.escalation_model
+        escalated = [response async for response in super().generate_content_async(escalation_request, stream)]
+        if escalated:
+            escalated[-1] = escalated[-1].model_copy(update={
+                "usage_metadata": _merge_usage(final_response.usage_metadata, escalated[-1].usage_metadata)})
+        for response in escalated:
+            yield response
+
+
+def tiered_model(agent_name: str) -> TieredGemini:
+    """Model of `agent_name` according to its tier (AGENT_MODEL_TIERS)."""
+    tier = agent_model_tier(agent_name)
+    return TieredGemini(
+        model=Config.FAST_AGENT_MODEL if tier in (FAST, TIERED) else Config.REPORT_GENERATION_AGENT_MODEL,
+        escalation_model=Config.REPORT_GENERATION_AGENT_MODEL if tier == TIERED else None,
+        agent_name=agent_name,
+        retry_options=types.HttpRetryOptions(
+            initial_delay=1,
+            attempts=10,
+            max_delay=120,
+        )
+    )
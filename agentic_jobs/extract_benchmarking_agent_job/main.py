@@ -1,11 +1,16 @@
 from config import Config
 from google.cloud import firestore
 from agent import root_agent
+from utils import corpus_ingestion_queue, token_budget, release_tool_budget, state_sizes, get_storage_client, CompanyJobQueue, FirestoreCompanyJobQueue
 import os
+import signal
+import socket
 import sys
+import time
 import asyncio
 import logging
 import traceback
+import uuid
 from google.adk.sessions import InMemorySessionService
 from google.adk.runners import Runner
 from google.genai import types
@@ -34,6 +39,31 @@ FIRESTORE_COMPANY_COLLECTION = Config.FIRESTORE_COMPANY_COLLECTION
 firestore_client = firestore.Client(
     project=Config.GOOGLE_CLOUD_PROJECT, database=Config.FIRESTORE_DATABASE)
 
+# one session service and runner for every company processed by this process (worker mode runs
+# several companies concurrently, each in its own session)
+session_service = InMemorySessionService()
+runner = Runner(agent=root_agent, app_name=APP_NAME,
+                session_service=session_service)
+
+
+def _input_deck_md5(founder_id: str, input_deck_filename: str, file_extension: str) -> str:
+    """Content hash of the uploaded deck (an input of the extraction checkpoint); random if it cannot be read."""
+    blob_path = f"{Config.GCP_PITCH_DECK_INPUT_FOLDER}/{founder_id}/{input_deck_filename}.{file_extension.lower()}"
+    try:
+        blob = get_storage_client().bucket(Config.GCS_BUCKET_NAME).get_blob(blob_path)
+        if blob and blob.md5_hash:
+            return blob.md5_hash
+    except Exception as e:
+        logger.warning("Could not read the hash of %s: %s", blob_path, e)
+    # never matches a checkpoint, so the deck is extracted again
+    return uuid.uuid4().hex
+
+
+async def _update_company_doc(firestore_doc_id: str, update_doc: dict):
+    # the sync client would block the other companies of a worker
+    await asyncio.to_thread(
+        firestore_client.collection(FIRESTORE_COMPANY_COLLECTION).document(firestore_doc_id).update, update_doc)
+
 
 async def _run_agent_once(firestore_doc_id: str, input_deck_filename: str, file_extension: str, founder_id: str, company_websites: list):
     # Capture Cloud Run execution id (e.g., "projects/.../jobs/<job>/executions/<exec-id>")
@@ -42,23 +72,21 @@ async def _run_agent_once(firestore_doc_id: str, input_deck_filename: str, file_
 
     # Write "RUNNING" + execution id as soon as we start
     try:
-        firestore_client.collection(FIRESTORE_COMPANY_COLLECTION).document(firestore_doc_id).update(
-            {
-                "benchmark_agent_job_id": execution_name,
-                "benchmark_agent_job_status": "RUNNING",
-                "benchmark_agent_job_name": job_name,
-            },
-        )
+        await _update_company_doc(firestore_doc_id, {
+            "benchmark_agent_job_id": execution_name,
+            "benchmark_agent_job_status": "RUNNING",
+            "benchmark_agent_job_name": job_name,
+        })
         logger.info("Wrote execution id to Firestore: %s", execution_name)
     except Exception as e:
         logger.warning("Failed to write execution id to Firestore: %s", e)
 
-    session_service = InMemorySessionService()
-    await session_service.create_session(app_name=APP_NAME, user_id=SESSION_USER_ID, session_id=SESSION_ID, state={"firestore_doc_id": firestore_doc_id, "input_deck_filename": input_deck_filename, "file_extension": file_extension, "founder_id": founder_id, "company_websites": company_websites, "pitch_deck": ""})
-    logger.info("Created session %s for user %s", SESSION_ID, SESSION_USER_ID)
-
-    runner = Runner(agent=root_agent, app_name=APP_NAME,
-                    session_service=session_service)
+    # stages completed by an earlier attempt with the same inputs are restored from their checkpoints
+    input_deck_md5 = await asyncio.to_thread(_input_deck_md5, founder_id, input_deck_filename, file_extension)
+    # one session per company, so companies processed concurrently never share state
+    session_id = f"{SESSION_ID}-{firestore_doc_id}"
+    await session_service.create_session(app_name=APP_NAME, user_id=SESSION_USER_ID, session_id=session_id, state={"firestore_doc_id": firestore_doc_id, "input_deck_filename": input_deck_filename, "file_extension": file_extension, "founder_id": founder_id, "company_websites": company_websites, "input_deck_md5": input_deck_md5, "pitch_deck": ""})
+    logger.info("Created session %s for user %s", session_id, SESSION_USER_ID)
 
     content = types.Content(
         role="user",
@@ -66,30 +94,62 @@ async def _run_agent_once(firestore_doc_id: str, input_deck_filename: str, file_
             text=f"Please analyze the pitch deck.")]
     )
 
+    # the token budget and state sizes of the run are keyed by its invocation id
+    invocation_ids = set()
     try:
         async def _iter_events():
-            async for event in runner.run_async(user_id=SESSION_USER_ID, session_id=SESSION_ID, new_message=content):
+            async for event in runner.run_async(user_id=SESSION_USER_ID, session_id=session_id, new_message=content):
+                invocation_ids.add(event.invocation_id)
+                state_sizes.record(event.invocation_id, event.actions.state_delta if event.actions else None)
                 if event.content and event.content.parts and event.content.parts[0].text:
-                    logger.info("[%-24s] %s", event.author,
+                    logger.info("[%s][%-24s] %s", firestore_doc_id, event.author,
                                 event.content.parts[0].text[:120])
 
         await asyncio.wait_for(_iter_events(), timeout=RUN_TIMEOUT_SECONDS)
-        logger.info("Agent completed run (session=%s).", SESSION_ID)
+        logger.info("Agent completed run (session=%s).", session_id)
 
     finally:
         # Read state and clean up
         try:
-            session_state = await session_service.get_session(app_name=APP_NAME, user_id=SESSION_USER_ID, session_id=SESSION_ID)
+            session_state = await session_service.get_session(app_name=APP_NAME, user_id=SESSION_USER_ID, session_id=session_id)
             state = session_state.state if session_state and session_state.state else {}
             logger.info("Session state keys: %s", list(state.keys()))
         except Exception as e_get:
             logger.warning("Failed to read session state: %s", e_get)
             state = {}
 
+        # Import any sub agent results of this company still queued (e.g. the run timed out before the flush callbacks)
+        corpus_name = state.get("rag_corpus_name")
+        if corpus_name:
+            try:
+                await corpus_ingestion_queue.flush(corpus_name)
+                logger.info("RAG corpus ingestion: %s", corpus_ingestion_queue.summary(corpus_name))
+            except Exception as e_rag:
+                logger.warning("Failed to flush RAG corpus ingestion queue: %s", e_rag)
+            finally:
+                corpus_ingestion_queue.release(corpus_name)
+
+        # Per-agent calls, tokens and cost of the run
+        usage_report = {}
+        for invocation_id in invocation_ids:
+            usage_report = token_budget.summary(invocation_id)
+            token_budget.release(invocation_id)
+            release_tool_budget(invocation_id)
+            logger.info("Token usage: %s calls, %s tokens, $%s (downgraded: %s)", usage_report["calls"],
+                        usage_report["total_tokens"], usage_report["cost_usd"], usage_report["downgraded_agents"])
+            logger.info("Token usage per agent: %s", usage_report["agents"])
+        state_size_report = {}
+        for invocation_id in invocation_ids:
+            state_size_report = state_sizes.summary(invocation_id)
+            state_sizes.release(invocation_id)
+            logger.info("Session state: %s keys, %s bytes, %s bytes written in %s state deltas (largest keys: %s)",
+                        state_size_report["keys"], state_size_report["state_bytes"], state_size_report["delta_bytes"],
+                        state_size_report["state_deltas"], state_size_report["largest_keys"])
+
         try:
-            await session_service.delete_session(app_name=APP_NAME, user_id=SESSION_USER_ID, session_id=SESSION_ID)
+            await session_service.delete_session(app_name=APP_NAME, user_id=SESSION_USER_ID, session_id=session_id)
             logger.info("Deleted session %s for user %s",
-                        SESSION_ID, SESSION_USER_ID)
+                        session_id, SESSION_USER_ID)
         except Exception as e_del:
             logger.warning("Failed to delete session: %s", e_del)
 
@@ -106,13 +166,16 @@ async def _run_agent_once(firestore_doc_id: str, input_deck_filename: str, file_
                 # will be corrected below on exception paths
                 "benchmark_agent_job_status": "SUCCEEDED",
             }
+            if usage_report:
+                update_doc["benchmark_agent_job_usage"] = usage_report
+            if state_size_report:
+                update_doc["benchmark_agent_job_state_size"] = state_size_report
             # if extraction_pitch_deck_result_gcs_uri:
             #     update_doc["benchmark_gcs_uri"] = benchmark_gcs_uri
             # if extract_output_gcs_uri:
             #     update_doc["extract_output_gcs_uri"] = extract_output_gcs_uri
 
-            firestore_client.collection(FIRESTORE_COMPANY_COLLECTION).document(
-                firestore_doc_id).update(update_doc)
+            await _update_company_doc(firestore_doc_id, update_doc)
             logger.info("Updated Firestore doc %s with outputs",
                         firestore_doc_id)
         except Exception as e_fs:
@@ -125,6 +188,25 @@ async def _run_agent_once(firestore_doc_id: str, input_deck_filename: str, file_
     # }
 
 
+async def _process_company(firestore_doc_id: str, input_deck_filename: str, file_extension: str, founder_id: str, company_websites: list):
+    try:
+        await _run_agent_once(input_deck_filename=input_deck_filename, firestore_doc_id=firestore_doc_id, file_extension=file_extension, founder_id=founder_id, company_websites=company_websites)
+        # logger.info("Agent run result: %s", result)
+        # return result
+    except asyncio.TimeoutError:
+        # mark as failed on timeout
+        if firestore_doc_id:
+            await _update_company_doc(firestore_doc_id, {"benchmark_agent_job_status": "FAILED"})
+        logger.exception(
+            "Agent run timed out after %s seconds", RUN_TIMEOUT_SECONDS)
+        raise
+    except Exception:
+        if firestore_doc_id:
+            await _update_company_doc(firestore_doc_id, {"benchmark_agent_job_status": "FAILED"})
+        logger.error("Job failed: %s", traceback.format_exc())
+        raise
+
+
 async def analyze_startup_pitch_deck():
     input_deck_filename = os.environ.get("input_deck_filename")
     firestore_doc_id = os.environ.get("firestore_doc_id")
@@ -149,28 +231,58 @@ async def analyze_startup_pitch_deck():
 
     company_websites = company_websites.strip().split()
 
+    await _process_company(input_deck_filename=input_deck_filename, firestore_doc_id=firestore_doc_id, file_extension=file_extension, founder_id=founder_id, company_websites=company_websites)
+
+
+async def run_worker(queue: CompanyJobQueue, concurrency: int = Config.WORKER_CONCURRENCY):
+    """
+    Worker mode: process companies claimed from `queue`, `concurrency` at a time, until the queue
+    stayed empty for WORKER_IDLE_EXIT_SECONDS or SIGTERM is received (the running companies finish first).
+    A failed company is marked FAILED and does not stop the worker.
+    """
+    worker_id = os.environ.get("CLOUD_RUN_EXECUTION") or socket.gethostname()
+    stopping = asyncio.Event()
     try:
-        await _run_agent_once(input_deck_filename=input_deck_filename, firestore_doc_id=firestore_doc_id, file_extension=file_extension, founder_id=founder_id, company_websites=company_websites)
-        # logger.info("Agent run result: %s", result)
-        # return result
-    except asyncio.TimeoutError:
-        # mark as failed on timeout
-        if firestore_doc_id:
-            firestore_client.collection(FIRESTORE_COMPANY_COLLECTION).document(
-                firestore_doc_id).update({"benchmark_agent_job_status": "FAILED"})
-        logger.exception(
-            "Agent run timed out after %s seconds", RUN_TIMEOUT_SECONDS)
-        raise
-    except Exception:
-        if firestore_doc_id:
-            firestore_client.collection(FIRESTORE_COMPANY_COLLECTION).document(
-                firestore_doc_id).update({"benchmark_agent_job_status": "FAILED"})
-        logger.error("Job failed: %s", traceback.format_exc())
-        raise
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopping.set)
+    except (NotImplementedError, RuntimeError):
+        pass
+    last_job_at = time.monotonic()
+
+    async def _worker_loop(slot: int):
+        nonlocal last_job_at
+        while not stopping.is_set():
+            job = await queue.claim(worker_id)
+            if job is None:
+                if Config.WORKER_IDLE_EXIT_SECONDS and time.monotonic() - last_job_at >= Config.WORKER_IDLE_EXIT_SECONDS:
+                    return
+                try:
+                    await asyncio.wait_for(stopping.wait(), timeout=Config.WORKER_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            last_job_at = time.monotonic()
+            logger.info("Worker %s/%s processing company %s", worker_id, slot, job["id"])
+            error = None
+            try:
+                company_websites = job.get("company_websites") or []
+                if isinstance(company_websites, str):
+                    company_websites = company_websites.strip().split()
+                await _process_company(firestore_doc_id=job["firestore_doc_id"], input_deck_filename=job["input_deck_filename"], file_extension=job["file_extension"], founder_id=job["founder_id"], company_websites=company_websites)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            await queue.complete(job["id"], error)
+            last_job_at = time.monotonic()
+
+    logger.info("Worker %s started with %s concurrent companies", worker_id, concurrency)
+    await asyncio.gather(*(_worker_loop(slot) for slot in range(concurrency)))
+    logger.info("Worker %s stopped", worker_id)
 
 if __name__ == "__main__":
     try:
-        asyncio.run(analyze_startup_pitch_deck())
+        if Config.JOB_MODE == "worker":
+            asyncio.run(run_worker(FirestoreCompanyJobQueue(Config.WORKER_QUEUE_COLLECTION)))
+        else:
+            asyncio.run(analyze_startup_pitch_deck())
         logger.info("Job finished")
     except Exception:
         sys.exit(2)
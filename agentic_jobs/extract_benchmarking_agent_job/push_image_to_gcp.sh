@@ -9,6 +9,6 @@ FULL_IMAGE="${REGION}-docker.pkg.dev/${PROJECT}/${REPO}/${IMAGE}:${TAG}"
 # configure docker auth to Artifact Registry
 gcloud auth configure-docker ${REGION}-docker.pkg.dev
 
-# build & push
-docker build -t ${FULL_IMAGE} .
+# build & push (repository root is the build context so packages/startup_eval_tools is available)
+docker build -t ${FULL_IMAGE} -f Dockerfile ../..
 docker push ${FULL_IMAGE}
@@ -1,5 +1,5 @@
 from .benchmarking_startup_agent import benchmarking_startup_agent
-from .extraction_pitch_deck_agent import extraction_pitch_deck_agent
+from .extraction_pitch_deck_agent import extraction_pitch_deck_agent, queue_pitch_deck_for_ingestion
 from .visualisation_focus_points import visualisation_focus_points
 from .generate_qna_agent import generate_qna_agent
 from .overview_sub_agent import overview_sub_agent
@@ -6,22 +6,56 @@ from .overview_sub_agent import overview_sub_agent
 from .competitor_analysis_sub_agent import competitor_analysis_sub_agent
 from .partnerships_strategic_analysis_sub_agent import partnerships_and_strategic_analysis_sub_agent
 from .business_model_sub_agent import business_model_sub_agent
-from google.adk.agents import ParallelAgent
 from config import Config
+import json
+from utils import flush_corpus_ingestion_queue, get_stage_checkpoint_store, DagAgent, StageIO, \
+    SUB_AGENT_TIMEOUT_SECONDS, SUB_AGENT_MAX_TOOL_CALLS, TOOL_BUDGET_GRACE_CALLS
 
 GCS_BUCKET_NAME = Config.GCS_BUCKET_NAME
 GCP_PITCH_DECK_OUTPUT_FOLDER = Config.GCP_PITCH_DECK_OUTPUT_FOLDER
 
+BENCHMARKING_SUB_AGENTS = [business_model_sub_agent,
+                           competitor_analysis_sub_agent,
+                           funding_and_financials_sub_agent,
+                           industry_trends_sub_agent,
+                           overview_sub_agent,
+                           partnerships_and_strategic_analysis_sub_agent,
+                           team_profiling_sub_agent,
+                           traction_sub_agent]
 
-benchmarking_startup_agent = ParallelAgent(
+
+def incomplete_sub_agent_result(stage: str, reason: str) -> str:
+    """Result of a sub agent that did not finish: no facts, and its whole section reported as a gap."""
+    return json.dumps({
+        "incomplete": True,
+        "stage": stage,
+        "reason": reason,
+        "gaps": {
+            "mandatory_information": [f"The {stage} analysis did not complete ({reason}); none of its focus points were researched."],
+            "optional_information": [],
+        },
+    })
+
+
+# the sub agents are independent of each other (a graph without edges runs them all at once); each one
+# is checkpointed on its own so a retried job only re-runs the sub agents that had not finished, and
+# has its own deadline and tool budget so the others' results survive a slow one
+benchmarking_startup_agent = DagAgent(
     name="benchmarking_startup_agent",
-    sub_agents=[business_model_sub_agent,
-                competitor_analysis_sub_agent,
-                funding_and_financials_sub_agent,
-                industry_trends_sub_agent,
-                overview_sub_agent,
-                partnerships_and_strategic_analysis_sub_agent,
-                team_profiling_sub_agent,
-                traction_sub_agent],
+    sub_agents=BENCHMARKING_SUB_AGENTS,
+    stage_io={
+        # "<x>_sub_agent_result" is written by the sub agent reading the "<x>_pitch_deck" projection
+        agent.name: StageIO(reads=("rag_corpus_name", agent.output_key.replace("_sub_agent_result", "_pitch_deck")),
+                            writes=(agent.output_key,), checkpoint=True, timeout_seconds=SUB_AGENT_TIMEOUT_SECONDS,
+                            # enforce_tool_budget refuses calls past the budget; stop agents that keep trying
+                            max_tool_calls=SUB_AGENT_MAX_TOOL_CALLS + TOOL_BUDGET_GRACE_CALLS)
+        for agent in BENCHMARKING_SUB_AGENTS
+    },
+    checkpoint_store_factory=get_stage_checkpoint_store,
+    # a slow or failing sub agent must not cost the results of the others
+    partial_completion=True,
+    incomplete_result=incomplete_sub_agent_result,
     description="An agent that benchmarks a startup against its competitors using a processed pitch deck JSON file and web search. Saves the human readable markdown response to Google Cloud Storage.",
+    # sub agent results are queued for RAG ingestion while they run; import them in one batch once all finished
+    after_agent_callback=flush_corpus_ingestion_queue,
 )
@@ -2,10 +2,10 @@ import json
 from google.adk.agents import LlmAgent
 from google.adk.agents.callback_context import CallbackContext
 from google.genai import types
-from llm_model_config import report_generation_model
+from llm_model_config import tiered_model
 from tools import extract, search
 from typing import Optional
-from utils import update_sub_agent_result_to_firestore, save_file_content_to_gcs, update_data_to_corpus
+from utils import update_sub_agent_result_to_firestore, save_file_content_to_gcs, corpus_ingestion_queue, enforce_tool_budget, apply_token_budget, record_token_usage, SessionState, BusinessModelResult
 from config import Config
 
 GCS_BUCKET_NAME = Config.GCS_BUCKET_NAME
@@ -14,12 +14,10 @@ FIRESTORE_COMPANY_COLLECTION = Config.FIRESTORE_COMPANY_COLLECTION
 
 async def post_agent_execution(callback_context: CallbackContext) -> Optional[types.Content]:
     agent_name = callback_context.agent_name
-    current_state = callback_context.state.to_dict()
-    print("State after business model sub agent:", current_state)
+    current_state = SessionState(callback_context.state)
     corpus_name = current_state.get("rag_corpus_name")
     company_doc_id = current_state.get("firestore_doc_id")
-    business_model_sub_agent_result = json.loads(current_state.get(
-        "business_model_sub_agent_result").removeprefix("```json").removesuffix("```").strip())
+    business_model_sub_agent_result = current_state.result("business_model_sub_agent_result")
     if not business_model_sub_agent_result or not company_doc_id:
         return None
     gcs_uri = await save_file_content_to_gcs(bucket_name=GCS_BUCKET_NAME,
@@ -29,16 +27,16 @@ async def post_agent_execution(callback_context: CallbackContext) -> Optional[ty
                                              file_extension="json",
                                              file_name=f"{agent_name}_result"
                                              )
-    update_sub_agent_result_to_firestore(collection_name=FIRESTORE_COMPANY_COLLECTION, document_id=company_doc_id,
-                                         sub_agent_field="business_model_sub_agent_gcs_uri", gcs_uri=gcs_uri)
-    update_data_to_corpus(corpus_name=corpus_name, document_gcs_paths=[gcs_uri])
+    await update_sub_agent_result_to_firestore(collection_name=FIRESTORE_COMPANY_COLLECTION, document_id=company_doc_id,
+                                               sub_agent_field="business_model_sub_agent_gcs_uri", gcs_uri=gcs_uri)
+    await corpus_ingestion_queue.enqueue(corpus_name=corpus_name, document_gcs_paths=[gcs_uri])
     print(f"Business Model Sub Agent result saved to GCS URI: {gcs_uri}")
 
     return None
 
 business_model_sub_agent = LlmAgent(
     name="business_model_sub_agent",
-    model=report_generation_model,
+    model=tiered_model("business_model_sub_agent"),
     include_contents='none',
     description="An agent that generates the business model analysis of the startup company",
     instruction=f"""
@@ -46,7 +44,7 @@ business_model_sub_agent = LlmAgent(
 
     INPUT:
         - Pitch deck JSON object: 
-            {{pitch_deck}}
+            {{business_model_pitch_deck}}
         - List of company official websites:-
             {{company_websites}}
     
@@ -158,11 +156,15 @@ business_model_sub_agent = LlmAgent(
     YOU MUST RETURN THE JSON OUTPUT AS SPECIFIED ABOVE AND NOTHING ELSE.
 
     CRITICAL INSTRUCTION FOR FINAL OUTPUT:
-    When you have gathered all necessary information and are ready to generate the final JSON output, DO NOT call any tool. Simply output the JSON text as your final response to the user.
+    When you have gathered all necessary information, stop calling the research tools and give the final JSON output: call the set_model_response tool with it when that tool is available, otherwise output the JSON text as your final response to the user.
 
     """,
     output_key="business_model_sub_agent_result",
+    output_schema=BusinessModelResult,
     generate_content_config=types.GenerateContentConfig(temperature=0),
     after_agent_callback=post_agent_execution,
+    before_model_callback=apply_token_budget,
+    after_model_callback=record_token_usage,
+    before_tool_callback=enforce_tool_budget,
     tools=[search, extract]
 )
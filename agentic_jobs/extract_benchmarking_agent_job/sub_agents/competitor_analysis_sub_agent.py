@@ -2,10 +2,10 @@ import json
 from google.adk.agents import LlmAgent
 from google.genai import types
 from google.adk.agents.callback_context import CallbackContext
-from llm_model_config import report_generation_model
-from tools import extract, search
+from llm_model_config import tiered_model
+from tools import extract, extract_many, search
 from typing import Optional
-from utils import update_sub_agent_result_to_firestore, save_file_content_to_gcs, update_data_to_corpus
+from utils import update_sub_agent_result_to_firestore, save_file_content_to_gcs, corpus_ingestion_queue, enforce_tool_budget, apply_token_budget, record_token_usage, SessionState, CompetitorAnalysisResult
 from config import Config
 
 GCS_BUCKET_NAME = Config.GCS_BUCKET_NAME
@@ -14,12 +14,10 @@ FIRESTORE_COMPANY_COLLECTION = Config.FIRESTORE_COMPANY_COLLECTION
 
 async def post_agent_execution(callback_context: CallbackContext) -> Optional[types.Content]:
     agent_name = callback_context.agent_name
-    current_state = callback_context.state.to_dict()
-    print("State after competitor analysis sub agent:", current_state)
+    current_state = SessionState(callback_context.state)
     corpus_name = current_state.get("rag_corpus_name")
     company_doc_id = current_state.get("firestore_doc_id")
-    competitor_analysis_sub_agent_result = json.loads(current_state.get(
-        "competitor_analysis_sub_agent_result").removeprefix("```json").removesuffix("```").strip())
+    competitor_analysis_sub_agent_result = current_state.result("competitor_analysis_sub_agent_result")
     if not competitor_analysis_sub_agent_result or not company_doc_id:
         return None
     gcs_uri = await save_file_content_to_gcs(bucket_name=GCS_BUCKET_NAME,
@@ -29,9 +27,9 @@ async def post_agent_execution(callback_context: CallbackContext) -> Optional[ty
                                              file_extension="json",
                                              file_name=f"{agent_name}_result"
                                              )
-    update_sub_agent_result_to_firestore(collection_name=FIRESTORE_COMPANY_COLLECTION, document_id=company_doc_id,
-                                         sub_agent_field="competitor_analysis_sub_agent_gcs_uri", gcs_uri=gcs_uri)
-    update_data_to_corpus(corpus_name=corpus_name, document_gcs_paths=[gcs_uri])
+    await update_sub_agent_result_to_firestore(collection_name=FIRESTORE_COMPANY_COLLECTION, document_id=company_doc_id,
+                                               sub_agent_field="competitor_analysis_sub_agent_gcs_uri", gcs_uri=gcs_uri)
+    await corpus_ingestion_queue.enqueue(corpus_name=corpus_name, document_gcs_paths=[gcs_uri])
     print(f"Competitor Analysis Sub Agent result saved to GCS URI: {gcs_uri}")
 
     return None
@@ -39,7 +37,7 @@ async def post_agent_execution(callback_context: CallbackContext) -> Optional[ty
 
 competitor_analysis_sub_agent = LlmAgent(
     name="competitor_analysis_sub_agent",
-    model=report_generation_model,
+    model=tiered_model("competitor_analysis_sub_agent"),
     include_contents='none',
     description="An agent that generates the competitor analysis of the startup company",
     instruction=f"""
@@ -47,17 +45,22 @@ competitor_analysis_sub_agent = LlmAgent(
 
     INPUT:
         - Pitch deck JSON object: 
-            {{pitch_deck}}
+            {{competitor_analysis_pitch_deck}}
         - List of company official websites:
             {{company_websites}}
     
     You have access to ONLY the following TOOLS:
         1. 'search' : Use this tool to perform a web search using the Tavily API to gather information as instructed in the "TASK" section.
         2. 'extract' : Use this tool to extract textual content from a given webpage URL as instructed in the "TASK" section.
+        3. 'extract_many' : Use this tool to extract textual content from several webpage URLs in a single call as instructed in the "TASK" section.
 
     Example of how to call the tools:-
         search(query="What is the weather in New York?") 
         extract(url="https://www.example.com")
+        extract_many(urls=["https://www.example.com", "https://www.example.org/about"])
+
+    TOOL USAGE:
+    - Whenever you need the content of more than one webpage, collect the URLs first (from the company websites list and the 'search' results) and fetch them together with ONE 'extract_many' call instead of calling 'extract' for each URL. Use 'extract' only for a single follow-up page.
     
     CRITICAL:
     - YOU MUST USE THE EXACT TOOL NAMES AS PROVIDED ABOVE WHILE MAKING TOOL CALLS. DO NOT INVENT ANY TOOL NAME OF YOUR OWN. YOU MUST DOUBLE CHECK THE TOOL NAME WITH THE ONES PROVIDED ABOVE BEFORE CALLING A TOOL.
@@ -204,10 +207,14 @@ competitor_analysis_sub_agent = LlmAgent(
     YOU MUST RETURN THE JSON OUTPUT AS SPECIFIED ABOVE AND NOTHING ELSE.
 
     CRITICAL INSTRUCTION FOR FINAL OUTPUT:
-    When you have gathered all necessary information and are ready to generate the final JSON output, DO NOT call any tool. Simply output the JSON text as your final response to the user.
+    When you have gathered all necessary information, stop calling the research tools and give the final JSON output: call the set_model_response tool with it when that tool is available, otherwise output the JSON text as your final response to the user.
     """,
     output_key="competitor_analysis_sub_agent_result",
+    output_schema=CompetitorAnalysisResult,
     after_agent_callback=post_agent_execution,
+    before_model_callback=apply_token_budget,
+    after_model_callback=record_token_usage,
+    before_tool_callback=enforce_tool_budget,
     generate_content_config=types.GenerateContentConfig(temperature=0),
-    tools=[search, extract]
+    tools=[search, extract, extract_many]
 )
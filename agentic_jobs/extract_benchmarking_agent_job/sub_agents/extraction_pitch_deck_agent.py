@@ -7,14 +7,18 @@
 """
 
 import json
-from google.adk.agents import LlmAgent
-from google.adk.planners import BuiltInPlanner
+import re
+from typing import AsyncGenerator
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
 from google.genai import types
 from google.adk.agents.callback_context import CallbackContext
-from llm_model_config import report_generation_model
+from llm_model_config import parse_json_output
 from tools import get_gcs_uri_for_file, analyze_doc_from_uri
 from config import Config
-from utils import prepare_rag_corpus, update_data_to_corpus, update_sub_agent_result_to_firestore, save_file_content_to_gcs
+from utils import corpus_ingestion_queue, update_sub_agent_result_to_firestore, save_file_content_to_gcs, \
+    build_pitch_deck_projections, pitch_deck_projection_report, PITCH_DECK_PROJECTION_REPORT_KEY, SessionState
 
 GOOGLE_CLOUD_PROJECT = Config.GOOGLE_CLOUD_PROJECT
 GOOGLE_CLOUD_REGION = Config.GOOGLE_CLOUD_REGION
@@ -24,91 +28,86 @@ FIRESTORE_COMPANY_COLLECTION = Config.FIRESTORE_COMPANY_COLLECTION
 
 
 async def post_agent_execution(callback_context: CallbackContext) -> None:
-    try:
-        current_state = callback_context.state.to_dict()
-        print("State after extraction pitch deck sub agent:", current_state)
-        corpus_name = current_state.get("rag_corpus_name")
-        extraction_pitch_deck_result = json.loads(current_state.get(
-            "extraction_pitch_deck_result").removeprefix("```json").removesuffix("```").strip())
-        extracted_filename = extraction_pitch_deck_result.get(
-            "extracted_filename") if extraction_pitch_deck_result else None
-        extracted_content = extraction_pitch_deck_result.get(
-            "extracted_content") if extraction_pitch_deck_result else None
-        firestore_doc_id = current_state.get("firestore_doc_id")
-        if not extracted_filename or not extracted_content or not firestore_doc_id:
-            return None
-        callback_context.state.update(
-            {**current_state, "pitch_deck": extracted_content})
-        gcs_uri = await save_file_content_to_gcs(bucket_name=GCS_BUCKET_NAME, file_content=json.dumps(extracted_content),
-                                                 folder_name=f"{GCP_PITCH_DECK_OUTPUT_FOLDER}/{firestore_doc_id}/analysis",
-                                                 file_extension="json",
-                                                 file_name=extracted_filename
-                                                 )
-        update_sub_agent_result_to_firestore(collection_name=FIRESTORE_COMPANY_COLLECTION, document_id=firestore_doc_id,
-                                             sub_agent_field="extraction_pitch_deck_sub_agent_gcs_uri", gcs_uri=gcs_uri)
-        update_data_to_corpus(corpus_name=corpus_name, document_gcs_paths=[gcs_uri])
-        print(
-            f"Extraction Pitch Deck Agent result saved to GCS URI: {gcs_uri}")
-        return None
-    except Exception as e:
-        print(
-            f"Error in post_agent_execution of extraction_pitch_deck_agent: {e}")
-        return None
-
-
-extraction_pitch_deck_agent = LlmAgent(
+    """
+    Stores the extracted pitch deck and writes it and its projections to the state. Every later stage
+    reads them, so an error here is raised (the run fails) instead of leaving them unwritten.
+    """
+    current_state = SessionState(callback_context.state)
+    extraction_pitch_deck_result = current_state.result("extraction_pitch_deck_result")
+    extracted_filename = extraction_pitch_deck_result.get(
+        "extracted_filename") if extraction_pitch_deck_result else None
+    extracted_content = extraction_pitch_deck_result.get(
+        "extracted_content") if extraction_pitch_deck_result else None
+    firestore_doc_id = current_state.get("firestore_doc_id")
+    if not extracted_filename or not extracted_content or not firestore_doc_id:
+        raise RuntimeError(f"Pitch deck extraction of {firestore_doc_id} produced no result to store")
+    # each sub agent reads only its projection of the pitch deck (see utils/pitch_deck_projection.py)
+    pitch_deck_projections = build_pitch_deck_projections(extracted_content)
+    current_state.update(
+        {"pitch_deck": extracted_content, **pitch_deck_projections,
+         PITCH_DECK_PROJECTION_REPORT_KEY: pitch_deck_projection_report(extracted_content, pitch_deck_projections)})
+    gcs_uri = await save_file_content_to_gcs(bucket_name=GCS_BUCKET_NAME, file_content=json.dumps(extracted_content),
+                                             folder_name=f"{GCP_PITCH_DECK_OUTPUT_FOLDER}/{firestore_doc_id}/analysis",
+                                             file_extension="json",
+                                             file_name=extracted_filename
+                                             )
+    await update_sub_agent_result_to_firestore(collection_name=FIRESTORE_COMPANY_COLLECTION, document_id=firestore_doc_id,
+                                               sub_agent_field="extraction_pitch_deck_sub_agent_gcs_uri", gcs_uri=gcs_uri)
+    # queued for the RAG corpus by queue_pitch_deck_for_ingestion once the corpus is ready
+    current_state.set("extraction_pitch_deck_sub_agent_gcs_uri", gcs_uri)
+    print(
+        f"Extraction Pitch Deck Agent result saved to GCS URI: {gcs_uri}")
+    return None
+
+
+async def queue_pitch_deck_for_ingestion(callback_context: CallbackContext) -> None:
+    """Queues the extracted pitch deck for the RAG corpus (corpus preparation runs alongside the extraction)."""
+    current_state = SessionState(callback_context.state)
+    await corpus_ingestion_queue.enqueue(corpus_name=current_state.get("rag_corpus_name"),
+                                         document_gcs_paths=[current_state.get("extraction_pitch_deck_sub_agent_gcs_uri")])
+    return None
+
+
+def _extracted_filename(extracted_content: dict, input_deck_filename: str) -> str:
+    """'<company_name>_analysis' as a lowercase identifier (the uploaded file's name if the deck names no company)."""
+    name = extracted_content.get("company_name") if isinstance(extracted_content.get("company_name"), str) else ""
+    slug = re.sub(r"[^a-z0-9]+", "_", (name or input_deck_filename or "pitch_deck").lower()).strip("_")
+    return f"{slug or 'pitch_deck'}_analysis"
+
+
+class ExtractionPitchDeckAgent(BaseAgent):
+    """
+    Extracts the pitch deck without a model turn: analyzes the uploaded file with analyze_doc_from_uri
+    and writes {"extracted_filename": ..., "extracted_content": ...} to `output_key`, the result the
+    LLM orchestrator used to echo back. The analyzer's own Gemini calls are unchanged.
+    """
+
+    output_key: str
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        file_extension = state.get("file_extension")
+        gcs_uri = get_gcs_uri_for_file(bucket_name=GCS_BUCKET_NAME,
+                                       file_name=f"{state.get('founder_id')}/{state.get('input_deck_filename')}",
+                                       file_extension=file_extension)
+        analysis = await analyze_doc_from_uri(gcs_uri=gcs_uri, file_extension=file_extension)
+        try:
+            extracted_content = parse_json_output(analysis)
+        except ValueError as e:
+            raise RuntimeError(f"The analysis of {gcs_uri} is not valid JSON: {e}") from e
+        if not isinstance(extracted_content, dict) or extracted_content.get("error"):
+            raise RuntimeError(f"The analysis of {gcs_uri} failed: {str(extracted_content)[:500]}")
+        result = {"extracted_filename": _extracted_filename(extracted_content, state.get("input_deck_filename")),
+                  "extracted_content": extracted_content}
+        yield Event(invocation_id=ctx.invocation_id, author=self.name, branch=ctx.branch,
+                    content=types.Content(role="model", parts=[types.Part(
+                        text=f"Extracted {gcs_uri} as {result['extracted_filename']}")]),
+                    actions=EventActions(state_delta={self.output_key: result}))
+
+
+extraction_pitch_deck_agent = ExtractionPitchDeckAgent(
     name="extraction_pitch_deck_agent",
-    model=report_generation_model,
-    include_contents='none',
-    planner=BuiltInPlanner(thinking_config=types.ThinkingConfig(
-        include_thoughts=False
-    )),
     description="An agent that extracts structured information from a pitch deck textual document stored in Google Cloud Storage.",
-    # before_tool_callback=sanitize_gcs_filename_callback,
-    instruction=f"""
-    You are an expert orchestrator for pitch deck analysis. Your task is to follow a strict three-step process using the tools provided.
-
-    CRITICAL INSTRUCTIONS:
-    - You MUST follow the workflow steps in order.
-    - Do not skip any steps.
-    - Your final output MUST be the filename of the saved JSON file.
-    - You must return the filename WITHOUT the file extension at the end.
-
-    You have access to ONLY the following TOOLS:
-        - 'get_gcs_uri_for_file' : To get the GCS URI of the pitch deck {{file_extension}} file.
-        - 'analyze_doc_from_uri' : To analyze the pitch deck {{file_extension}} from the GCS URI and extract structured JSON information.
-    
-    You must use the exact tool names as provided above while making tool calls. Dont make up any tool name of your own.
-
-    CRITICAL:
-        DONT INCLUDE CHARACTERS LIKE WHITESPACE, QUOTES, OR PUNCTUATION, NEW LINE CHARACTERS ETC. IN AND AROUND THE FILENAME.
-
-    
-    WORKFLOW (MUST BE IMPLEMENTED SERIALLY IN ORDER):
-    1.  **Get File URI:** Call the `get_gcs_uri_for_file` tool exactly as follows:
-        - bucket_name: '{GCS_BUCKET_NAME}'
-        - file_name: '{{founder_id}}/{{input_deck_filename}}'
-        - file_extension: '{{file_extension}}'
-
-    2.  **Analyze {{file_extension}}:** Take the GCS URI from Step 1 and pass it to the `analyze_doc_from_uri` tool. This tool will read the {{file_extension}} (including all text and visuals) and return a structured JSON string. CALL THE TOOL EXACTLY AS FOLLOWS:
-        - gcs_uri: '<GCS_URI_FROM_STEP_1>'
-        - file_extension: '{{file_extension}}'
-    
-    3.  **Generate Filename:** Take the JSON string from Step 2 and generate a suitable filename (e.g., 'company_name_analysis'). The filename MUST be descriptive of the content and relevant to the company.
-    
-    4.  **Return the filename (no extension) and the JSON content:** After saving the file, you MUST return the generated filename without any extension (e.g., 'company_name_analysis') and the JSON content as described in the format below:-
-
-    OUTPUT FORMAT:
-    {{
-        "extracted_filename": "<FILENAME_WITHOUT_EXTENSION>",
-        "extracted_content": <STRUCTURED_JSON_CONTENT>
-    }}
-
-    YOU MUST RETURN THE JSON OUTPUT AS SPECIFIED ABOVE AND NOTHING ELSE.
-    """,
     output_key="extraction_pitch_deck_result",
     after_agent_callback=post_agent_execution,
-    before_agent_callback=prepare_rag_corpus,
-    generate_content_config=types.GenerateContentConfig(temperature=0),
-    tools=[get_gcs_uri_for_file, analyze_doc_from_uri],
 )
@@ -4,19 +4,25 @@ from google.adk.agents.callback_context import CallbackContext
 from google.adk.agents.readonly_context import ReadonlyContext
 from google.genai import types
 from config import Config
-from llm_model_config import report_generation_model
-from utils import read_benchmark_framework_text, save_file_content_to_gcs
+from llm_model_config import tiered_model
+from utils import read_benchmark_framework_sections, save_file_content_to_gcs, minify_json, apply_token_budget, record_token_usage, SessionState, GeneratedQuestions
 
 GCS_BUCKET_NAME = Config.GCS_BUCKET_NAME
 GCP_PITCH_DECK_OUTPUT_FOLDER = Config.GCP_PITCH_DECK_OUTPUT_FOLDER
 
-benchmarking_framework_text = read_benchmark_framework_text()
+# questions target the scored dimensions and risks; overview, industry notes and sources are left out
+benchmarking_framework_text = read_benchmark_framework_sections(
+    "scoring", "risk", "moat", "financials", "team", "market", "product")
+# the sub agent results whose gaps the questions are about (the competitor analysis reports none)
+GAP_RESULT_KEYS = ("business_model_sub_agent_result", "funding_and_financials_sub_agent_result",
+                   "industry_trends_sub_agent_result", "overview_sub_agent_result",
+                   "partnerships_and_strategic_analysis_sub_agent_result", "team_profiling_sub_agent_result",
+                   "traction_sub_agent_result")
 
 
 async def post_agent_execution(callback_context: CallbackContext) -> None:
-    current_state = callback_context.state.to_dict()
-    generated_questions_result = json.loads(current_state.get(
-        "generated_questions").removeprefix("```json").removesuffix("```").strip())
+    current_state = SessionState(callback_context.state)
+    generated_questions_result = current_state.result("generated_questions")
     questions = generated_questions_result.get(
         "questions") if generated_questions_result else None
     company_doc_id = current_state.get("firestore_doc_id")
@@ -32,16 +38,10 @@ async def post_agent_execution(callback_context: CallbackContext) -> None:
 
 
 def generate_dynamic_instruction(ctx: ReadonlyContext) -> str:
-    pitch_deck = ctx.session.state.get("pitch_deck", "{}")
-    gaps = {
-        "business_model_sub_agent_gaps": json.loads(ctx.session.state.get("business_model_sub_agent_result", {}).removeprefix("```json").removesuffix("```").strip()).get("gaps", {}),
-        "funding_and_financials_sub_agent_gaps": json.loads(ctx.session.state.get("funding_and_financials_sub_agent_result", {}).removeprefix("```json").removesuffix("```").strip()).get("gaps", {}),
-        "industry_trends_sub_agent_gaps": json.loads(ctx.session.state.get("industry_trends_sub_agent_result", {}).removeprefix("```json").removesuffix("```").strip()).get("gaps", {}),
-        "overview_sub_agent_gaps": json.loads(ctx.session.state.get("overview_sub_agent_result", {}).removeprefix("```json").removesuffix("```").strip()).get("gaps", {}),
-        "partnerships_and_strategic_analysis_sub_agent_gaps": json.loads(ctx.session.state.get("partnerships_and_strategic_analysis_sub_agent_result", {}).removeprefix("```json").removesuffix("```").strip()).get("gaps", {}),
-        "team_profiling_sub_agent_gaps": json.loads(ctx.session.state.get("team_profiling_sub_agent_result", {}).removeprefix("```json").removesuffix("```").strip()).get("gaps", {}),
-        "traction_sub_agent_gaps": json.loads(ctx.session.state.get("traction_sub_agent_result", {}).removeprefix("```json").removesuffix("```").strip()).get("gaps", {}),
-    }
+    state = SessionState(ctx.state)
+    pitch_deck = state.get("generate_qna_pitch_deck") or state.get("pitch_deck", "{}")
+    gaps = {key.removesuffix("_result") + "_gaps": state.result(key).get("gaps", {})
+            for key in GAP_RESULT_KEYS}
 
     return f"""
 
@@ -51,7 +51,7 @@ def generate_dynamic_instruction(ctx: ReadonlyContext) -> str:
         - Pitch deck JSON:
             {pitch_deck}
         - Gaps:
-            {str(gaps)}
+            {minify_json(gaps)}
         - Benchmarking framework text (to be used for generating questions) as follows:
             {benchmarking_framework_text}
 
@@ -93,11 +93,14 @@ def generate_dynamic_instruction(ctx: ReadonlyContext) -> str:
 
 generate_qna_agent = LlmAgent(
     name=f"generate_qna_agent",
-    model=report_generation_model,
+    model=tiered_model("generate_qna_agent"),
     include_contents='none',
     description=f"An agent that understands the gaps in the sub agents and creates a list of questions to be asked to the startup founder for further clarification.",
     instruction=generate_dynamic_instruction,
     generate_content_config=types.GenerateContentConfig(temperature=0),
     output_key="generated_questions",
+    output_schema=GeneratedQuestions,
     after_agent_callback=post_agent_execution,
+    before_model_callback=apply_token_budget,
+    after_model_callback=record_token_usage,
 )
@@ -1,11 +1,12 @@
 import json
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.agents import LlmAgent
+from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.planners import BuiltInPlanner
 from google.genai import types
 from config import Config
-from llm_model_config import report_generation_model
-from utils import update_sub_agent_result_to_firestore, save_file_content_to_gcs, update_data_to_corpus
+from llm_model_config import tiered_model
+from utils import update_sub_agent_result_to_firestore, save_file_content_to_gcs, corpus_ingestion_queue, apply_token_budget, record_token_usage, SessionState, minify_json, InvestmentRecommendationResult
 
 GCS_BUCKET_NAME = Config.GCS_BUCKET_NAME
 GCP_PITCH_DECK_OUTPUT_FOLDER = Config.GCP_PITCH_DECK_OUTPUT_FOLDER
@@ -13,10 +14,9 @@ FIRESTORE_COMPANY_COLLECTION = Config.FIRESTORE_COMPANY_COLLECTION
 
 
 async def post_agent_execution(callback_context: CallbackContext) -> None:
-    current_state = callback_context.state.to_dict()
+    current_state = SessionState(callback_context.state)
     corpus_name = current_state.get("rag_corpus_name")
-    investment_recommendation_result = json.loads(current_state.get(
-        "investment_recommendation_sub_agent_result").removeprefix("```json").removesuffix("```").strip())
+    investment_recommendation_result = current_state.result("investment_recommendation_sub_agent_result")
     investment_recommendation_summary = investment_recommendation_result.get(
         "investment_recommendation_summary") if investment_recommendation_result else None
     confidence_score = investment_recommendation_result.get(
@@ -29,44 +29,68 @@ async def post_agent_execution(callback_context: CallbackContext) -> None:
                                        file_extension="json",
                                        file_name="investment_recommendation"
                                        )
-    update_sub_agent_result_to_firestore(collection_name=FIRESTORE_COMPANY_COLLECTION, document_id=firestore_doc_id,
-                                         sub_agent_field="investment_recommendation_sub_agent_gcs_uri", gcs_uri=gcs_uri)
-    update_data_to_corpus(corpus_name=corpus_name, document_gcs_paths=[gcs_uri])
+    await update_sub_agent_result_to_firestore(collection_name=FIRESTORE_COMPANY_COLLECTION, document_id=firestore_doc_id,
+                                               sub_agent_field="investment_recommendation_sub_agent_gcs_uri", gcs_uri=gcs_uri)
+    await corpus_ingestion_queue.enqueue(corpus_name=corpus_name, document_gcs_paths=[gcs_uri])
     print(
         f"Investment Recommendation Sub Agent result saved to GCS URI: {gcs_uri}")
     return None
 
 
-investment_recommendation_sub_agent = LlmAgent(
-    name="investment_recommendation_sub_agent",
-    model=report_generation_model,
-    planner=BuiltInPlanner(
-        thinking_config=types.ThinkingConfig(include_thoughts=False)),
-    description="An agent that synthesizes information from various sub-agents to generate a comprehensive investment recommendation summary for startup companies.",
-    instruction=f"""
+SUB_AGENT_RESULT_KEYS = ("business_model_sub_agent_result", "competitor_analysis_sub_agent_result",
+                         "funding_and_financials_sub_agent_result", "industry_trends_sub_agent_result",
+                         "overview_sub_agent_result", "partnerships_and_strategic_analysis_sub_agent_result",
+                         "team_profiling_sub_agent_result", "traction_sub_agent_result")
+
+
+def generate_dynamic_instruction(ctx: ReadonlyContext) -> str:
+    # the results are stored parsed (dicts), which {key} state injection would render as Python reprs
+    state = SessionState(ctx.state)
+    results = {key: minify_json(state.result(key)) for key in SUB_AGENT_RESULT_KEYS}
+
+    return f"""
     You are an expert financial analyst and investment advisor specializing in startup investments.
 
     INPUT:
-        - JSON response from all the sub agents under their respective key names.
-          Keys are: 'business_model_sub_agent_result', 'competitor_analysis_sub_agent_result',
-          'funding_and_financials_sub_agent_result', 'industry_trends_sub_agent_result',
-          'overview_sub_agent_result', 'partnerships_and_strategic_analysis_sub_agent_result',
-          'team_profiling_sub_agent_result', 'traction_sub_agent_result'
+        - JSON response from all the sub agents under their respective key names:
+            - business_model_sub_agent_result: {results['business_model_sub_agent_result']}
+            - competitor_analysis_sub_agent_result: {results['competitor_analysis_sub_agent_result']}
+            - funding_and_financials_sub_agent_result: {results['funding_and_financials_sub_agent_result']}
+            - industry_trends_sub_agent_result: {results['industry_trends_sub_agent_result']}
+            - overview_sub_agent_result: {results['overview_sub_agent_result']}
+            - partnerships_and_strategic_analysis_sub_agent_result: {results['partnerships_and_strategic_analysis_sub_agent_result']}
+            - team_profiling_sub_agent_result: {results['team_profiling_sub_agent_result']}
+            - traction_sub_agent_result: {results['traction_sub_agent_result']}
 
     (Every item is an object with "fact", "sources", "reference_type".)
+    A result containing "incomplete": true comes from a sub agent that did not finish (the "reason" says why). Treat that section as missing data:
+    do not invent facts for it, state in the summary which sections are missing, and lower the confidence score accordingly.
     
     Your ONLY task is to synthesize these facts and generate an investment summary for the startup company based on the information provided and generate a confidence score (0-100) for investment recommendation.
 
     OUTPUT FORMAT:
     {{
         "investment_recommendation_summary": "<DETAILED_INVESTMENT_RECOMMENDATION_SUMMARY_STRING>",
-        "confidence_score": "<CONFIDENCE_SCORE_INTEGER>"
+        "confidence_score": <CONFIDENCE_SCORE_INTEGER>
     }}
 
     CRITICAL OUTPUT NOTE:
         - YOU MUST RETURN THE JSON OUTPUT AS SPECIFIED ABOVE AND NOTHING ELSE.
-    """,
+    """
+
+
+investment_recommendation_sub_agent = LlmAgent(
+    name="investment_recommendation_sub_agent",
+    model=tiered_model("investment_recommendation_sub_agent"),
+    include_contents='none',
+    planner=BuiltInPlanner(
+        thinking_config=types.ThinkingConfig(include_thoughts=False)),
+    description="An agent that synthesizes information from various sub-agents to generate a comprehensive investment recommendation summary for startup companies.",
+    instruction=generate_dynamic_instruction,
     output_key="investment_recommendation_sub_agent_result",
+    output_schema=InvestmentRecommendationResult,
     after_agent_callback=post_agent_execution,
+    before_model_callback=apply_token_budget,
+    after_model_callback=record_token_usage,
     generate_content_config=types.GenerateContentConfig(temperature=0)
 )
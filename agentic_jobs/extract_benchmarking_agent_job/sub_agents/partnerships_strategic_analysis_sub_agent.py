@@ -2,10 +2,10 @@ import json
 from google.adk.agents import LlmAgent
 from google.genai import types
 from google.adk.agents.callback_context import CallbackContext
-from llm_model_config import report_generation_model
+from llm_model_config import tiered_model
 from tools import extract, search
 from typing import Optional
-from utils import update_sub_agent_result_to_firestore, save_file_content_to_gcs, update_data_to_corpus
+from utils import update_sub_agent_result_to_firestore, save_file_content_to_gcs, corpus_ingestion_queue, enforce_tool_budget, apply_token_budget, record_token_usage, SessionState, PartnershipsAndStrategicAnalysisResult
 from config import Config
 
 GCS_BUCKET_NAME = Config.GCS_BUCKET_NAME
@@ -13,12 +13,10 @@ FIRESTORE_COMPANY_COLLECTION = Config.FIRESTORE_COMPANY_COLLECTION
 
 async def post_agent_execution(callback_context: CallbackContext) -> Optional[types.Content]:
     agent_name = callback_context.agent_name
-    current_state = callback_context.state.to_dict()
-    print("State after partnerships and strategic analysis sub agent:", current_state)
+    current_state = SessionState(callback_context.state)
     company_doc_id = current_state.get("firestore_doc_id")
     corpus_name = current_state.get("rag_corpus_name")
-    partnerships_and_strategic_analysis_sub_agent_result = json.loads(current_state.get(
-        "partnerships_and_strategic_analysis_sub_agent_result").removeprefix("```json").removesuffix("```").strip())
+    partnerships_and_strategic_analysis_sub_agent_result = current_state.result("partnerships_and_strategic_analysis_sub_agent_result")
     if not partnerships_and_strategic_analysis_sub_agent_result or not company_doc_id:
         return None
     gcs_uri = await save_file_content_to_gcs(bucket_name=GCS_BUCKET_NAME,
@@ -28,16 +26,16 @@ async def post_agent_execution(callback_context: CallbackContext) -> Optional[ty
                                        file_extension="json",
                                        file_name=f"{agent_name}_result"
                                        )
-    update_sub_agent_result_to_firestore(collection_name=FIRESTORE_COMPANY_COLLECTION, document_id=company_doc_id,
-                                         sub_agent_field="partnerships_and_strategic_analysis_sub_agent_gcs_uri", gcs_uri=gcs_uri)
-    update_data_to_corpus(corpus_name=corpus_name, document_gcs_paths=[gcs_uri])
+    await update_sub_agent_result_to_firestore(collection_name=FIRESTORE_COMPANY_COLLECTION, document_id=company_doc_id,
+                                               sub_agent_field="partnerships_and_strategic_analysis_sub_agent_gcs_uri", gcs_uri=gcs_uri)
+    await corpus_ingestion_queue.enqueue(corpus_name=corpus_name, document_gcs_paths=[gcs_uri])
     print(f"Partnerships and Strategic Analysis Sub Agent result saved to GCS URI: {gcs_uri}")
 
     return None
 
 partnerships_and_strategic_analysis_sub_agent = LlmAgent(
     name="partnerships_and_strategic_analysis_sub_agent",
-    model=report_generation_model,
+    model=tiered_model("partnerships_and_strategic_analysis_sub_agent"),
     include_contents='none',
     description="An agent that analyzes the partnerships and strategic aspects of the startup company",
     instruction=f"""
@@ -45,7 +43,7 @@ partnerships_and_strategic_analysis_sub_agent = LlmAgent(
 
     INPUT:
         - Pitch deck JSON object: 
-            {{pitch_deck}}
+            {{partnerships_and_strategic_analysis_pitch_deck}}
         - List of company official websites under the key named {{company_websites}}
     
     You have access to ONLY the following TOOLS:
@@ -201,11 +199,15 @@ partnerships_and_strategic_analysis_sub_agent = LlmAgent(
     YOU MUST RETURN THE JSON OUTPUT AS SPECIFIED ABOVE AND NOTHING ELSE.
 
     CRITICAL INSTRUCTION FOR FINAL OUTPUT:
-    When you have gathered all necessary information and are ready to generate the final JSON output, DO NOT call any tool. Simply output the JSON text as your final response to the user.
+    When you have gathered all necessary information, stop calling the research tools and give the final JSON output: call the set_model_response tool with it when that tool is available, otherwise output the JSON text as your final response to the user.
 
     """,
     output_key="partnerships_and_strategic_analysis_sub_agent_result",
+    output_schema=PartnershipsAndStrategicAnalysisResult,
     after_agent_callback=post_agent_execution,
+    before_model_callback=apply_token_budget,
+    after_model_callback=record_token_usage,
+    before_tool_callback=enforce_tool_budget,
     generate_content_config=types.GenerateContentConfig(temperature=0),
     tools=[search, extract]
 )
@@ -0,0 +1,36 @@
+"""
+Shared test setup.
+
+The job reads its settings from `.env.development` in the working directory and builds its Google
+clients at import time, so the tests run from a temporary directory holding test settings and with
+anonymous credentials. No test calls a Google API except the Firestore emulator tests (skipped unless
+FIRESTORE_EMULATOR_HOST is set, e.g. `gcloud emulators firestore start`).
+
+Run from the job directory:
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+import google.auth
+from google.auth.credentials import AnonymousCredentials
+
+JOB_DIR = Path(__file__).resolve().parents[1]
+TEST_SETTINGS = {
+    "APP_NAME": "extract_benchmark_job_tests",
+    "GOOGLE_CLOUD_PROJECT": "test-project",
+    "GOOGLE_CLOUD_REGION": "us-central1",
+    "GOOGLE_API_KEY": "test-key",
+    "GOOGLE_GENAI_USE_VERTEXAI": "TRUE",
+    "GCS_BUCKET_NAME": "test-bucket",
+    "FIRESTORE_COMPANY_COLLECTION": "test_companies_applied",
+    "STAGE_CHECKPOINT_BACKEND": "none",
+}
+
+_settings_dir = tempfile.mkdtemp(prefix="extract_benchmark_job_tests_")
+Path(_settings_dir, ".env.development").write_text(
+    "".join(f"{key}={value}\n" for key, value in TEST_SETTINGS.items()), encoding="utf-8")
+os.chdir(_settings_dir)
+sys.path.insert(0, str(JOB_DIR))
+google.auth.default = lambda *args, **kwargs: (AnonymousCredentials(), TEST_SETTINGS["GOOGLE_CLOUD_PROJECT"])
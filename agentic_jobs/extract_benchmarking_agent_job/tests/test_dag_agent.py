@@ -0,0 +1,70 @@
+import asyncio
+from typing import AsyncGenerator, Dict, List
+from pydantic import Field
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+from utils import DagAgent, StageIO, DAG_RUN_REPORT_KEY
+
+
+class WriteStage(BaseAgent):
+    """Writes `values` to the state (nothing when empty); records every time it runs."""
+    values: Dict[str, str] = Field(default_factory=dict)
+    runs: List[str] = Field(default_factory=list)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        self.runs.append(ctx.invocation_id)
+        yield Event(invocation_id=ctx.invocation_id, author=self.name, branch=ctx.branch,
+                    actions=EventActions(state_delta=dict(self.values)))
+
+
+def run_dag(dag: DagAgent) -> tuple:
+    """Runs `dag` in a new session; returns the final session state and the error the run raised (or None)."""
+    async def run():
+        session_service = InMemorySessionService()
+        await session_service.create_session(app_name="tests", user_id="user", session_id="run", state={"deck": "deck"})
+        runner = Runner(agent=dag, app_name="tests", session_service=session_service)
+        error = None
+        try:
+            async for _ in runner.run_async(user_id="user", session_id="run",
+                                            new_message=types.Content(role="user", parts=[types.Part(text="run")])):
+                pass
+        except Exception as e:
+            error = e
+        session = await session_service.get_session(app_name="tests", user_id="user", session_id="run")
+        return session.state, error
+
+    return asyncio.run(run())
+
+
+def build_dag(consumer_io: StageIO) -> tuple:
+    # the extraction finishes without writing its pitch deck
+    extraction = WriteStage(name="extraction")
+    benchmarking = WriteStage(name="benchmarking", values={"benchmark": "done"})
+    dag = DagAgent(name="pipeline", sub_agents=[extraction, benchmarking],
+                   stage_io={"extraction": StageIO(reads=("deck",), writes=("pitch_deck",)),
+                             "benchmarking": consumer_io})
+    return dag, extraction, benchmarking
+
+
+def test_stage_whose_inputs_never_arrive_fails_the_run():
+    dag, extraction, benchmarking = build_dag(StageIO(reads=("pitch_deck",), writes=("benchmark",)))
+
+    state, error = run_dag(dag)
+
+    assert isinstance(error, RuntimeError) and "['benchmarking']" in str(error) and "pitch_deck" in str(error)
+    assert len(extraction.runs) == 1 and benchmarking.runs == []
+    # the report is still stored for the failed run
+    assert state[DAG_RUN_REPORT_KEY]["pipeline"]["skipped"] == {"benchmarking": ["pitch_deck"]}
+
+
+def test_optional_stage_is_only_skipped():
+    dag, _, benchmarking = build_dag(StageIO(reads=("pitch_deck",), writes=("benchmark",), optional=True))
+
+    state, error = run_dag(dag)
+
+    assert error is None and benchmarking.runs == []
+    assert state[DAG_RUN_REPORT_KEY]["pipeline"]["skipped"] == {"benchmarking": ["pitch_deck"]}
@@ -0,0 +1,29 @@
+import asyncio
+import importlib
+from types import SimpleNamespace
+import pytest
+
+extraction = importlib.import_module("sub_agents.extraction_pitch_deck_agent")
+
+EXTRACTION_RESULT = {"extracted_filename": "acme_analysis",
+                     "extracted_content": {"company_name": "Acme", "traction": {"customers": 12}}}
+
+
+def test_storage_error_fails_the_extraction_stage(monkeypatch):
+    async def failing_save(**kwargs):
+        raise RuntimeError("GCS unavailable")
+
+    monkeypatch.setattr(extraction, "save_file_content_to_gcs", failing_save)
+    state = {"firestore_doc_id": "company-1", "extraction_pitch_deck_result": EXTRACTION_RESULT}
+
+    with pytest.raises(RuntimeError, match="GCS unavailable"):
+        asyncio.run(extraction.post_agent_execution(SimpleNamespace(state=state)))
+    # the stages after the extraction wait for this key, so the run must not treat the stage as done
+    assert "extraction_pitch_deck_sub_agent_gcs_uri" not in state
+
+
+def test_missing_extraction_result_fails_the_extraction_stage():
+    state = {"firestore_doc_id": "company-1", "extraction_pitch_deck_result": {}}
+
+    with pytest.raises(RuntimeError, match="company-1"):
+        asyncio.run(extraction.post_agent_execution(SimpleNamespace(state=state)))
@@ -0,0 +1,60 @@
+import asyncio
+import importlib
+import pytest
+from google.adk.agents import LlmAgent
+from google.adk.models.google_llm import Gemini
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+from config import Config
+from llm_model_config.model_tiering import TieredGemini
+from utils import apply_token_budget, record_token_usage
+
+token_budget_module = importlib.import_module("utils.token_budget")
+
+
+@pytest.fixture
+def called_models(monkeypatch):
+    """Models asked by Gemini.generate_content_async, which always answers with invalid JSON."""
+    models = []
+
+    async def fake_generate_content_async(self, llm_request, stream=False):
+        models.append(llm_request.model)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="not json")]),
+                          usage_metadata=types.GenerateContentResponseUsageMetadata(
+                              prompt_token_count=10, candidates_token_count=5, total_token_count=15))
+
+    monkeypatch.setattr(Gemini, "generate_content_async", fake_generate_content_async)
+    return models
+
+
+def run_tiered_agent() -> None:
+    agent = LlmAgent(name="traction_sub_agent", instruction="Answer in JSON.",
+                     model=TieredGemini(model=Config.FAST_AGENT_MODEL, escalation_model=Config.REPORT_GENERATION_AGENT_MODEL,
+                                        agent_name="traction_sub_agent"),
+                     before_model_callback=apply_token_budget, after_model_callback=record_token_usage)
+
+    async def run():
+        session_service = InMemorySessionService()
+        await session_service.create_session(app_name="tests", user_id="user", session_id="run")
+        runner = Runner(agent=agent, app_name="tests", session_service=session_service)
+        async for event in runner.run_async(user_id="user", session_id="run",
+                                            new_message=types.Content(role="user", parts=[types.Part(text="go")])):
+            token_budget_module.token_budget.release(event.invocation_id)
+
+    asyncio.run(run())
+
+
+def test_invalid_answer_is_escalated(called_models):
+    run_tiered_agent()
+
+    assert called_models == [Config.FAST_AGENT_MODEL, Config.REPORT_GENERATION_AGENT_MODEL]
+
+
+def test_agent_downgraded_by_the_token_budget_is_not_escalated(called_models, monkeypatch):
+    monkeypatch.setattr(token_budget_module, "AGENT_TOKEN_SOFT_LIMIT", 0)
+
+    run_tiered_agent()
+
+    assert called_models == [Config.FAST_AGENT_MODEL]
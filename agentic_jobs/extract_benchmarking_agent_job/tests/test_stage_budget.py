@@ -0,0 +1,30 @@
+from types import SimpleNamespace
+from utils import stage_budget
+from utils.stage_budget import enforce_tool_budget, release_tool_budget
+
+
+def call(tool_name: str, invocation_id: str = "run-1", agent_name: str = "traction_sub_agent"):
+    return enforce_tool_budget(SimpleNamespace(name=tool_name), {},
+                               SimpleNamespace(invocation_id=invocation_id, agent_name=agent_name))
+
+
+def test_tools_are_refused_after_the_budget(monkeypatch):
+    monkeypatch.setattr(stage_budget, "SUB_AGENT_MAX_TOOL_CALLS", 2)
+    assert call("search") is None
+    assert call("extract") is None
+    assert call("search")["status"] == "budget_exhausted"
+    # the budget is per agent
+    assert call("search", agent_name="overview_sub_agent") is None
+    release_tool_budget("run-1")
+
+
+def test_release_forgets_only_the_finished_run():
+    call("search", invocation_id="run-1")
+    call("search", invocation_id="run-1", agent_name="overview_sub_agent")
+    call("search", invocation_id="run-2")
+
+    release_tool_budget("run-1")
+
+    assert [key[0] for key in stage_budget._tool_usage] == ["run-2"]
+    release_tool_budget("run-2")
+    assert stage_budget._tool_usage == {}
@@ -0,0 +1,125 @@
+import asyncio
+import pytest
+from typing import Any, AsyncGenerator, List
+from pydantic import Field
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+from utils import DagAgent, LocalFileCheckpointStore, StageIO, DAG_RUN_REPORT_KEY
+from utils.stage_checkpoints import StageCheckpointStore
+
+
+def test_checkpoint_round_trip(tmp_path):
+    store = LocalFileCheckpointStore(str(tmp_path), run_id="company-1")
+    state = {"pitch_deck": {"company_name": "Acme", "metrics": [1, 2]}, "gcs_uri": "gs://bucket/acme.json"}
+
+    asyncio.run(store.save("extraction", "sha-1", state))
+
+    assert (tmp_path / "company-1" / "extraction.json").exists()
+    assert asyncio.run(store.load("extraction", "sha-1")) == state
+
+
+def test_checkpoint_misses_when_inputs_changed_or_missing(tmp_path):
+    store = LocalFileCheckpointStore(str(tmp_path), run_id="company-1")
+    asyncio.run(store.save("extraction", "sha-1", {"pitch_deck": "v1"}))
+
+    assert asyncio.run(store.load("extraction", "sha-2")) is None
+    assert asyncio.run(store.load("benchmarking", "sha-1")) is None
+    # checkpoints are per run id (company)
+    assert asyncio.run(LocalFileCheckpointStore(str(tmp_path), run_id="company-2").load("extraction", "sha-1")) is None
+
+
+def test_corrupt_checkpoint_is_a_miss(tmp_path):
+    (tmp_path / "company-1").mkdir()
+    (tmp_path / "company-1" / "extraction.json").write_text("{not json", encoding="utf-8")
+
+    assert asyncio.run(LocalFileCheckpointStore(str(tmp_path), run_id="company-1").load("extraction", "sha-1")) is None
+
+
+def test_backend_missing_a_method_fails_at_construction():
+    class LoadOnlyStore(StageCheckpointStore):
+        async def load(self, stage, inputs_sha256):
+            return None
+
+    with pytest.raises(TypeError, match="save"):
+        LoadOnlyStore()
+
+
+class TransformStage(BaseAgent):
+    """Writes `prefix + state[source]` to `target`; records every time it actually runs."""
+    source: str
+    target: str
+    prefix: str
+    runs: List[str] = Field(default_factory=list)
+    branches: List[str] = Field(default_factory=list)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        self.runs.append(ctx.invocation_id)
+        self.branches.append(ctx.branch)
+        yield Event(invocation_id=ctx.invocation_id, author=self.name, branch=ctx.branch,
+                    actions=EventActions(state_delta={self.target: self.prefix + ctx.session.state[self.source]}))
+
+
+def build_pipeline(checkpoint_dir) -> tuple:
+    after_callbacks: List[Any] = []
+
+    def record_after_callback(callback_context):
+        after_callbacks.append(callback_context.state.get("analysis"))
+
+    extraction = TransformStage(name="extraction", source="deck", target="pitch_deck", prefix="parsed ")
+    analysis = TransformStage(name="analysis", source="pitch_deck", target="analysis", prefix="analysed ",
+                              after_agent_callback=record_after_callback)
+    pipeline = DagAgent(
+        name="pipeline",
+        sub_agents=[extraction, analysis],
+        stage_io={
+            "extraction": StageIO(reads=("deck",), writes=("pitch_deck",), checkpoint=True),
+            "analysis": StageIO(reads=("pitch_deck",), writes=("analysis",), checkpoint=True),
+        },
+        checkpoint_store_factory=lambda state: LocalFileCheckpointStore(str(checkpoint_dir), run_id=state["firestore_doc_id"]),
+    )
+    return pipeline, extraction, analysis, after_callbacks
+
+
+def run_pipeline(pipeline: DagAgent, session_id: str, deck: str) -> dict:
+    async def run():
+        session_service = InMemorySessionService()
+        await session_service.create_session(app_name="tests", user_id="user", session_id=session_id,
+                                             state={"firestore_doc_id": "company-1", "deck": deck})
+        runner = Runner(agent=pipeline, app_name="tests", session_service=session_service)
+        async for _ in runner.run_async(user_id="user", session_id=session_id,
+                                        new_message=types.Content(role="user", parts=[types.Part(text="run")])):
+            pass
+        return (await session_service.get_session(app_name="tests", user_id="user", session_id=session_id)).state
+
+    return asyncio.run(run())
+
+
+def test_dag_agent_restores_completed_stages_on_resume(tmp_path):
+    pipeline, extraction, analysis, after_callbacks = build_pipeline(tmp_path)
+
+    first = run_pipeline(pipeline, "run-1", deck="deck v1")
+    resumed = run_pipeline(pipeline, "run-2", deck="deck v1")
+
+    assert first["analysis"] == resumed["analysis"] == "analysed parsed deck v1"
+    # the second run skipped both stages
+    assert len(extraction.runs) == len(analysis.runs) == 1
+    # every stage runs in its own branch of the invocation
+    assert extraction.branches == ["pipeline.extraction"] and analysis.branches == ["pipeline.analysis"]
+    report = resumed[DAG_RUN_REPORT_KEY]["pipeline"]["stages"]
+    assert report["extraction"]["restored"] and report["analysis"]["restored"]
+    # a restored stage still runs its after_agent_callback (storing / queueing the result)
+    assert after_callbacks == ["analysed parsed deck v1", "analysed parsed deck v1"]
+
+
+def test_dag_agent_reruns_stages_whose_inputs_changed(tmp_path):
+    pipeline, extraction, analysis, _ = build_pipeline(tmp_path)
+
+    run_pipeline(pipeline, "run-1", deck="deck v1")
+    changed = run_pipeline(pipeline, "run-2", deck="deck v2")
+
+    assert changed["analysis"] == "analysed parsed deck v2"
+    assert len(extraction.runs) == len(analysis.runs) == 2
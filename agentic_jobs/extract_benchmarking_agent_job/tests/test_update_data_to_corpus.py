@@ -0,0 +1,75 @@
+import asyncio
+import importlib
+import pytest
+
+corpus_module = importlib.import_module("utils.update_data_to_corpus")
+
+CORPUS = "projects/p/locations/l/ragCorpora/1"
+RESULTS = "gs://bucket/processed/company-1/sub_agents"
+ANALYSIS = "gs://bucket/processed/company-1/analysis"
+
+
+class FakeCorpus:
+    """RagFiles by source URI, GCS objects that exist, and what was deleted / written to the manifest."""
+
+    def __init__(self, files, gcs_objects):
+        self.files = {uri: f"{CORPUS}/ragFiles/{i}" for i, uri in enumerate(files)}
+        self.gcs_objects = set(gcs_objects)
+        self.deleted = []
+        self.manifest_updates = []
+
+    def delete_file(self, name, corpus_name):
+        uri = next(uri for uri, rag_file in self.files.items() if rag_file == name)
+        self.deleted.append(uri)
+        del self.files[uri]
+
+
+@pytest.fixture
+def corpus(monkeypatch):
+    fake = FakeCorpus(files=[f"{RESULTS}/traction_sub_agent/traction_sub_agent_result.json",
+                             f"{RESULTS}/overview_sub_agent/overview_sub_agent_result.json",
+                             f"{RESULTS}/industry_trends_sub_agent/industry_trends_sub_agent_result.json",
+                             f"{ANALYSIS}/old_name_analysis.json"],
+                      gcs_objects=[f"{RESULTS}/traction_sub_agent/traction_sub_agent_result.json",
+                                   f"{RESULTS}/overview_sub_agent/overview_sub_agent_result.json",
+                                   f"{ANALYSIS}/old_name_analysis.json", f"{ANALYSIS}/acme_analysis.json"])
+
+    class FakeDocument:
+        async def update(self, fields):
+            fake.manifest_updates.append(fields)
+
+    class FakeFirestore:
+        def collection(self, name):
+            return type("Collection", (), {"document": lambda _, doc_id: FakeDocument()})()
+
+    monkeypatch.setattr(corpus_module, "_list_corpus_files_by_uri", lambda corpus_name: dict(fake.files))
+    monkeypatch.setattr(corpus_module, "_gcs_exists", lambda uri: uri in fake.gcs_objects)
+    monkeypatch.setattr(corpus_module.rag, "delete_file", fake.delete_file)
+    monkeypatch.setattr(corpus_module, "get_firestore_async_client", FakeFirestore)
+    return fake
+
+
+def test_prune_keeps_results_of_stages_that_did_not_produce_this_run(corpus):
+    queue = corpus_module.CorpusIngestionQueue()
+    queue.register_corpus(CORPUS, "companies", "company-1",
+                          manifest={uri: {"md5": "x", "rag_file": rag_file} for uri, rag_file in corpus.files.items()})
+    # only the traction stage and the (renamed) pitch deck analysis produced a file this run
+    queue._seen[CORPUS] = {f"{RESULTS}/traction_sub_agent/traction_sub_agent_result.json",
+                           f"{ANALYSIS}/acme_analysis.json"}
+
+    pruned = asyncio.run(queue.prune_stale(CORPUS))
+
+    # replaced by the new analysis file, and removed from GCS; the overview result (stage incomplete) stays
+    assert sorted(pruned) == sorted([f"{ANALYSIS}/old_name_analysis.json",
+                                     f"{RESULTS}/industry_trends_sub_agent/industry_trends_sub_agent_result.json"])
+    assert f"{RESULTS}/overview_sub_agent/overview_sub_agent_result.json" in corpus.files
+    removed_from_manifest = [path for fields in corpus.manifest_updates for path in fields]
+    assert not any("overview_sub_agent" in path for path in removed_from_manifest)
+
+
+def test_prune_skips_a_run_that_produced_nothing(corpus):
+    queue = corpus_module.CorpusIngestionQueue()
+    queue.register_corpus(CORPUS, "companies", "company-1", manifest={})
+
+    assert asyncio.run(queue.prune_stale(CORPUS)) == []
+    assert corpus.deleted == []
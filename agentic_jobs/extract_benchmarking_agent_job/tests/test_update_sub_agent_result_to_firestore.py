@@ -0,0 +1,50 @@
+import asyncio
+import importlib
+import os
+import uuid
+import pytest
+from config import Config
+from utils import update_sub_agent_result_to_firestore
+
+# the module (utils re-exports its function under the same name)
+firestore_module = importlib.import_module("utils.update_sub_agent_result_to_firestore")
+
+pytestmark = pytest.mark.skipif(not os.getenv("FIRESTORE_EMULATOR_HOST"),
+                                reason="needs the Firestore emulator (FIRESTORE_EMULATOR_HOST)")
+
+# the fields the benchmarking sub agents write while running concurrently
+SUB_AGENT_FIELDS = (
+    "business_model_sub_agent_gcs_uri",
+    "competitor_analysis_sub_agent_gcs_uri",
+    "funding_and_financials_sub_agent_gcs_uri",
+    "industry_trends_sub_agent_gcs_uri",
+    "overview_sub_agent_gcs_uri",
+    "partnerships_and_strategic_analysis_sub_agent_gcs_uri",
+    "team_profiling_sub_agent_gcs_uri",
+    "traction_sub_agent_gcs_uri",
+)
+
+
+def test_concurrent_sub_agent_results_are_all_kept():
+    async def run():
+        # a client of this test's event loop
+        firestore_module._firestore_async_client = None
+        document = firestore_module.get_firestore_async_client().collection(
+            Config.FIRESTORE_COMPANY_COLLECTION).document(f"test-{uuid.uuid4().hex}")
+        await document.set({"company_name": "Test Co", "sub_agents_results": {"existing_field": "kept"}})
+        try:
+            await asyncio.gather(*(update_sub_agent_result_to_firestore(
+                collection_name=Config.FIRESTORE_COMPANY_COLLECTION, document_id=document.id,
+                sub_agent_field=field, gcs_uri=f"gs://test-bucket/processed/{field}.json") for field in SUB_AGENT_FIELDS))
+            return (await document.get()).to_dict()
+        finally:
+            await document.delete()
+            firestore_module._firestore_async_client = None
+
+    stored = asyncio.run(run())
+
+    assert stored["company_name"] == "Test Co"
+    assert stored["sub_agents_results"] == {
+        "existing_field": "kept",
+        **{field: f"gs://test-bucket/processed/{field}.json" for field in SUB_AGENT_FIELDS},
+    }
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+import main
+from utils import CompanyJobQueue, InMemoryCompanyJobQueue
+
+
+def company(doc_id: str) -> dict:
+    return {"firestore_doc_id": doc_id, "input_deck_filename": f"{doc_id}_deck", "file_extension": "pdf",
+            "founder_id": "founder-1", "company_websites": "https://example.com https://example.org"}
+
+
+@pytest.fixture
+def fake_runs(monkeypatch):
+    """Replaces the agent run and the company document writes; records what the worker did."""
+    record = {"runs": [], "doc_updates": [], "running": 0, "max_running": 0}
+
+    async def run_agent_once(firestore_doc_id, input_deck_filename, file_extension, founder_id, company_websites):
+        record["runs"].append((firestore_doc_id, company_websites))
+        record["running"] += 1
+        record["max_running"] = max(record["max_running"], record["running"])
+        try:
+            await asyncio.sleep(0.05)
+            if firestore_doc_id == "broken-co":
+                raise RuntimeError("deck could not be analysed")
+        finally:
+            record["running"] -= 1
+
+    async def update_company_doc(firestore_doc_id, update_doc):
+        record["doc_updates"].append((firestore_doc_id, update_doc))
+
+    monkeypatch.setattr(main, "_run_agent_once", run_agent_once)
+    monkeypatch.setattr(main, "_update_company_doc", update_company_doc)
+    monkeypatch.setattr(main.Config, "WORKER_POLL_SECONDS", 0.01)
+    monkeypatch.setattr(main.Config, "WORKER_IDLE_EXIT_SECONDS", 0.1)
+    return record
+
+
+def test_worker_processes_every_queued_company_and_exits_when_idle(fake_runs):
+    async def run():
+        queue = InMemoryCompanyJobQueue([company("acme"), company("broken-co"), company("globex"), company("initech")])
+        await asyncio.wait_for(main.run_worker(queue, concurrency=2), timeout=5)
+        return queue
+
+    queue = asyncio.run(run())
+
+    assert sorted(doc_id for doc_id, _ in fake_runs["runs"]) == ["acme", "broken-co", "globex", "initech"]
+    assert fake_runs["max_running"] == 2
+    # the websites string of a queued company is split as in single-company mode
+    assert fake_runs["runs"][0][1] == ["https://example.com", "https://example.org"]
+    assert {job_id: result["status"] for job_id, result in queue.results.items()} == {
+        "acme": "SUCCEEDED", "broken-co": "FAILED", "globex": "SUCCEEDED", "initech": "SUCCEEDED"}
+    assert queue.results["broken-co"]["error"] == "RuntimeError: deck could not be analysed"
+    assert queue.results["acme"]["error"] is None
+    # a failed company is marked FAILED and does not stop the worker
+    assert fake_runs["doc_updates"] == [("broken-co", {"benchmark_agent_job_status": "FAILED"})]
+
+
+def test_worker_picks_up_companies_queued_while_it_polls(fake_runs):
+    async def run():
+        queue = InMemoryCompanyJobQueue()
+        worker = asyncio.create_task(main.run_worker(queue, concurrency=1))
+        await asyncio.sleep(0.03)
+        queue.put(company("late-co"))
+        await asyncio.wait_for(worker, timeout=5)
+        return queue
+
+    queue = asyncio.run(run())
+
+    assert queue.results["late-co"]["status"] == "SUCCEEDED"
+
+
+def test_idle_worker_exits_without_claiming(fake_runs):
+    async def run():
+        queue = InMemoryCompanyJobQueue()
+        await asyncio.wait_for(main.run_worker(queue, concurrency=3), timeout=5)
+        return queue
+
+    assert asyncio.run(run()).results == {}
+    assert fake_runs["runs"] == []
+
+
+def test_queue_missing_a_method_fails_at_construction():
+    class ClaimOnlyQueue(CompanyJobQueue):
+        async def claim(self, worker_id):
+            return None
+
+    with pytest.raises(TypeError, match="complete"):
+        ClaimOnlyQueue()
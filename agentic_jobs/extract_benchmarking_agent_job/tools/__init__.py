@@ -1,6 +1,6 @@
 from .get_file_content_from_gcs import get_file_content_from_gcs
 from .get_gcs_uri_for_file import get_gcs_uri_for_file
-from .extract_webpage_text import extract, clear_site_extract_cache
+from .extract_webpage_text import extract, extract_many, clear_site_extract_cache
 from .tavily_search import search
 from .merger_tool import merge_extraction_results
 from .analyze_pdf_from_uri import analyze_doc_from_uri
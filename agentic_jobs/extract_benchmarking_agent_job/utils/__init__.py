@@ -1,6 +1,16 @@
-from .text_sanitize import collapse_repeats, remove_control_chars, sanitize_text
-from .read_benchmark_framework import read_benchmark_framework_text
+from startup_eval_tools.text_sanitize import collapse_repeats, remove_control_chars, sanitize_text
+from .read_benchmark_framework import read_benchmark_framework_text, read_benchmark_framework_sections
 from .create_rag_corpus import prepare_rag_corpus
-from .update_data_to_corpus import update_data_to_corpus
+from .update_data_to_corpus import corpus_ingestion_queue, flush_corpus_ingestion_queue, finalize_corpus_ingestion
 from .update_sub_agent_result_to_firestore import update_sub_agent_result_to_firestore
-from .save_file_content_to_gcs import save_file_content_to_gcs
+from .save_file_content_to_gcs import save_file_content_to_gcs, get_storage_client
+from .pitch_deck_projection import build_pitch_deck_projections, pitch_deck_projection_report, minify_json, PITCH_DECK_PROJECTIONS, PITCH_DECK_PROJECTION_REPORT_KEY
+from .dag_agent import DagAgent, StageIO, CallbackStageAgent, DAG_RUN_REPORT_KEY
+from .stage_checkpoints import get_stage_checkpoint_store, LocalFileCheckpointStore, FirestoreCheckpointStore
+from .stage_budget import enforce_tool_budget, release_tool_budget, SUB_AGENT_TIMEOUT_SECONDS, SUB_AGENT_MAX_TOOL_CALLS, TOOL_BUDGET_GRACE_CALLS
+from .token_budget import token_budget, apply_token_budget, record_token_usage, model_call_downgraded, TokenBudgetExceeded
+from .company_job_queue import CompanyJobQueue, FirestoreCompanyJobQueue, InMemoryCompanyJobQueue, COMPANY_JOB_FIELDS
+from .output_schemas import load_agent_result, AGENT_OUTPUT_SCHEMAS, BusinessModelResult, CompetitorAnalysisResult, \
+    FundingAndFinancialsResult, IndustryTrendsResult, OverviewResult, PartnershipsAndStrategicAnalysisResult, \
+    TeamProfilingResult, TractionResult, GeneratedQuestions, InvestmentRecommendationResult
+from .session_state import SessionState, StateSizeTracker, state_sizes
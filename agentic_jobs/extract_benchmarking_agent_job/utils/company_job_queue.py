@@ -0,0 +1,102 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+from google.cloud import firestore
+from .update_sub_agent_result_to_firestore import get_firestore_async_client
+
+# fields of a queued company (the same values the single-company mode reads from environment variables)
+COMPANY_JOB_FIELDS = ("firestore_doc_id", "input_deck_filename", "file_extension", "founder_id", "company_websites")
+# queue documents fetched per claim attempt (several workers race for the oldest ones)
+CLAIM_CANDIDATES = 5
+
+
+class CompanyJobQueue(ABC):
+    """
+    Companies waiting to be processed by the worker mode of the job (see main.run_worker).
+
+    `claim` hands a pending company to exactly one worker (None when the queue is empty) and
+    `complete` records the outcome. A job is a dict with COMPANY_JOB_FIELDS plus its queue "id".
+    """
+
+    @abstractmethod
+    async def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def complete(self, job_id: str, error: Optional[str] = None) -> None:
+        ...
+
+
+class InMemoryCompanyJobQueue(CompanyJobQueue):
+    """Process-local queue (tests and local runs): `put` companies, then run a worker on it."""
+
+    def __init__(self, jobs: Optional[List[Dict[str, Any]]] = None):
+        self._pending: asyncio.Queue = asyncio.Queue()
+        self.results: Dict[str, Dict[str, Any]] = {}
+        for job in jobs or []:
+            self.put(job)
+
+    def put(self, job: Dict[str, Any]) -> None:
+        self._pending.put_nowait({"id": job.get("id") or job["firestore_doc_id"], **job})
+
+    async def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            job = self._pending.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+        self.results[job["id"]] = {"status": "RUNNING", "worker_id": worker_id}
+        return job
+
+    async def complete(self, job_id: str, error: Optional[str] = None) -> None:
+        self.results[job_id].update({"status": "FAILED" if error else "SUCCEEDED", "error": error})
+
+
+class FirestoreCompanyJobQueue(CompanyJobQueue):
+    """
+    Queue documents in a Firestore collection (written by the backend, one per company):
+    {COMPANY_JOB_FIELDS..., "status": "PENDING", "enqueued_at": <timestamp>}.
+
+    A worker claims the oldest PENDING document in a transaction (status -> RUNNING, with its worker
+    id), so concurrent workers never process the same company. Needs the composite index
+    (status ASC, enqueued_at ASC) on the collection.
+    """
+
+    def __init__(self, collection_name: str):
+        self.collection = get_firestore_async_client().collection(collection_name)
+
+    async def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        query = self.collection.where(filter=firestore.FieldFilter("status", "==", "PENDING")).order_by(
+            "enqueued_at").limit(CLAIM_CANDIDATES)
+        async for snapshot in query.stream():
+            job = await self._try_claim(snapshot.reference, worker_id)
+            if job is not None:
+                return job
+        return None
+
+    async def _try_claim(self, doc_ref, worker_id: str) -> Optional[Dict[str, Any]]:
+        @firestore.async_transactional
+        async def claim_in_transaction(transaction):
+            snapshot = await doc_ref.get(transaction=transaction)
+            data = snapshot.to_dict() or {}
+            if data.get("status") != "PENDING":
+                # another worker was faster
+                return None
+            transaction.update(doc_ref, {"status": "RUNNING", "worker_id": worker_id,
+                                         "claimed_at": firestore.SERVER_TIMESTAMP})
+            return {"id": doc_ref.id, **{field: data.get(field) for field in COMPANY_JOB_FIELDS}}
+
+        try:
+            return await claim_in_transaction(get_firestore_async_client().transaction())
+        except Exception as e:
+            print(f"Could not claim queued company {doc_ref.id}: {e}")
+            return None
+
+    async def complete(self, job_id: str, error: Optional[str] = None) -> None:
+        try:
+            await self.collection.document(job_id).update({
+                "status": "FAILED" if error else "SUCCEEDED",
+                "error": error,
+                "finished_at": firestore.SERVER_TIMESTAMP,
+            })
+        except Exception as e:
+            print(f"Could not mark queued company {job_id} as finished: {e}")
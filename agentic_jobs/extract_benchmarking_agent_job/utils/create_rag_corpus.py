@@ -1,12 +1,23 @@
+import asyncio
 from vertexai.preview import rag
 import vertexai
 from google import auth
 from google.adk.agents.callback_context import CallbackContext
 from config import Config
+from .update_data_to_corpus import corpus_ingestion_queue, RAG_CORPUS_MANIFEST_FIELD
+from .update_sub_agent_result_to_firestore import get_firestore_async_client
+from .session_state import SessionState
 
 GOOGLE_CLOUD_PROJECT = Config.GOOGLE_CLOUD_PROJECT
 GOOGLE_CLOUD_REGION = Config.GOOGLE_CLOUD_REGION
 SUB_AGENTS_RAG_CORPUS_PREFIX = Config.SUB_AGENTS_RAG_CORPUS_PREFIX
+FIRESTORE_COMPANY_COLLECTION = Config.FIRESTORE_COMPANY_COLLECTION
+# company document field holding the corpus resource name (read by the deal note and weightage agents)
+RAG_CORPUS_NAME_FIELD = "rag_corpus_name"
+EMBEDDING_PUBLISHER_MODEL = "publishers/google/models/text-multilingual-embedding-002"
+
+
+_vertex_ai_initialized = False
 
 
 def initialize_vertex_ai():
@@ -14,8 +25,11 @@ def initialize_vertex_ai():
     Initializes the Vertex AI SDK and Firestore client with the project configuration.
 
     Sets up the global firestore_client and authenticates using default credentials.
+    Only the first call does the work (a worker processes many companies in one process).
     """
-    # global firestore_client
+    global _vertex_ai_initialized
+    if _vertex_ai_initialized:
+        return
     credentials, _ = auth.default(
         scopes=["https://www.googleapis.com/auth/cloud-platform"])
     vertexai.init(
@@ -23,37 +37,94 @@ def initialize_vertex_ai():
         location=GOOGLE_CLOUD_REGION,
         credentials=credentials
     )
+    _vertex_ai_initialized = True
+
+
+def _uses_expected_embedding_model(corpus) -> bool:
+    """True unless the corpus reports a different embedding model than EMBEDDING_PUBLISHER_MODEL."""
+    config = getattr(corpus, "embedding_model_config", None)
+    publisher_model = getattr(config, "publisher_model", None) if config else None
+    if not publisher_model:
+        return True
+    return publisher_model.endswith(EMBEDDING_PUBLISHER_MODEL.split("/models/")[-1])
+
+
+def _find_corpus(corpus_name: str, corpus_display_name: str):
+    """
+    Point lookup of the corpus named on the company document; lists every corpus in the project
+    only when no name was stored yet (documents created before it was persisted) or it is gone.
+    Blocking (Vertex AI SDK calls): run it in a thread.
+    """
+    if corpus_name:
+        try:
+            corpus = rag.get_corpus(name=corpus_name)
+            if corpus.display_name == corpus_display_name:
+                return corpus
+        except Exception as e:
+            print(f"Stored corpus '{corpus_name}' could not be fetched, searching by display name: {e}")
+    for existing_corpus in rag.list_corpora():
+        if existing_corpus.display_name == corpus_display_name:
+            return existing_corpus
+    return None
 
 
-def prepare_rag_corpus(callback_context: CallbackContext) -> None:
-    """Prepares the RAG corpus for the sub-agents."""
-    initialize_vertex_ai()
-    current_state = callback_context.state.to_dict()
-    company_doc_id = current_state.get("firestore_doc_id")
+async def prepare_rag_corpus(callback_context: CallbackContext) -> None:
+    """
+    Prepares the RAG corpus for the sub-agents.
+
+    The company's corpus is kept across runs (it is only recreated when its embedding model changed)
+    and registered with the ingestion queue together with the company document's manifest, so a
+    re-run only imports the sub agent results whose content changed. The corpus resource name is
+    stored on the company document (`rag_corpus_name`) so the agents can resolve it with a point read.
+    """
+    # the Vertex AI SDK is synchronous: its calls run in threads so the concurrent stages (and, in
+    # worker mode, the other companies) keep running
+    await asyncio.to_thread(initialize_vertex_ai)
+    current_state = SessionState(callback_context.state)
+    company_doc_id = current_state.firestore_doc_id
     if not company_doc_id:
         raise ValueError(
             "company_doc_id is missing in the callback context state.")
     corpus_display_name = f"{SUB_AGENTS_RAG_CORPUS_PREFIX}_{company_doc_id}"
-    # Check if a corpus for this company already exists to avoid duplicates
-    existing_corpora = rag.list_corpora()
-    for existing_corpus in existing_corpora:
-        if existing_corpus.display_name == corpus_display_name:
-            print(f"Corpus '{corpus_display_name}' already exists. Deleting the existing corpus.")
-            rag.delete_corpus(name=existing_corpus.name)
-            break
-
-    # Create a new RAG corpus if it doesn't exist
-    corpus = rag.create_corpus(
-        display_name=corpus_display_name,
-        description=f"RAG corpus for company {company_doc_id}",
-        embedding_model_config=rag.EmbeddingModelConfig(
-            publisher_model="publishers/google/models/text-multilingual-embedding-002"
-        ),
-        vector_db=rag.RagManagedDb(retrieval_strategy=rag.KNN()),
-    )
-    callback_context.state.update({
-        **callback_context.state.to_dict(),
+    company_doc_ref = get_firestore_async_client().collection(
+        FIRESTORE_COMPANY_COLLECTION).document(company_doc_id)
+    try:
+        snapshot = await company_doc_ref.get(field_paths=[RAG_CORPUS_NAME_FIELD, RAG_CORPUS_MANIFEST_FIELD])
+        company_fields = snapshot.to_dict() or {}
+    except Exception as e:
+        print(f"Could not read corpus details of {company_doc_id}, importing everything: {e}")
+        company_fields = {}
+    stored_corpus_name = company_fields.get(RAG_CORPUS_NAME_FIELD)
+
+    # Reuse the corpus for this company if it already exists
+    corpus = await asyncio.to_thread(_find_corpus, stored_corpus_name, corpus_display_name)
+    if corpus is not None and _uses_expected_embedding_model(corpus):
+        print(f"Reusing existing corpus: {corpus.display_name} with ID: {corpus.name}")
+    else:
+        if corpus is not None:
+            print(f"Corpus '{corpus_display_name}' uses another embedding model. Deleting the existing corpus.")
+            await asyncio.to_thread(rag.delete_corpus, name=corpus.name)
+        corpus = await asyncio.to_thread(
+            rag.create_corpus,
+            display_name=corpus_display_name,
+            description=f"RAG corpus for company {company_doc_id}",
+            embedding_model_config=rag.EmbeddingModelConfig(
+                publisher_model=EMBEDDING_PUBLISHER_MODEL
+            ),
+            vector_db=rag.RagManagedDb(retrieval_strategy=rag.KNN()),
+        )
+        print(f"Created new corpus: {corpus.display_name} with ID: {corpus.name}")
+
+    if corpus.name != stored_corpus_name:
+        try:
+            await company_doc_ref.update({RAG_CORPUS_NAME_FIELD: corpus.name})
+        except Exception as e:
+            print(f"Failed to save corpus name to Firestore document {company_doc_id}: {e}")
+
+    corpus_ingestion_queue.register_corpus(corpus.name, collection_name=FIRESTORE_COMPANY_COLLECTION,
+                                           document_id=company_doc_id,
+                                           manifest=company_fields.get(RAG_CORPUS_MANIFEST_FIELD))
+    current_state.update({
         "rag_corpus_display_name": corpus.display_name,
         "rag_corpus_name": corpus.name
     })
-    print(f"Created new corpus: {corpus.display_name} with ID: {corpus.name}")
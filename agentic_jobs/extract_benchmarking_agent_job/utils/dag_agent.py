@@ -0,0 +1,305 @@
+"""
+    This file contains code to implement the following feature:-
+
+    Feature:- Run the pipeline stages as a dependency graph instead of a fixed sequence.
+
+    Every stage (sub agent) declares the session state keys it reads and writes. A stage starts as soon
+    as every key it reads holds a value, so stages that do not depend on each other run concurrently.
+    Each run produces a critical-path report (stored in state under DAG_RUN_REPORT_KEY).
+
+    A stage whose inputs never become available fails the run, unless it is marked `optional`.
+
+    A stage can have a deadline and a tool call budget; when it exceeds them (or fails, with
+    `partial_completion`) it is stopped and its missing outputs are marked incomplete, so the stages
+    depending on it still run on the partial results.
+
+    Stages marked `checkpoint` are saved to a checkpoint store once they complete; a later run (e.g. a
+    retry of the job) restores them instead of running them again while their inputs are unchanged.
+"""
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import time
+from typing import Any, AsyncGenerator, Callable, Dict, List, NamedTuple, Optional, Tuple
+from pydantic import model_validator
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from .output_schemas import SET_MODEL_RESPONSE_TOOL_NAME
+
+# child of the job logger configured in main.py
+logger = logging.getLogger("extract_benchmark_agent.dag_agent")
+
+DAG_RUN_REPORT_KEY = "dag_run_report"
+
+
+class StageIO(NamedTuple):
+    """
+    State keys a stage needs before it can start and the keys it produces, whether to checkpoint it, and
+    its limits: seconds until it is cancelled and tool calls after which it is stopped (None: unlimited).
+    An `optional` stage whose inputs never become available is skipped instead of failing the run.
+    """
+    reads: Tuple[str, ...] = ()
+    writes: Tuple[str, ...] = ()
+    checkpoint: bool = False
+    timeout_seconds: Optional[float] = None
+    max_tool_calls: Optional[int] = None
+    optional: bool = False
+
+
+class CallbackStageAgent(BaseAgent):
+    """
+    A stage made of plain code: the work happens in its `before_agent_callback` (any
+    `async def fn(callback_context)` written for an agent callback), so the state it sets is
+    recorded like any other agent's.
+    """
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        return
+        yield
+
+
+def _available(state, key: str) -> bool:
+    return state.get(key) not in (None, "", [], {})
+
+
+def _inputs_sha256(agent: BaseAgent, reads: Tuple[str, ...], state) -> str:
+    """Hash of what a stage's result depends on: the values it reads, its instruction and its model."""
+    instruction = getattr(agent, "instruction", None)
+    fingerprint = {
+        "reads": {key: state.get(key) for key in reads},
+        "instruction": instruction if isinstance(instruction, str) else None,
+        "model": str(getattr(agent, "model", "")),
+    }
+    return hashlib.sha256(json.dumps(fingerprint, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def incomplete_stage_result(stage: str, reason: str) -> str:
+    """Default value written to the outputs of a stage that did not complete."""
+    return json.dumps({"incomplete": True, "stage": stage, "reason": reason})
+
+
+class _StageDone(NamedTuple):
+    name: str
+    error: Optional[BaseException]
+    restored: bool
+    incomplete: Optional[str]
+
+
+class DagAgent(BaseAgent):
+    """
+    Runs `sub_agents` as a dependency graph described by `stage_io` (sub agent name -> StageIO).
+
+    A read that no stage writes must come from the initial session state. Like ParallelAgent, every
+    stage runs on its own branch, so stages running at the same time never see each other's events;
+    stages pass results through state only. When a stage fails the others are cancelled and the error
+    is raised (unless `partial_completion`). When the other stages are done, a stage whose inputs never
+    became available is listed in the report and the run raises a RuntimeError, unless the stage is
+    `optional` (then it is only skipped).
+
+    A stage that times out, exceeds its tool call budget or (with `partial_completion`) fails is
+    stopped at its next event and every output it did not write is set to
+    `incomplete_result(stage, reason)`; it is reported as incomplete and never checkpointed.
+
+    `checkpoint_store_factory` builds the run's checkpoint store from the session state (None disables
+    checkpoints). A checkpoint holds the stage's `writes` and its agent's `output_key`; restoring it
+    sets that state and runs the agent's after_agent_callback, so the result is stored and queued
+    for the RAG corpus exactly as if the stage had run.
+    """
+
+    stage_io: Dict[str, StageIO]
+    checkpoint_store_factory: Optional[Callable[[Dict[str, Any]], Any]] = None
+    partial_completion: bool = False
+    incomplete_result: Callable[[str, str], Any] = incomplete_stage_result
+
+    @model_validator(mode="after")
+    def _check_graph(self) -> "DagAgent":
+        names = [agent.name for agent in self.sub_agents]
+        missing = [name for name in names if name not in self.stage_io]
+        unknown = [name for name in self.stage_io if name not in names]
+        if missing or unknown:
+            raise ValueError(f"stage_io of '{self.name}' does not match its sub agents "
+                             f"(missing: {missing}, unknown: {unknown})")
+        # Kahn's algorithm over producer -> consumer edges
+        dependencies = {name: set(self._producers(name).values()) for name in names}
+        done = set()
+        while len(done) < len(names):
+            ready = [n for n in names if n not in done and dependencies[n] <= done]
+            if not ready:
+                raise ValueError(f"Stages of '{self.name}' have a dependency cycle: {sorted(set(names) - done)}")
+            done.update(ready)
+        return self
+
+    def _producers(self, name: str) -> Dict[str, str]:
+        """Read key -> stage writing it, for the reads of stage `name` that another stage produces."""
+        producers = {}
+        for key in self.stage_io[name].reads:
+            for other, io in self.stage_io.items():
+                if other != name and key in io.writes:
+                    producers[key] = other
+        return producers
+
+    async def _restore_stage(self, agent: BaseAgent, ctx: InvocationContext,
+                             checkpointed_state: Dict[str, Any]) -> AsyncGenerator[Event, None]:
+        # the callbacks see the stage's agent, as when it runs
+        ctx = ctx.model_copy(update={"agent": agent})
+        callback_context = CallbackContext(ctx)
+        callback_context.state.update(checkpointed_state)
+        for callback in agent.canonical_after_agent_callbacks:
+            result = callback(callback_context=callback_context)
+            if inspect.isawaitable(result):
+                await result
+        yield Event(invocation_id=ctx.invocation_id, author=agent.name, branch=ctx.branch,
+                    actions=callback_context._event_actions)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        agents = {agent.name: agent for agent in self.sub_agents}
+        checkpoint_store = self.checkpoint_store_factory(state) if self.checkpoint_store_factory else None
+        waiting = list(agents)
+        timings: Dict[str, Dict[str, Any]] = {}
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks: Dict[str, asyncio.Task] = {}
+        run_started = time.perf_counter()
+
+        async def forward(event: Event) -> None:
+            resumed = asyncio.Event()
+            await queue.put((event, resumed))
+            # the runner appends the event to the session before the stage goes on
+            await resumed.wait()
+
+        async def drain(events: AsyncGenerator[Event, None], io: StageIO) -> Optional[str]:
+            """Forward the stage's events until it ends (None) or exceeds a limit (the reason)."""
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + io.timeout_seconds if io.timeout_seconds else None
+            tool_calls = 0
+            while True:
+                try:
+                    event = await asyncio.wait_for(anext(events), None if deadline is None
+                                                   else max(deadline - loop.time(), 0))
+                except StopAsyncIteration:
+                    return None
+                except asyncio.TimeoutError:
+                    return f"timed out after {io.timeout_seconds:g}s"
+                await forward(event)
+                # the final answer of an agent with an output schema and tools is a set_model_response call
+                tool_calls += sum(1 for call in event.get_function_calls() if call.name != SET_MODEL_RESPONSE_TOOL_NAME)
+                if io.max_tool_calls is not None and tool_calls > io.max_tool_calls:
+                    return f"stopped after {tool_calls} tool calls (budget {io.max_tool_calls})"
+
+        async def run_stage(name: str) -> None:
+            agent, io = agents[name], self.stage_io[name]
+            # isolated branch per stage, so a stage does not see the LLM contents of the stages running next to it
+            branch = f"{self.name}.{agent.name}"
+            stage_ctx = ctx.model_copy(update={"branch": f"{ctx.branch}.{branch}" if ctx.branch else branch})
+            keys = io.writes + ((agent.output_key,) if getattr(agent, "output_key", None) else ())
+            error, restored, incomplete = None, False, None
+            try:
+                inputs_sha256 = checkpointed_state = None
+                if checkpoint_store is not None and io.checkpoint:
+                    inputs_sha256 = _inputs_sha256(agent, io.reads, state)
+                    checkpointed_state = await checkpoint_store.load(name, inputs_sha256)
+                restored = checkpointed_state is not None
+                events = (self._restore_stage(agent, stage_ctx, checkpointed_state) if restored
+                          else agent.run_async(stage_ctx))
+                try:
+                    incomplete = await drain(events, io)
+                finally:
+                    await events.aclose()
+                if inputs_sha256 and not restored and incomplete is None and all(_available(state, key) for key in keys):
+                    await checkpoint_store.save(name, inputs_sha256, {key: state.get(key) for key in keys})
+            except Exception as e:
+                if not self.partial_completion:
+                    error = e
+                else:
+                    incomplete = f"failed: {e}"
+            if incomplete is not None:
+                missing = {key: self.incomplete_result(name, incomplete) for key in keys if not _available(state, key)}
+                if missing:
+                    await forward(Event(invocation_id=ctx.invocation_id, author=agent.name, branch=stage_ctx.branch,
+                                        actions=EventActions(state_delta=missing)))
+            await queue.put((_StageDone(name, error, restored, incomplete), None))
+
+        def start_ready_stages() -> None:
+            for name in list(waiting):
+                if all(_available(state, key) for key in self.stage_io[name].reads):
+                    waiting.remove(name)
+                    timings[name] = {"start": round(time.perf_counter() - run_started, 2)}
+                    logger.info("DAG stage started: %s", name)
+                    tasks[name] = asyncio.create_task(run_stage(name))
+
+        try:
+            start_ready_stages()
+            while tasks:
+                item, resumed = await queue.get()
+                if isinstance(item, _StageDone):
+                    tasks.pop(item.name)
+                    if item.error is not None:
+                        raise item.error
+                    timing = timings[item.name]
+                    timing["end"] = round(time.perf_counter() - run_started, 2)
+                    timing["seconds"] = round(timing["end"] - timing["start"], 2)
+                    timing["restored"] = item.restored
+                    if item.incomplete:
+                        timing["incomplete"] = item.incomplete
+                    not_written = [key for key in self.stage_io[item.name].writes if not _available(state, key)]
+                    if not_written:
+                        timing["not_written"] = not_written
+                    logger.info("DAG stage %s: %s in %ss%s%s", "restored" if item.restored else "finished", item.name,
+                                timing["seconds"], f" (did not write {not_written})" if not_written else "",
+                                f" (incomplete: {item.incomplete})" if item.incomplete else "")
+                    if not ctx.end_invocation:
+                        start_ready_stages()
+                    continue
+                yield item
+                resumed.set()
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+        report = self._build_report(timings, waiting, state, round(time.perf_counter() - run_started, 2))
+        yield Event(invocation_id=ctx.invocation_id, author=self.name, branch=ctx.branch,
+                    actions=EventActions(state_delta={DAG_RUN_REPORT_KEY: {**(state.get(DAG_RUN_REPORT_KEY) or {}),
+                                                                           self.name: report}}))
+        # e.g. the extraction wrote nothing: the stages after it never ran, the run did not succeed
+        missing = {name: report["skipped"][name] for name in waiting if not self.stage_io[name].optional}
+        if missing and not ctx.end_invocation:
+            raise RuntimeError(f"Stages {sorted(missing)} of '{self.name}' never received {missing}")
+
+    def _build_report(self, timings: Dict[str, Dict[str, Any]], skipped: List[str], state,
+                      wall_seconds: float) -> Dict[str, Any]:
+        """Per-stage timings, the stage each one waited on last, and the critical path through them."""
+        for name, timing in timings.items():
+            finished_producers = [p for p in set(self._producers(name).values()) if "end" in timings.get(p, {})]
+            timing["waited_on"] = max(finished_producers, key=lambda p: timings[p]["end"], default=None)
+
+        critical_path = []
+        finished = [name for name, timing in timings.items() if "end" in timing]
+        stage = max(finished, key=lambda name: timings[name]["end"], default=None)
+        while stage is not None:
+            critical_path.insert(0, stage)
+            stage = timings[stage]["waited_on"]
+        report = {
+            "wall_seconds": wall_seconds,
+            "stages": timings,
+            "critical_path": critical_path,
+            "critical_path_seconds": round(sum(timings[name]["seconds"] for name in critical_path), 2),
+            "incomplete": {name: timing["incomplete"] for name, timing in timings.items() if timing.get("incomplete")},
+            "skipped": {name: [key for key in self.stage_io[name].reads if not _available(state, key)]
+                        for name in skipped},
+        }
+
+        lines = [f"DAG run of '{self.name}' finished in {wall_seconds}s",
+                 f"    {'stage':<45} {'start':>8} {'end':>8} {'seconds':>8}  waited on"]
+        for name, timing in sorted(timings.items(), key=lambda item: item[1]["start"]):
+            lines.append(f"    {name:<45} {timing['start']:>8} {timing.get('end', '-'):>8} {timing.get('seconds', '-'):>8}  "
+                         f"{timing.get('waited_on') or '-'}" + (" (restored from checkpoint)" if timing.get("restored") else "")
+                         + (f" (incomplete: {timing['incomplete']})" if timing.get("incomplete") else ""))
+        lines.append(f"    critical path ({report['critical_path_seconds']}s): {' -> '.join(critical_path) or '-'}")
+        for name, missing in report["skipped"].items():
+            lines.append(f"    skipped {name}: missing {missing}")
+        logger.info("\n".join(lines))
+        return report
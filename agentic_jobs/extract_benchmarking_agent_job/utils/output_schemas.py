@@ -0,0 +1,302 @@
+import json
+from typing import Any, Dict, List, Optional, Type
+from pydantic import BaseModel, Field
+
+# Output schemas of the LLM agents (their LlmAgent.output_schema). The model is constrained to the
+# schema and ADK validates the final answer against it, storing the result in `output_key` as a dict,
+# so a result is parsed once instead of by every consumer. Field names are those of the OUTPUT section
+# of each instruction (and of the JSON files the frontend reads); empty values are "" or [].
+
+# tool through which ADK collects the final answer of an agent that has both an output schema and tools
+# (when the model cannot combine a response schema with tools); it is the answer, not a research call
+SET_MODEL_RESPONSE_TOOL_NAME = "set_model_response"
+
+
+class Gaps(BaseModel):
+    mandatory_information: List[str]
+    optional_information: List[str]
+
+
+class RevenueModel(BaseModel):
+    revenue_streams: str
+    pricing_strategy: str
+    sales_channels: str
+    customer_segments: str
+
+
+class CostStructure(BaseModel):
+    fixed_costs: str
+    variable_costs: str
+    cost_management_strategies: str
+
+
+class Partnerships(BaseModel):
+    strategic_alliances: str
+    supplier_relationships: str
+    distribution_partners: str
+
+
+class GoToMarketStrategy(BaseModel):
+    market_entry_strategy: str
+    marketing_and_promotion: str
+    customer_acquisition: str
+
+
+class BusinessModelResult(BaseModel):
+    revenue_model: RevenueModel
+    cost_structure: CostStructure
+    key_partnerships: Partnerships
+    go_to_market_strategy: GoToMarketStrategy
+    sources: List[str]
+    gaps: Gaps
+
+
+class Competitor(BaseModel):
+    name: str
+    market_share: str
+    differentiators: str
+    team_size: str
+    funding: str
+    user_base: str
+    headquarters: str
+    description: str
+    founded_year: str
+    last_round: str
+    last_raised: str
+    total_raised: str
+    status: str
+    detailed_offerings_and_features: str
+    USP: str
+    b2b_b2c: str
+    target_market: str
+    key_clients: str
+    growth_market: str
+    domain_url: str
+    other_relevant_kpis: Optional[str] = Field(default=None, description="Any other relevant KPIs of the competitor.")
+
+
+class CompetitorAnalysis(BaseModel):
+    domain_wise_competitor_analysis: List[Competitor]
+    geography_wise_competitor_analysis: List[Competitor]
+
+
+class CompetitorAnalysisResult(BaseModel):
+    company_geographical_country: str
+    company_domain: str
+    sources: List[str]
+    competitor_analysis: CompetitorAnalysis
+
+
+class FundingAndFinancialsResult(BaseModel):
+    funding_ask_analysis: str
+    financial_projections_review: str
+    historical_financial_performance: str
+    funding_history_evaluation: str
+    financial_health_indicators: str
+    startup_funding_status_and_trends: str
+    financial_projections_and_milestones: str
+    funding_timelines: str
+    funding_history: str
+    sources: List[str]
+    gaps: Gaps
+
+
+class IndustryTrendsResult(BaseModel):
+    total_market_size: str
+    sector_market_size: str
+    ai_investment_surge: str
+    ai_adoption_rates: str
+    market_growth_trends: str
+    emerging_technologies: str
+    CAGR_analysis: str
+    adoption_and_investment_momentum: str
+    funding_breakdowns: str
+    regulatory_changes: str
+    consumer_behavior: str
+    other_relevant_insights: str
+    sources: List[str]
+    gaps: Gaps
+
+
+class CompetitorsSummary(BaseModel):
+    number_of_competitors: str
+    summary: str
+
+
+class InnovationCycleStatus(BaseModel):
+    status: str
+    reasoning: str
+
+
+class SomDataPoint(BaseModel):
+    year: str
+    value: Optional[float] = None
+
+
+class SomProjection(BaseModel):
+    title: str
+    unit: str
+    data: List[SomDataPoint]
+
+
+class MarketSizeAndPosition(BaseModel):
+    foundation_year: str
+    employee_count: str
+    tag_line: str
+    short_description: str
+    geographic_location: str
+    competitors_summary: CompetitorsSummary
+    innovation_cycle_status: InnovationCycleStatus
+    TAM: str
+    SAM: str
+    SOM: str
+    SOM_Projection: SomProjection
+
+
+class TechnologyAndInnovation(BaseModel):
+    technology_stack_used: str
+    innovation_and_R_and_D: str
+    vision_and_USP: str
+
+
+class OverviewResult(BaseModel):
+    problem_statement: str
+    solution: str
+    market_size_and_position: MarketSizeAndPosition
+    technology_and_innovation: TechnologyAndInnovation
+    sources: List[str]
+    gaps: Gaps
+
+
+class VectorAssessment(BaseModel):
+    detail: str
+    score: str
+    reasoning: str
+
+
+class FourVectorAnalysis(BaseModel):
+    market_attractiveness: VectorAssessment
+    competitive_position: VectorAssessment
+    strategic_fit: VectorAssessment
+    financial_performance: VectorAssessment
+
+
+class SwotAnalysis(BaseModel):
+    strengths: str
+    weaknesses: str
+    opportunities: str
+    threats: str
+
+
+class RiskAssessment(BaseModel):
+    market_risks: str
+    operational_risks: str
+    financial_risks: str
+    sales_cycle_risks: str
+
+
+class PartnershipsAndStrategicAnalysisResult(BaseModel):
+    partnerships_and_alliance: Partnerships
+    four_vector_analysis: FourVectorAnalysis
+    swot_analysis: SwotAnalysis
+    risk_assessment: RiskAssessment
+    sources: List[str]
+    gaps: Gaps
+
+
+class TeamStrengthOverview(BaseModel):
+    bullet_points: List[str]
+    summary_paragraph: str
+
+
+class FounderProfile(BaseModel):
+    name_and_role: str
+    professional_background: str
+    educational_qualifications: str
+    industry_expertise: str
+    vision_and_motivation: str
+
+
+class TeamProfilingResult(BaseModel):
+    team_strength_overview: TeamStrengthOverview
+    founder_profiles: List[FounderProfile]
+    sources: List[str]
+    gaps: Gaps
+
+
+class CustomerAcquisitionAndGrowthMetrics(BaseModel):
+    customer_acquisition_cost: str
+    customer_lifetime_value: str
+    sign_ups_new_users: str
+    conversion_rate: str
+    growth_velocity: str
+    referral_and_virality_indicators: str
+
+
+class RevenueAndFinancialMetrics(BaseModel):
+    monthly_recurring_revenue_annual_recurring_revenue: str
+    revenue_growth_rate: str
+    churn_rate: str
+    cash_flow_and_runway: str
+
+
+class ProductEngagementAndRetentionMetrics(BaseModel):
+    active_users: str
+    user_retention_rates: str
+    engagement_metrics: str
+
+
+class MarketValidationAndAdoptionSignals(BaseModel):
+    partnerships_and_collaborations: str
+    pilot_customers_and_letters_of_intent: str
+    waitlists_and_pre_orders: str
+    customer_testimonials_and_case_studies: str
+
+
+class TractionResult(BaseModel):
+    customer_acquisition_and_growth_metrics: CustomerAcquisitionAndGrowthMetrics
+    revenue_and_financial_metrics: RevenueAndFinancialMetrics
+    product_engagement_and_retention_metrics: ProductEngagementAndRetentionMetrics
+    market_validation_and_adoption_signals: MarketValidationAndAdoptionSignals
+    stage_specific_focus_areas: List[str]
+    sources: List[str]
+    gaps: Gaps
+
+
+class GeneratedQuestions(BaseModel):
+    questions: List[str]
+
+
+class InvestmentRecommendationResult(BaseModel):
+    investment_recommendation_summary: str
+    confidence_score: int = Field(description="Confidence (0-100) in recommending the investment.")
+
+
+AGENT_OUTPUT_SCHEMAS: Dict[str, Type[BaseModel]] = {
+    "business_model_sub_agent": BusinessModelResult,
+    "competitor_analysis_sub_agent": CompetitorAnalysisResult,
+    "funding_and_financials_sub_agent": FundingAndFinancialsResult,
+    "industry_trends_sub_agent": IndustryTrendsResult,
+    "overview_sub_agent": OverviewResult,
+    "partnerships_and_strategic_analysis_sub_agent": PartnershipsAndStrategicAnalysisResult,
+    "team_profiling_sub_agent": TeamProfilingResult,
+    "traction_sub_agent": TractionResult,
+    "generate_qna_agent": GeneratedQuestions,
+    "investment_recommendation_sub_agent": InvestmentRecommendationResult,
+}
+
+
+def load_agent_result(value: Any) -> Dict[str, Any]:
+    """
+    An agent result from state as a dict: schema-validated results already are; incomplete results
+    (see DagAgent.incomplete_result) and checkpoints of earlier runs are JSON strings. {} when unusable.
+    """
+    if isinstance(value, dict):
+        return value
+    if not isinstance(value, str):
+        return {}
+    try:
+        parsed = json.loads(value.strip().removeprefix("```json").removesuffix("```").strip())
+    except ValueError:
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
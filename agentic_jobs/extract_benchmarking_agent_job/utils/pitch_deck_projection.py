@@ -0,0 +1,88 @@
+"""
+    Per-agent projections of the extracted pitch deck.
+
+    Every sub agent used to receive the whole pitch deck JSON (pretty printed, null fields included).
+    Each one now gets its own state key holding only the fields it works with, as minified JSON
+    without null / empty values. The identity fields are part of every projection.
+"""
+import json
+from typing import Any, Dict, Iterable, Optional, Union
+from startup_eval_tools.near_dedup import estimate_tokens
+
+# fields every sub agent needs to know which company it is researching
+IDENTITY_FIELDS = ("company_name", "company_websites", "parent_company_details")
+
+# state key read by the agent's instruction -> pitch deck fields it needs (on top of IDENTITY_FIELDS)
+PITCH_DECK_PROJECTIONS = {
+    "business_model_pitch_deck": ("problem", "solution", "business_model", "market_size", "traction"),
+    "competitor_analysis_pitch_deck": ("problem", "solution", "market_size", "business_model", "public_competitor_symbols"),
+    "funding_and_financials_pitch_deck": ("funding_details", "financial_projections", "traction", "business_model"),
+    "industry_trends_pitch_deck": ("problem", "solution", "market_size", "business_model"),
+    "overview_pitch_deck": ("problem", "solution", "market_size", "business_model", "traction", "team_members",
+                            "funding_details", "public_competitor_symbols"),
+    "partnerships_and_strategic_analysis_pitch_deck": ("solution", "business_model", "traction", "public_competitor_symbols"),
+    "team_profiling_pitch_deck": ("team_members",),
+    "traction_pitch_deck": ("traction", "financial_projections"),
+    # asks the founder about the gaps of every sub agent, so it keeps everything but the contact details
+    "generate_qna_pitch_deck": ("problem", "solution", "market_size", "team_members", "traction",
+                                "public_competitor_symbols", "funding_details", "business_model", "financial_projections"),
+}
+PITCH_DECK_PROJECTION_REPORT_KEY = "pitch_deck_projection_report"
+
+
+def _parse_pitch_deck(pitch_deck: Union[str, Dict, None]) -> Optional[Dict]:
+    if isinstance(pitch_deck, dict):
+        return pitch_deck
+    try:
+        parsed = json.loads((pitch_deck or "").removeprefix("```json").removesuffix("```").strip())
+    except ValueError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def _drop_empty(value: Any) -> Any:
+    """Recursively remove None, empty strings, empty lists and empty objects."""
+    if isinstance(value, dict):
+        value = {k: _drop_empty(v) for k, v in value.items()}
+        return {k: v for k, v in value.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [v for v in map(_drop_empty, value) if v not in (None, "", [], {})]
+    return value
+
+
+def minify_json(value: Any) -> str:
+    """Compact JSON (no indentation or spaces after separators, unicode kept as is) without null / empty values."""
+    return json.dumps(_drop_empty(value), separators=(",", ":"), ensure_ascii=False)
+
+
+def project_pitch_deck(pitch_deck: Union[str, Dict, None], fields: Iterable[str]) -> str:
+    """Minified JSON of the identity fields plus `fields` of the pitch deck (unparseable input is returned as is)."""
+    parsed = _parse_pitch_deck(pitch_deck)
+    if parsed is None:
+        return pitch_deck if isinstance(pitch_deck, str) else ""
+    wanted = dict.fromkeys(IDENTITY_FIELDS + tuple(fields))
+    return minify_json({k: parsed[k] for k in wanted if k in parsed})
+
+
+def build_pitch_deck_projections(pitch_deck: Union[str, Dict, None]) -> Dict[str, str]:
+    """{state key: projection} for every entry of PITCH_DECK_PROJECTIONS."""
+    return {key: project_pitch_deck(pitch_deck, fields) for key, fields in PITCH_DECK_PROJECTIONS.items()}
+
+
+def pitch_deck_projection_report(pitch_deck: Union[str, Dict, None], projections: Dict[str, str]) -> Dict[str, Dict]:
+    """
+    Estimated prompt tokens of the pitch deck per agent, before (the whole deck as it used to be injected) and after projection.
+    Prints one line per agent plus the total.
+    """
+    full_tokens = estimate_tokens(pitch_deck if isinstance(pitch_deck, str) else str(pitch_deck or ""))
+    report = {}
+    for key, projection in projections.items():
+        projected_tokens = estimate_tokens(projection)
+        report[key] = {"before": full_tokens, "after": projected_tokens}
+        saved = 1 - projected_tokens / full_tokens if full_tokens else 0
+        print(f"Pitch deck tokens for {key}: {full_tokens} -> {projected_tokens} ({saved:.0%} saved)")
+    total_before = sum(r["before"] for r in report.values())
+    total_after = sum(r["after"] for r in report.values())
+    if total_before:
+        print(f"Pitch deck tokens across agents: {total_before} -> {total_after} ({1 - total_after / total_before:.0%} saved)")
+    return report
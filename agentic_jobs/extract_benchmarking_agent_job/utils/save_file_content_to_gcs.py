@@ -4,6 +4,17 @@ from google.cloud import storage
 GCP_PITCH_DECK_OUTPUT_FOLDER = Config.GCP_PITCH_DECK_OUTPUT_FOLDER
 GOOGLE_CLOUD_PROJECT = Config.GOOGLE_CLOUD_PROJECT
 
+# one client per process (reused by every company a worker processes)
+_storage_client = None
+
+
+def get_storage_client() -> storage.Client:
+    global _storage_client
+    if _storage_client is None:
+        _storage_client = storage.Client(project=GOOGLE_CLOUD_PROJECT)
+    return _storage_client
+
+
 CONTENT_TYPE_MAP = {
     "json": "application/json",
     "md": "text/markdown",
@@ -26,8 +37,7 @@ async def save_file_content_to_gcs(bucket_name: str, folder_name: str, file_cont
         str: The GCS URI of the saved file.
     """
 
-    storage_client = storage.Client(project=GOOGLE_CLOUD_PROJECT)
-    bucket = storage_client.bucket(bucket_name)
+    bucket = get_storage_client().bucket(bucket_name)
     blob = bucket.blob(
         f"{folder_name}/{file_name}.{file_extension.lower()}")
 
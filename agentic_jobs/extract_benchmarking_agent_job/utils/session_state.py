@@ -0,0 +1,99 @@
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional
+from .output_schemas import load_agent_result
+
+# parsed JSON string results kept in memory (checkpoints of earlier runs and incomplete stages)
+STATE_RESULT_CACHE_SIZE = int(os.getenv("STATE_RESULT_CACHE_SIZE", "64"))
+# number of the largest state keys listed by StateSizeTracker.summary
+STATE_SIZE_REPORT_KEYS = 5
+
+
+@lru_cache(maxsize=STATE_RESULT_CACHE_SIZE)
+def _parse_result(value: str) -> Dict[str, Any]:
+    return load_agent_result(value)
+
+
+class SessionState:
+    """
+    Typed access to a session state (CallbackContext.state, or ReadonlyContext.state in instruction
+    providers) without copying it: values are read and written key by key, while `state.to_dict()`
+    builds a new dict of the whole state and `state.update({**state.to_dict(), ...})` also puts every
+    key into the event's state delta.
+
+    `result` returns an agent result as a dict. Schema-validated results are stored parsed; a JSON
+    string (incomplete stage, checkpoint of an earlier run) is parsed once per process, so the
+    returned dict is shared and must not be modified.
+    """
+
+    def __init__(self, state: Mapping[str, Any]):
+        self._state = state
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._state.get(key, default)
+
+    def result(self, key: str) -> Dict[str, Any]:
+        value = self._state.get(key)
+        return _parse_result(value) if isinstance(value, str) else load_agent_result(value)
+
+    def set(self, key: str, value: Any) -> None:
+        self._state[key] = value
+
+    def update(self, values: Dict[str, Any]) -> None:
+        """Writes only `values` (one state delta entry per key)."""
+        for key, value in values.items():
+            self._state[key] = value
+
+    @property
+    def firestore_doc_id(self) -> Optional[str]:
+        return self._state.get("firestore_doc_id")
+
+    @property
+    def rag_corpus_name(self) -> Optional[str]:
+        return self._state.get("rag_corpus_name")
+
+
+def _json_size(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return len(json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8"))
+
+
+class StateSizeTracker:
+    """
+    Approximate (JSON) size of every state key of a run (invocation) and of the state deltas written
+    to the session, recorded from the events of the run (see main.py).
+    """
+
+    def __init__(self):
+        self._runs: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, invocation_id: str, state_delta: Optional[Dict[str, Any]]) -> None:
+        if not state_delta:
+            return
+        run = self._runs.setdefault(invocation_id, {"keys": {}, "state_deltas": 0, "delta_bytes": 0})
+        run["state_deltas"] += 1
+        for key, value in state_delta.items():
+            size = _json_size(value)
+            run["keys"][key] = size
+            run["delta_bytes"] += size
+
+    def summary(self, invocation_id: str) -> dict:
+        """Size of the state at the end of a run, the bytes written through state deltas and the largest keys."""
+        run = self._runs.get(invocation_id, {"keys": {}, "state_deltas": 0, "delta_bytes": 0})
+        largest = sorted(run["keys"].items(), key=lambda item: item[1], reverse=True)[:STATE_SIZE_REPORT_KEYS]
+        return {
+            "keys": len(run["keys"]),
+            "state_bytes": sum(run["keys"].values()),
+            "state_deltas": run["state_deltas"],
+            "delta_bytes": run["delta_bytes"],
+            "largest_keys": dict(largest),
+        }
+
+    def release(self, invocation_id: str) -> None:
+        """Forget a run that is over (a worker processes many companies)."""
+        self._runs.pop(invocation_id, None)
+
+
+state_sizes = StateSizeTracker()
@@ -0,0 +1,51 @@
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from .output_schemas import SET_MODEL_RESPONSE_TOOL_NAME
+
+# deadline of every benchmarking sub agent; the stage is cancelled when it is reached (see DagAgent)
+SUB_AGENT_TIMEOUT_SECONDS = float(os.getenv("SUB_AGENT_TIMEOUT_SECONDS", "480"))
+# tool calls every benchmarking sub agent may make
+SUB_AGENT_MAX_TOOL_CALLS = int(os.getenv("SUB_AGENT_MAX_TOOL_CALLS", "24"))
+# share of the deadline after which tools are no longer run, leaving time to write the answer
+WRAP_UP_AFTER_FRACTION = 0.8
+# tool calls refused by enforce_tool_budget before the stage is stopped anyway
+TOOL_BUDGET_GRACE_CALLS = 3
+
+# (invocation id, agent name) -> [time of the first tool call, tool calls so far]
+_tool_usage: Dict[Tuple[str, str], List[Any]] = {}
+
+
+def enforce_tool_budget(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext) -> Optional[Dict]:
+    """
+    before_tool_callback: ask the agent to wrap up once it used its tool budget.
+
+    After SUB_AGENT_MAX_TOOL_CALLS calls, or WRAP_UP_AFTER_FRACTION of SUB_AGENT_TIMEOUT_SECONDS after its
+    first call, tools are no longer run; the response tells the model to answer with what it already
+    gathered and to report the rest as gaps. This is the cooperative half of the budget: a stage that
+    keeps calling tools regardless is stopped by its DagAgent (StageIO.max_tool_calls / timeout_seconds).
+
+    The final answer (set_model_response) is neither counted nor refused.
+    """
+    if tool.name == SET_MODEL_RESPONSE_TOOL_NAME:
+        return None
+    usage = _tool_usage.setdefault((tool_context.invocation_id, tool_context.agent_name), [time.monotonic(), 0])
+    usage[1] += 1
+    elapsed = time.monotonic() - usage[0]
+    if usage[1] <= SUB_AGENT_MAX_TOOL_CALLS and elapsed <= WRAP_UP_AFTER_FRACTION * SUB_AGENT_TIMEOUT_SECONDS:
+        return None
+    print(f"Tool budget of {tool_context.agent_name} exhausted ({usage[1] - 1} calls, {elapsed:.0f}s): refusing {tool.name}")
+    return {
+        "status": "budget_exhausted",
+        "message": "The research budget for this task is used up. Do not call any more research tools. Return "
+                   "your final JSON answer now (with set_model_response when available) using only the information already gathered, and list everything you could "
+                   "not verify under the gaps.",
+    }
+
+
+def release_tool_budget(invocation_id: str) -> None:
+    """Forget the tool usage of a run that is over (a worker processes many companies)."""
+    for key in [key for key in _tool_usage if key[0] == invocation_id]:
+        _tool_usage.pop(key, None)
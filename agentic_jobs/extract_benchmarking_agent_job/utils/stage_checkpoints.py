@@ -0,0 +1,117 @@
+import asyncio
+import json
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+from google.cloud import firestore
+from config import Config
+from .save_file_content_to_gcs import save_file_content_to_gcs, get_storage_client
+from .update_sub_agent_result_to_firestore import get_firestore_async_client
+
+# "firestore" (index on the company document, payload in GCS), "local" (JSON files) or "none"
+STAGE_CHECKPOINT_BACKEND = os.getenv("STAGE_CHECKPOINT_BACKEND", "firestore").lower()
+STAGE_CHECKPOINT_DIR = os.getenv("STAGE_CHECKPOINT_DIR", ".checkpoints")
+# company document field mapping each stage to {"inputs_sha256": ..., "gcs_uri": ..., "completed_at": ...}
+STAGE_CHECKPOINTS_FIELD = "stage_checkpoints"
+
+
+class StageCheckpointStore(ABC):
+    """
+    Durable results of completed pipeline stages, so a retried job skips the stages it already ran.
+
+    A checkpoint is the state a stage wrote plus the hash of the inputs it ran with (see DagAgent);
+    `load` only returns it while that hash is unchanged. Failures are logged and treated as a miss.
+    """
+
+    @abstractmethod
+    async def load(self, stage: str, inputs_sha256: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def save(self, stage: str, inputs_sha256: str, state: Dict[str, Any]) -> None:
+        ...
+
+
+class LocalFileCheckpointStore(StageCheckpointStore):
+    """Checkpoints as `<directory>/<run_id>/<stage>.json` (local runs and tests); file I/O runs in a thread."""
+
+    def __init__(self, directory: str, run_id: str):
+        self.directory = Path(directory) / run_id
+
+    def _read(self, stage: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads((self.directory / f"{stage}.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, stage: str, checkpoint: Dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f"{stage}.json").write_text(json.dumps(checkpoint, default=str), encoding="utf-8")
+
+    async def load(self, stage: str, inputs_sha256: str) -> Optional[Dict[str, Any]]:
+        checkpoint = await asyncio.to_thread(self._read, stage)
+        if not checkpoint or checkpoint.get("inputs_sha256") != inputs_sha256:
+            return None
+        return checkpoint.get("state")
+
+    async def save(self, stage: str, inputs_sha256: str, state: Dict[str, Any]) -> None:
+        checkpoint = {"stage": stage, "inputs_sha256": inputs_sha256, "state": state,
+                      "completed_at": datetime.now(timezone.utc).isoformat()}
+        await asyncio.to_thread(self._write, stage, checkpoint)
+
+
+def _download_json(gcs_uri: str) -> Dict[str, Any]:
+    bucket_name, _, blob_name = gcs_uri.removeprefix("gs://").partition("/")
+    blob = get_storage_client().bucket(bucket_name).blob(blob_name)
+    return json.loads(blob.download_as_text())
+
+
+class FirestoreCheckpointStore(StageCheckpointStore):
+    """
+    Checkpoint payloads in GCS (`<output folder>/<document id>/checkpoints/<stage>.json`), indexed by
+    `stage_checkpoints.<stage>` on the company document next to `sub_agents_results`, so a stale
+    checkpoint is recognised with a point read and never downloaded.
+    """
+
+    def __init__(self, collection_name: str, document_id: str, bucket_name: str, output_folder: str):
+        self.document_id = document_id
+        self.bucket_name = bucket_name
+        self.folder_name = f"{output_folder}/{document_id}/checkpoints"
+        self.document_ref = get_firestore_async_client().collection(collection_name).document(document_id)
+
+    async def load(self, stage: str, inputs_sha256: str) -> Optional[Dict[str, Any]]:
+        field_path = firestore.AsyncClient.field_path(STAGE_CHECKPOINTS_FIELD, stage)
+        try:
+            snapshot = await self.document_ref.get(field_paths=[field_path])
+            entry = ((snapshot.to_dict() or {}).get(STAGE_CHECKPOINTS_FIELD) or {}).get(stage)
+            if not entry or entry.get("inputs_sha256") != inputs_sha256 or not entry.get("gcs_uri"):
+                return None
+            checkpoint = await asyncio.to_thread(_download_json, entry["gcs_uri"])
+        except Exception as e:
+            print(f"Could not load checkpoint of stage {stage} for document {self.document_id}: {e}")
+            return None
+        return checkpoint.get("state") if checkpoint.get("inputs_sha256") == inputs_sha256 else None
+
+    async def save(self, stage: str, inputs_sha256: str, state: Dict[str, Any]) -> None:
+        try:
+            gcs_uri = await save_file_content_to_gcs(
+                bucket_name=self.bucket_name, folder_name=self.folder_name, file_extension="json", file_name=stage,
+                file_content=json.dumps({"stage": stage, "inputs_sha256": inputs_sha256, "state": state}, default=str))
+            await self.document_ref.update({firestore.AsyncClient.field_path(STAGE_CHECKPOINTS_FIELD, stage): {
+                "inputs_sha256": inputs_sha256, "gcs_uri": gcs_uri, "completed_at": firestore.SERVER_TIMESTAMP}})
+        except Exception as e:
+            print(f"Could not save checkpoint of stage {stage} for document {self.document_id}: {e}")
+
+
+def get_stage_checkpoint_store(state: Dict[str, Any]) -> Optional[StageCheckpointStore]:
+    """Checkpoint store of the company being processed (STAGE_CHECKPOINT_BACKEND), None when disabled."""
+    document_id = state.get("firestore_doc_id")
+    if not document_id or STAGE_CHECKPOINT_BACKEND == "none":
+        return None
+    if STAGE_CHECKPOINT_BACKEND == "local":
+        return LocalFileCheckpointStore(STAGE_CHECKPOINT_DIR, run_id=document_id)
+    return FirestoreCheckpointStore(collection_name=Config.FIRESTORE_COMPANY_COLLECTION, document_id=document_id,
+                                    bucket_name=Config.GCS_BUCKET_NAME,
+                                    output_folder=Config.GCP_PITCH_DECK_OUTPUT_FOLDER)
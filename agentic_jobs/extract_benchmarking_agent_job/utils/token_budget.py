@@ -0,0 +1,141 @@
+import os
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from config import Config
+
+# tokens of a whole run after which every agent is switched to FAST_AGENT_MODEL
+JOB_TOKEN_SOFT_LIMIT = int(os.getenv("JOB_TOKEN_SOFT_LIMIT", "4000000"))
+# tokens of a single agent after which it is switched to FAST_AGENT_MODEL
+AGENT_TOKEN_SOFT_LIMIT = int(os.getenv("AGENT_TOKEN_SOFT_LIMIT", "750000"))
+# tokens / model calls of a whole run after which no model is called any more
+JOB_TOKEN_HARD_LIMIT = int(os.getenv("JOB_TOKEN_HARD_LIMIT", "8000000"))
+JOB_MAX_MODEL_CALLS = int(os.getenv("JOB_MAX_MODEL_CALLS", "600"))
+# USD per million (prompt, output) tokens, prompts up to 200k tokens; thinking tokens are billed as output
+MODEL_PRICES_PER_MILLION_TOKENS = {
+    "gemini-2.5-pro": (1.25, 10.0),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+}
+
+# whether the model call being prepared was switched to FAST_AGENT_MODEL: set by before_model for every
+# call and read by TieredGemini (llm_model_config/model_tiering.py), which runs in the same task
+_call_downgraded: ContextVar[bool] = ContextVar("token_budget_call_downgraded", default=False)
+
+
+class TokenBudgetExceeded(RuntimeError):
+    """Raised instead of calling the model once a run reached JOB_TOKEN_HARD_LIMIT or JOB_MAX_MODEL_CALLS."""
+
+
+def estimate_cost_usd(model: str, prompt_tokens: int, output_tokens: int) -> Optional[float]:
+    """List price of a model call (MODEL_PRICES_PER_MILLION_TOKENS), None for an unknown model."""
+    # longest matching prefix, so "gemini-2.5-flash-lite-001" is not priced as flash
+    matches = [name for name in MODEL_PRICES_PER_MILLION_TOKENS if model.startswith(name)]
+    if not matches:
+        return None
+    prompt_price, output_price = MODEL_PRICES_PER_MILLION_TOKENS[max(matches, key=len)]
+    return (prompt_tokens * prompt_price + output_tokens * output_price) / 1_000_000
+
+
+class TokenBudget:
+    """
+    Model calls, tokens and cost of every run (invocation), per agent, from the usage metadata of the
+    model responses (see apply_token_budget / record_token_usage).
+
+    Retries of a failed request (HttpRetryOptions) happen inside one model call and are not counted;
+    neither are the direct Gemini calls of the PDF analysis tool.
+    """
+
+    def __init__(self):
+        self._runs: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def _agent(self, invocation_id: str, agent_name: str) -> Dict[str, Any]:
+        return self._runs.setdefault(invocation_id, {}).setdefault(agent_name, {
+            "calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "output_tokens": 0, "thoughts_tokens": 0,
+            "total_tokens": 0, "cost_usd": 0.0, "models": {}, "requested_model": None, "downgraded": False})
+
+    def totals(self, invocation_id: str) -> Dict[str, int]:
+        agents = self._runs.get(invocation_id, {}).values()
+        return {"calls": sum(a["calls"] for a in agents), "total_tokens": sum(a["total_tokens"] for a in agents)}
+
+    def before_model(self, invocation_id: str, agent_name: str, llm_request: LlmRequest) -> None:
+        totals = self.totals(invocation_id)
+        if totals["total_tokens"] >= JOB_TOKEN_HARD_LIMIT or totals["calls"] >= JOB_MAX_MODEL_CALLS:
+            raise TokenBudgetExceeded(f"token budget of the run exhausted ({totals['total_tokens']} tokens, "
+                                      f"{totals['calls']} model calls) before a model call of {agent_name}")
+        agent = self._agent(invocation_id, agent_name)
+        if totals["total_tokens"] >= JOB_TOKEN_SOFT_LIMIT or agent["total_tokens"] >= AGENT_TOKEN_SOFT_LIMIT:
+            if not agent["downgraded"]:
+                print(f"Token budget: switching {agent_name} from {llm_request.model} to {Config.FAST_AGENT_MODEL} "
+                      f"without escalation ({agent['total_tokens']} agent tokens, {totals['total_tokens']} run tokens)")
+            agent["downgraded"] = True
+            llm_request.model = Config.FAST_AGENT_MODEL
+        # TieredGemini keeps the fast model's answer of a downgraded agent
+        _call_downgraded.set(agent["downgraded"])
+        agent["requested_model"] = llm_request.model
+
+    def is_downgraded(self, invocation_id: str, agent_name: str) -> bool:
+        return self._runs.get(invocation_id, {}).get(agent_name, {}).get("downgraded", False)
+
+    def record(self, invocation_id: str, agent_name: str, llm_response: LlmResponse) -> None:
+        usage = llm_response.usage_metadata
+        if usage is None:
+            # partial (streamed) responses and errors carry no usage
+            return
+        agent = self._agent(invocation_id, agent_name)
+        model = llm_response.model_version or agent["requested_model"] or "unknown"
+        prompt_tokens = usage.prompt_token_count or 0
+        output_tokens = (usage.candidates_token_count or 0) + (usage.thoughts_token_count or 0)
+        agent["calls"] += 1
+        agent["prompt_tokens"] += prompt_tokens
+        agent["cached_tokens"] += usage.cached_content_token_count or 0
+        agent["output_tokens"] += usage.candidates_token_count or 0
+        agent["thoughts_tokens"] += usage.thoughts_token_count or 0
+        agent["total_tokens"] += usage.total_token_count or prompt_tokens + output_tokens
+        agent["models"][model] = agent["models"].get(model, 0) + 1
+        agent["cost_usd"] += estimate_cost_usd(model, prompt_tokens, output_tokens) or 0.0
+
+    def summary(self, invocation_id: str) -> dict:
+        """Cost breakdown of a run: totals plus calls, tokens, cost and models of every agent."""
+        agents = {name: {key: (round(value, 4) if key == "cost_usd" else value) for key, value in agent.items()
+                         if key != "requested_model"}
+                  for name, agent in sorted(self._runs.get(invocation_id, {}).items())}
+        return {
+            **self.totals(invocation_id),
+            "prompt_tokens": sum(a["prompt_tokens"] for a in agents.values()),
+            "output_tokens": sum(a["output_tokens"] + a["thoughts_tokens"] for a in agents.values()),
+            "cost_usd": round(sum(a["cost_usd"] for a in agents.values()), 4),
+            "downgraded_agents": [name for name, a in agents.items() if a["downgraded"]],
+            "agents": agents,
+        }
+
+    def release(self, invocation_id: str) -> None:
+        """Forget a run that is over (a worker processes many companies)."""
+        self._runs.pop(invocation_id, None)
+
+
+token_budget = TokenBudget()
+
+
+def model_call_downgraded() -> bool:
+    """Whether the token budget switched the model call being made (in this task) to FAST_AGENT_MODEL."""
+    return _call_downgraded.get()
+
+
+def apply_token_budget(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """
+    before_model_callback: switch the agent to FAST_AGENT_MODEL once it (AGENT_TOKEN_SOFT_LIMIT) or the
+    run (JOB_TOKEN_SOFT_LIMIT) used its soft token limit, and raise TokenBudgetExceeded at the run's
+    ceiling (JOB_TOKEN_HARD_LIMIT / JOB_MAX_MODEL_CALLS). Inside benchmarking the failed sub agent is
+    reported as incomplete; elsewhere the run fails.
+    """
+    token_budget.before_model(callback_context.invocation_id, callback_context.agent_name, llm_request)
+    return None
+
+
+def record_token_usage(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+    """after_model_callback: add the usage metadata of the response to the run's token budget."""
+    token_budget.record(callback_context.invocation_id, callback_context.agent_name, llm_response)
+    return None
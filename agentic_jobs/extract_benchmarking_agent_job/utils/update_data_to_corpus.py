@@ -1,29 +1,267 @@
+import asyncio
+import os
+import time
 from vertexai.preview import rag
-from typing import List
-
-# def list_corpus_files(corpus_name):
-#     """Lists files in the specified corpus."""
-#     files = list(rag.list_files(corpus_name=corpus_name))
-#     print(f"Total files in corpus: {len(files)}")
-#     for file in files:
-#         print(f"File: {file.display_name} - {file.name}")
-
-def update_data_to_corpus(corpus_name: str, document_gcs_paths: List[str]) -> None:
-    """Updates the RAG corpus with new documents.
-    
-    Args:
-        corpus_name (str): The name of the RAG corpus to update.
-        documents (list[rag.Document]): A list of documents to add to the corpus.
+from typing import Dict, List, Optional, Set
+from google.adk.agents.callback_context import CallbackContext
+from google.cloud import firestore
+from .update_sub_agent_result_to_firestore import get_firestore_async_client
+from .save_file_content_to_gcs import get_storage_client
+
+# flush as soon as this many paths are waiting (also the max paths sent in one import_files call)
+RAG_IMPORT_BATCH_SIZE = int(os.getenv("RAG_IMPORT_BATCH_SIZE", "25"))
+# company document field mapping each imported GCS URI to {"md5": ..., "rag_file": ...}
+RAG_CORPUS_MANIFEST_FIELD = "rag_corpus_manifest"
+
+
+def _gcs_md5(gcs_uri: str) -> Optional[str]:
+    """Content hash GCS keeps for the object (base64 md5), read from its metadata without downloading it."""
+    bucket_name, _, blob_name = gcs_uri.removeprefix("gs://").partition("/")
+    blob = get_storage_client().bucket(bucket_name).get_blob(blob_name)
+    return blob.md5_hash if blob else None
+
+
+def _gcs_exists(gcs_uri: str) -> bool:
+    bucket_name, _, blob_name = gcs_uri.removeprefix("gs://").partition("/")
+    return get_storage_client().bucket(bucket_name).blob(blob_name).exists()
+
+
+def _list_corpus_files_by_uri(corpus_name: str) -> Dict[str, str]:
+    """GCS source URI -> RagFile resource name for every file currently in the corpus."""
+    files = {}
+    for rag_file in rag.list_files(corpus_name=corpus_name):
+        for uri in rag_file.gcs_source.uris:
+            files[uri] = rag_file.name
+    return files
+
+
+class CorpusIngestionQueue:
     """
-    print(f"CORUS NAME: {corpus_name}, DOCUMENT GCS PATHS: {document_gcs_paths}")
-    if not document_gcs_paths:
-        print("No documents provided to update the corpus.")
-        return
-    
-    rag.import_files(
-        corpus_name=corpus_name,
-        paths=document_gcs_paths,
-    )
-    print(f"Updated corpus '{corpus_name}' with {len(document_gcs_paths)} documents.")
-
-    # list_corpus_files(corpus_name=corpus_name)
\ No newline at end of file
+    Collects sub agent result GCS paths during a run and imports them into their RAG corpus in batches.
+
+    `enqueue` only records the paths (and schedules a background flush once RAG_IMPORT_BATCH_SIZE paths
+    are waiting), so agent callbacks never block the event loop on `rag.import_files`. `flush` imports
+    everything pending in a worker thread; imports run one at a time because a corpus accepts a single
+    import operation at once. Every import is recorded in `batches` with its status and timing.
+
+    Corpora registered with `register_corpus` (see `prepare_rag_corpus`) are updated incrementally: a
+    path is only imported when its GCS content hash differs from the one recorded in the company
+    document's manifest (or its RagFile is gone), the previous RagFile of a changed path is replaced,
+    and `prune_stale` removes files whose source was replaced or removed. Every output has its own
+    GCS folder (results are written to fixed paths, the pitch deck analysis is named after the
+    company), so a source counts as replaced only when this run produced another file in its folder:
+    the result of a stage that did not complete keeps its RagFile.
+
+    Several companies can be processed at once (worker mode): `flush`, `prune_stale` and `summary`
+    accept the corpus of the company whose run is finishing, and `release` forgets that corpus.
+    """
+
+    def __init__(self, batch_size: int = RAG_IMPORT_BATCH_SIZE):
+        self.batch_size = max(batch_size, 1)
+        self.batches: List[dict] = []
+        self.unchanged: Dict[str, List[str]] = {}
+        self.pruned: Dict[str, List[str]] = {}
+        self._pending: Dict[str, List[str]] = {}
+        self._seen: Dict[str, Set[str]] = {}
+        self._manifests: Dict[str, dict] = {}
+        self._import_lock = asyncio.Lock()
+        self._background_flushes = set()
+
+    def register_corpus(self, corpus_name: str, collection_name: str, document_id: str, manifest: Dict[str, dict]):
+        """Enable content-hash diffing for `corpus_name` using the manifest stored on the company document."""
+        # entries pointing to another corpus (recreated since) are meaningless here
+        files = {uri: entry for uri, entry in (manifest or {}).items()
+                 if str(entry.get("rag_file", "")).startswith(f"{corpus_name}/")}
+        self._manifests[corpus_name] = {"collection": collection_name, "document_id": document_id, "files": files}
+        self._seen.setdefault(corpus_name, set())
+
+    def pending_count(self) -> int:
+        return sum(len(paths) for paths in self._pending.values())
+
+    def release(self, corpus_name: str) -> None:
+        """Forget a corpus whose run is over (a long-running worker processes many companies)."""
+        for registry in (self._pending, self._seen, self._manifests, self.unchanged, self.pruned):
+            registry.pop(corpus_name, None)
+        self.batches = [b for b in self.batches if b["corpus_name"] != corpus_name]
+
+    async def enqueue(self, corpus_name: str, document_gcs_paths: List[str]) -> None:
+        if not corpus_name or not document_gcs_paths:
+            print(f"Skipping corpus ingestion (corpus: {corpus_name}, paths: {document_gcs_paths}).")
+            return
+        pending = self._pending.setdefault(corpus_name, [])
+        pending.extend(p for p in document_gcs_paths if p not in pending)
+        self._seen.setdefault(corpus_name, set()).update(document_gcs_paths)
+        print(f"Queued {len(document_gcs_paths)} documents for corpus '{corpus_name}' ({self.pending_count()} pending).")
+        if self.pending_count() >= self.batch_size:
+            task = asyncio.create_task(self._import_pending())
+            self._background_flushes.add(task)
+            task.add_done_callback(self._background_flushes.discard)
+
+    async def flush(self, corpus_name: Optional[str] = None) -> List[dict]:
+        """Import the pending paths (of `corpus_name` only, if given), wait for in-flight background flushes and return the batch records."""
+        await self._import_pending(corpus_name)
+        if self._background_flushes:
+            await asyncio.gather(*self._background_flushes, return_exceptions=True)
+        return [b for b in self.batches if corpus_name in (None, b["corpus_name"])]
+
+    async def _import_pending(self, only_corpus: Optional[str] = None) -> None:
+        async with self._import_lock:
+            if only_corpus is None:
+                pending, self._pending = self._pending, {}
+            else:
+                pending = {only_corpus: self._pending.pop(only_corpus)} if only_corpus in self._pending else {}
+            for corpus_name, paths in pending.items():
+                if corpus_name in self._manifests:
+                    await self._sync_changed(corpus_name, paths)
+                    continue
+                for start in range(0, len(paths), self.batch_size):
+                    await self._import_batch(corpus_name, paths[start:start + self.batch_size])
+
+    async def _sync_changed(self, corpus_name: str, paths: List[str]) -> None:
+        manifest = self._manifests[corpus_name]
+        try:
+            hashes = await asyncio.gather(*(asyncio.to_thread(_gcs_md5, p) for p in paths))
+            existing = await asyncio.to_thread(_list_corpus_files_by_uri, corpus_name)
+        except Exception as e:
+            print(f"Could not diff corpus '{corpus_name}', importing all {len(paths)} documents: {e}")
+            hashes, existing = [None] * len(paths), {}
+
+        changed = []
+        for path, md5 in zip(paths, hashes):
+            recorded = manifest["files"].get(path, {})
+            if md5 and recorded.get("md5") == md5 and path in existing:
+                self.unchanged.setdefault(corpus_name, []).append(path)
+            else:
+                changed.append((path, md5))
+        if not changed:
+            print(f"Corpus '{corpus_name}' already up to date for {len(paths)} documents.")
+            return
+
+        # replace the previous version of a changed document instead of adding a second copy
+        for path, _ in changed:
+            if path in existing:
+                try:
+                    await asyncio.to_thread(rag.delete_file, name=existing[path], corpus_name=corpus_name)
+                except Exception as e:
+                    print(f"Failed to delete outdated RagFile {existing[path]}: {e}")
+
+        changed_paths = [path for path, _ in changed]
+        for start in range(0, len(changed_paths), self.batch_size):
+            await self._import_batch(corpus_name, changed_paths[start:start + self.batch_size])
+
+        try:
+            imported = await asyncio.to_thread(_list_corpus_files_by_uri, corpus_name)
+        except Exception as e:
+            print(f"Could not list corpus '{corpus_name}' after import: {e}")
+            imported = {}
+        updates = {path: {"md5": md5, "rag_file": imported[path]}
+                   for path, md5 in changed if md5 and path in imported}
+        await self._save_manifest(corpus_name, updates=updates)
+
+    async def _save_manifest(self, corpus_name: str, updates: Dict[str, dict] = None, removed: List[str] = ()):
+        manifest = self._manifests[corpus_name]
+        fields = {}
+        for path, entry in (updates or {}).items():
+            manifest["files"][path] = entry
+            fields[firestore.AsyncClient.field_path(RAG_CORPUS_MANIFEST_FIELD, path)] = entry
+        for path in removed:
+            manifest["files"].pop(path, None)
+            fields[firestore.AsyncClient.field_path(RAG_CORPUS_MANIFEST_FIELD, path)] = firestore.DELETE_FIELD
+        if not fields:
+            return
+        try:
+            await get_firestore_async_client().collection(manifest["collection"]).document(
+                manifest["document_id"]).update(fields)
+        except Exception as e:
+            print(f"Failed to save corpus manifest for document {manifest['document_id']}: {e}")
+
+    async def prune_stale(self, only_corpus: Optional[str] = None) -> List[str]:
+        """
+        Delete RagFiles of registered corpora (or `only_corpus`) whose source was replaced (this run produced
+        another file in its GCS folder) or removed from GCS (call once the run completed).
+        """
+        async with self._import_lock:
+            for corpus_name in [c for c in self._manifests if only_corpus in (None, c)]:
+                seen = self._seen.get(corpus_name, set())
+                if not seen:
+                    # nothing was produced (e.g. failed run); keep the corpus as it is
+                    continue
+                try:
+                    existing = await asyncio.to_thread(_list_corpus_files_by_uri, corpus_name)
+                except Exception as e:
+                    print(f"Could not list corpus '{corpus_name}' for pruning: {e}")
+                    continue
+                seen_folders = {uri.rpartition("/")[0] for uri in seen}
+                not_produced = [uri for uri in existing if uri not in seen]
+                # a failed check counts as "still exists": the file is kept
+                exists = await asyncio.gather(*(asyncio.to_thread(_gcs_exists, uri) for uri in not_produced),
+                                              return_exceptions=True)
+                stale = [uri for uri, found in zip(not_produced, exists)
+                         if uri.rpartition("/")[0] in seen_folders or found is False]
+                for uri in stale:
+                    try:
+                        await asyncio.to_thread(rag.delete_file, name=existing[uri], corpus_name=corpus_name)
+                        self.pruned.setdefault(corpus_name, []).append(uri)
+                    except Exception as e:
+                        print(f"Failed to delete stale RagFile {existing[uri]}: {e}")
+                removed = [uri for uri in self._manifests[corpus_name]["files"] if uri in stale or uri not in existing]
+                await self._save_manifest(corpus_name, removed=removed)
+                if stale:
+                    print(f"Pruned {len(stale)} stale documents from corpus '{corpus_name}'.")
+        return [uri for corpus_name, uris in self.pruned.items() if only_corpus in (None, corpus_name) for uri in uris]
+
+    async def _import_batch(self, corpus_name: str, paths: List[str]) -> None:
+        batch = {"corpus_name": corpus_name, "paths": paths, "status": "RUNNING"}
+        self.batches.append(batch)
+        started = time.perf_counter()
+        try:
+            response = await asyncio.to_thread(rag.import_files, corpus_name=corpus_name, paths=paths)
+            batch["imported_files"] = getattr(response, "imported_rag_files_count", None)
+            batch["failed_files"] = getattr(response, "failed_rag_files_count", None)
+            batch["status"] = "FAILED" if batch["failed_files"] else "SUCCEEDED"
+        except Exception as e:
+            batch["status"] = "FAILED"
+            batch["error"] = str(e)
+        batch["seconds"] = round(time.perf_counter() - started, 2)
+        print(f"Corpus import {batch['status']} for '{corpus_name}': {len(paths)} documents in {batch['seconds']}s"
+              + (f" ({batch['error']})" if batch.get("error") else ""))
+
+    def summary(self, corpus_name: Optional[str] = None) -> dict:
+        """Ingestion totals, of `corpus_name` only if given."""
+        def of_corpus(per_corpus: Dict[str, List]) -> int:
+            return sum(len(items) for corpus, items in per_corpus.items() if corpus_name in (None, corpus))
+
+        batches = [b for b in self.batches if corpus_name in (None, b["corpus_name"])]
+        return {
+            "batches": len(batches),
+            "documents": sum(len(b["paths"]) for b in batches),
+            "failed_batches": sum(1 for b in batches if b["status"] == "FAILED"),
+            "import_seconds": round(sum(b.get("seconds", 0) for b in batches), 2),
+            "unchanged_documents": of_corpus(self.unchanged),
+            "pruned_documents": of_corpus(self.pruned),
+            "pending": of_corpus(self._pending),
+        }
+
+
+corpus_ingestion_queue = CorpusIngestionQueue()
+
+
+async def flush_corpus_ingestion_queue(callback_context: CallbackContext) -> None:
+    """after_agent_callback: import the queued sub agent results and store the ingestion summary in state."""
+    corpus_name = callback_context.state.get("rag_corpus_name")
+    await corpus_ingestion_queue.flush(corpus_name)
+    summary = corpus_ingestion_queue.summary(corpus_name)
+    callback_context.state.update({"rag_ingestion": summary})
+    print(f"RAG corpus ingestion: {summary}")
+    return None
+
+
+async def finalize_corpus_ingestion(callback_context: CallbackContext) -> None:
+    """after_agent_callback of the whole pipeline: import what is left, then prune documents whose source was replaced or removed."""
+    corpus_name = callback_context.state.get("rag_corpus_name")
+    await corpus_ingestion_queue.flush(corpus_name)
+    await corpus_ingestion_queue.prune_stale(corpus_name)
+    summary = corpus_ingestion_queue.summary(corpus_name)
+    callback_context.state.update({"rag_ingestion": summary})
+    print(f"RAG corpus ingestion: {summary}")
+    return None
@@ -1,29 +1,37 @@
 from google.cloud import firestore
 from config import Config
 
-firestore_client = firestore.Client(
-    project=Config.GOOGLE_CLOUD_PROJECT, database=Config.FIRESTORE_DATABASE)
+# async client (lazy init so it binds to the event loop the agents run on)
+_firestore_async_client = None
 
 
-def update_sub_agent_result_to_firestore(collection_name: str, document_id: str, sub_agent_field: str, gcs_uri: str):
+def get_firestore_async_client() -> firestore.AsyncClient:
+    global _firestore_async_client
+    if _firestore_async_client is None:
+        _firestore_async_client = firestore.AsyncClient(
+            project=Config.GOOGLE_CLOUD_PROJECT, database=Config.FIRESTORE_DATABASE)
+    return _firestore_async_client
+
+
+async def update_sub_agent_result_to_firestore(collection_name: str, document_id: str, sub_agent_field: str, gcs_uri: str):
     """
-    Save the given content to a Firestore document.
+    Save a sub agent's result GCS URI under `sub_agents_results.<sub_agent_field>` of a Firestore document.
+
+    Only that nested field is written (dotted field path update), so sub agents finishing concurrently
+    never overwrite each other's URIs and no read of the document is needed. The update fails if the
+    document does not exist.
 
     Args:
+        collection_name (str): The Firestore collection holding the company document.
         document_id (str): The ID of the Firestore document to update.
-        content (dict): The content to save in the document.
+        sub_agent_field (str): The key under `sub_agents_results` to set.
+        gcs_uri (str): The GCS URI of the sub agent result.
     """
     try:
-        curr_content = firestore_client.collection(
-            collection_name).document(document_id).get().to_dict()
-        if not curr_content:
-            raise ValueError(
-                f"Document {document_id} not found in collection {collection_name}.")
-        curr_sub_agents_results = curr_content.get("sub_agents_results", {})
-        curr_sub_agents_results[sub_agent_field] = gcs_uri
-        content = {"sub_agents_results": curr_sub_agents_results}
-        firestore_client.collection(collection_name).document(
-            document_id).update(content)
+        field_path = firestore.AsyncClient.field_path(
+            "sub_agents_results", sub_agent_field)
+        await get_firestore_async_client().collection(collection_name).document(
+            document_id).update({field_path: gcs_uri})
         print(
             f"Successfully saved content to Firestore document {document_id}.")
     except Exception as e:
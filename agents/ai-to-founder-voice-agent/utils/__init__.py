@@ -1,2 +1,2 @@
 from .read_benchmark_framework import read_benchmark_framework_text
-from .text_sanitize import collapse_repeats, remove_control_chars, sanitize_text
\ No newline at end of file
+from startup_eval_tools.text_sanitize import collapse_repeats, remove_control_chars, sanitize_text
\ No newline at end of file
@@ -12,6 +12,8 @@ async def post_agent_execution(callback_context: CallbackContext) -> None:
     company_doc_id = current_state.get("company_doc_id")
     company_name = current_state.get("company_name")
     markdown = current_state.get("current_document")
+    cache_stats = current_state.get("semantic_tool_cache") or {}
+    print(f"Semantic tool cache: {cache_stats.get('hits', 0)} hits, {cache_stats.get('misses', 0)} misses")
     if not markdown:
         return None
     gcs_uri = await save_file_content_to_gcs(bucket_name=GCS_BUCKET_NAME, file_content=markdown,
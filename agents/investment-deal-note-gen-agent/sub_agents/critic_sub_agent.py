@@ -2,7 +2,7 @@ from google.adk.agents import LlmAgent
 from google.genai import types
 from llm_model_config import llm
 from tools import search, extract, retrieve
-from utils import provide_corpus_name_to_retrieval_tool
+from utils import provide_corpus_name_to_retrieval_tool, lookup_semantic_tool_cache, store_semantic_tool_cache
 
 COMPLETION_PHRASE = "No major issues found."
 
@@ -17,9 +17,9 @@ critic_sub_agent = LlmAgent(
     {{current_document}}
     ```
 
-    **Benchmarking framework (for reference):**
+    **Benchmarking framework outline (sections and criteria, for reference):**
     ```
-    {{benchmarking_framework_text}}
+    {{benchmarking_framework_outline}}
     ```
 
     **INPUT DETAILS:**
@@ -35,6 +35,7 @@ critic_sub_agent = LlmAgent(
         search(query="What is the weather in New York?")
         extract(url="https://www.example.com")
         retrieve(query="Relevant information about the startup's market potential")
+        retrieve(query="Founding team background", additional_queries=["Founders' previous exits", "Key hires and advisors"])  # several related queries in one call
     
     **CRITICAL:**
     - YOU MUST USE THE EXACT TOOL NAMES AS PROVIDED ABOVE WHILE MAKING TOOL CALLS. DO NOT INVENT ANY TOOL NAME OF YOUR OWN. YOU MUST DOUBLE CHECK THE TOOL NAME WITH THE ONES PROVIDED ABOVE BEFORE CALLING A TOOL.
@@ -56,6 +57,8 @@ critic_sub_agent = LlmAgent(
     description="Reviews the current draft, providing critique if clear improvements are needed, otherwise signals completion.",
     output_key="criticism",
     generate_content_config=types.GenerateContentConfig(temperature=0),
-    before_tool_callback=provide_corpus_name_to_retrieval_tool,
+    # corpus name is injected first so cached retrievals are keyed on it
+    before_tool_callback=[provide_corpus_name_to_retrieval_tool, lookup_semantic_tool_cache],
+    after_tool_callback=store_semantic_tool_cache,
     tools=[search, extract, retrieve]
 )
\ No newline at end of file
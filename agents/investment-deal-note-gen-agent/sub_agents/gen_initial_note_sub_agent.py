@@ -4,7 +4,7 @@ from datetime import date
 from llm_model_config import llm
 from config import Config
 from tools import extract, retrieve, search
-from utils import provide_corpus_name_to_retrieval_tool, fetch_rag_corpus
+from utils import provide_corpus_name_to_retrieval_tool, lookup_semantic_tool_cache, store_semantic_tool_cache, fetch_rag_corpus
 
 GCP_CLOUD_PROJECT = Config.GCP_CLOUD_PROJECT
 GCP_CLOUD_REGION = Config.GCP_CLOUD_REGION
@@ -34,6 +34,7 @@ gen_initial_note_sub_agent = LlmAgent(
         search(query="What is the weather in New York?")
         extract(url="https://www.example.com")
         retrieve(query="Relevant information about the startup's market potential")
+        retrieve(query="Founding team background", additional_queries=["Founders' previous exits", "Key hires and advisors"])  # several related queries in one call
     
     **CRITICAL:**
     - YOU MUST USE THE EXACT TOOL NAMES AS PROVIDED ABOVE WHILE MAKING TOOL CALLS. DO NOT INVENT ANY TOOL NAME OF YOUR OWN. YOU MUST DOUBLE CHECK THE TOOL NAME WITH THE ONES PROVIDED ABOVE BEFORE CALLING A TOOL.
@@ -62,6 +63,8 @@ gen_initial_note_sub_agent = LlmAgent(
     generate_content_config=types.GenerateContentConfig(temperature=0),
     output_key="current_document",
     before_agent_callback=fetch_rag_corpus,
-    before_tool_callback=provide_corpus_name_to_retrieval_tool,
+    # corpus name is injected first so cached retrievals are keyed on it
+    before_tool_callback=[provide_corpus_name_to_retrieval_tool, lookup_semantic_tool_cache],
+    after_tool_callback=store_semantic_tool_cache,
     tools=[extract, search, retrieve]
 )
\ No newline at end of file
@@ -2,7 +2,7 @@ from google.adk.agents import LlmAgent
 from google.genai import types
 from llm_model_config import llm
 from tools import search, extract, retrieve
-from utils import provide_corpus_name_to_retrieval_tool
+from utils import provide_corpus_name_to_retrieval_tool, lookup_semantic_tool_cache, store_semantic_tool_cache
 
 COMPLETION_PHRASE = "No major issues found."
 
@@ -39,6 +39,7 @@ refiner_sub_agent = LlmAgent(
         search(query="What is the weather in New York?")
         extract(url="https://www.example.com")
         retrieve(query="Relevant information about the startup's market potential")
+        retrieve(query="Founding team background", additional_queries=["Founders' previous exits", "Key hires and advisors"])  # several related queries in one call
     
     **CRITICAL:**
     - YOU MUST USE THE EXACT TOOL NAMES AS PROVIDED ABOVE WHILE MAKING TOOL CALLS. DO NOT INVENT ANY TOOL NAME OF YOUR OWN. YOU MUST DOUBLE CHECK THE TOOL NAME WITH THE ONES PROVIDED ABOVE BEFORE CALLING A TOOL.
@@ -73,5 +74,7 @@ refiner_sub_agent = LlmAgent(
     output_key="current_document", # Overwrites state['current_document'] with refined document
     generate_content_config=types.GenerateContentConfig(temperature=0),
     tools=[search, extract, retrieve],
-    before_tool_callback=provide_corpus_name_to_retrieval_tool,
+    # corpus name is injected first so cached retrievals are keyed on it
+    before_tool_callback=[provide_corpus_name_to_retrieval_tool, lookup_semantic_tool_cache],
+    after_tool_callback=store_semantic_tool_cache,
 )
\ No newline at end of file
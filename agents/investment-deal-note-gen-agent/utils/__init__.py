@@ -1,5 +1,6 @@
-from .text_sanitize import sanitize_text
-from .read_benchmark_framework import read_benchmark_framework_text
+from startup_eval_tools.text_sanitize import sanitize_text
+from .read_benchmark_framework import read_benchmark_framework_text, read_benchmark_framework_sections
 from .provide_corpus_details_tools import provide_corpus_name_to_retrieval_tool
 from .fetch_corpus_details import fetch_rag_corpus
-from .save_file_content_to_gcs import save_file_content_to_gcs
\ No newline at end of file
+from .save_file_content_to_gcs import save_file_content_to_gcs
+from .semantic_tool_cache import lookup_semantic_tool_cache, store_semantic_tool_cache
@@ -0,0 +1,110 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from startup_eval_tools.semantic_cache import SemanticCache
+
+# tool name -> (argument the cache is keyed on, whether similar (not only identical) values share results)
+CACHED_TOOLS = {
+    "retrieve": ("query", True),
+    "search": ("query", True),
+    "extract": ("url", False),
+}
+SEMANTIC_CACHE_STATE_KEY = "semantic_tool_cache"
+# function call ids answered from the cache (their responses must not be stored again); the "temp:"
+# prefix keeps the key in the session state for the current invocation only
+SERVED_FROM_CACHE_STATE_KEY = "temp:semantic_tool_cache_served"
+# most recent lookups kept in the trace of the state summary
+MAX_TRACE_ENTRIES = 20
+# most sessions whose cache is kept in memory (least recently used dropped first)
+MAX_CACHED_SESSIONS = 32
+
+_session_caches: "OrderedDict[str, SemanticCache]" = OrderedDict()
+
+
+def _session_id(tool_context: ToolContext) -> str:
+    session = getattr(tool_context, "session", None) or getattr(
+        getattr(tool_context, "_invocation_context", None), "session", None)
+    return getattr(session, "id", None) or tool_context.invocation_id
+
+
+def _session_cache(tool_context: ToolContext) -> SemanticCache:
+    session_id = _session_id(tool_context)
+    cache = _session_caches.get(session_id)
+    if cache is None:
+        cache = _session_caches[session_id] = SemanticCache()
+        while len(_session_caches) > MAX_CACHED_SESSIONS:
+            _session_caches.popitem(last=False)
+    _session_caches.move_to_end(session_id)
+    return cache
+
+
+def _namespace(tool_name: str, args: Dict[str, Any], key_arg: str) -> str:
+    """Tool name plus every other argument, which has to match exactly (e.g. the corpus name)."""
+    return "|".join([tool_name] + [f"{k}={args[k]}" for k in sorted(args) if k != key_arg])
+
+
+def _cacheable(tool_response: Any) -> bool:
+    if isinstance(tool_response, str):
+        return bool(tool_response) and not tool_response.startswith("No matching result found")
+    if isinstance(tool_response, dict):
+        if tool_response.get("status") in ("error", "failed"):
+            return False
+        return not ("results" in tool_response and not tool_response["results"])
+    return False
+
+
+def _record_trace(tool_context: ToolContext, cache: SemanticCache, tool_name: str, query: str, match) -> None:
+    trace_entry = {"agent": tool_context.agent_name, "tool": tool_name, "query": query, "hit": match is not None}
+    if match is not None:
+        trace_entry.update({"cached_query": match[1], "similarity": match[2]})
+    summary = dict(tool_context.state.get(SEMANTIC_CACHE_STATE_KEY) or {})
+    summary.update(cache.stats())
+    summary["trace"] = (list(summary.get("trace") or []) + [trace_entry])[-MAX_TRACE_ENTRIES:]
+    tool_context.state[SEMANTIC_CACHE_STATE_KEY] = summary
+
+
+async def lookup_semantic_tool_cache(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext) -> Optional[Dict]:
+    """
+    before_tool_callback: answer `retrieve` / `search` / `extract` from the session's semantic cache.
+
+    Returns the cached response when an earlier call of the same tool (same other arguments) in this
+    session used an identical or, for queries, a semantically similar value; the response then names
+    the earlier query in `cached_from_query` so the model knows it already has this information.
+    Returns None (run the tool) otherwise. Must run after the callback that injects `corpus_name`.
+    """
+    spec = CACHED_TOOLS.get(tool.name)
+    if not spec or not args.get(spec[0]):
+        return None
+    key_arg, semantic = spec
+    cache = _session_cache(tool_context)
+    query = str(args[key_arg])
+    match = await asyncio.to_thread(cache.lookup, _namespace(tool.name, args, key_arg), query, semantic)
+    _record_trace(tool_context, cache, tool.name, query, match)
+    if match is None:
+        return None
+    result, cached_query, _ = match
+    served = tool_context.state.get(SERVED_FROM_CACHE_STATE_KEY) or []
+    tool_context.state[SERVED_FROM_CACHE_STATE_KEY] = served + [tool_context.function_call_id]
+    response = dict(result) if isinstance(result, dict) else {"result": result}
+    if cached_query != query:
+        response["cached_from_query"] = cached_query
+    return response
+
+
+async def store_semantic_tool_cache(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext,
+                                    tool_response: Any) -> Optional[Dict]:
+    """after_tool_callback: remember successful `retrieve` / `search` / `extract` results for this session."""
+    spec = CACHED_TOOLS.get(tool.name)
+    if not spec or not args.get(spec[0]):
+        return None
+    served = tool_context.state.get(SERVED_FROM_CACHE_STATE_KEY) or []
+    if tool_context.function_call_id in served:
+        tool_context.state[SERVED_FROM_CACHE_STATE_KEY] = [i for i in served if i != tool_context.function_call_id]
+        return None
+    if _cacheable(tool_response):
+        key_arg, semantic = spec
+        await asyncio.to_thread(_session_cache(tool_context).store, _namespace(tool.name, args, key_arg),
+                                str(args[key_arg]), tool_response, semantic)
+    return None
@@ -2,15 +2,11 @@ from google.adk.agents.llm_agent import LlmAgent
 from google.adk.tools.tool_context import ToolContext
 from typing import Optional, Dict, Any
 from google.adk.tools.base_tool import BaseTool
-from google import auth
-import vertexai
-from vertexai.preview import rag
-from google.adk.agents.callback_context import CallbackContext
 from llm_model_config import llm
 from google.genai import types
 from config import Config
 from tools import extract, retrieve, search
-from utils import read_benchmark_framework_text
+from utils import read_benchmark_framework_sections, fetch_rag_corpus
 
 GCP_CLOUD_PROJECT = Config.GCP_CLOUD_PROJECT
 GCP_CLOUD_REGION = Config.GCP_CLOUD_REGION
@@ -19,55 +15,8 @@ FIRESTORE_DATABASE = Config.FIRESTORE_DATABASE
 AGENT_MODEL = Config.AGENT_MODEL
 SUB_AGENTS_RAG_CORPUS_PREFIX = Config.SUB_AGENTS_RAG_CORPUS_PREFIX
 
-benchmarking_framework_text = read_benchmark_framework_text()
-
-def initialize_vertex_ai():
-    """
-    Initializes the Vertex AI SDK and Firestore client with the project configuration.
-    
-    Sets up the global firestore_client and authenticates using default credentials.
-    """
-    # global firestore_client
-    credentials, _ = auth.default(
-        scopes=["https://www.googleapis.com/auth/cloud-platform"])
-    vertexai.init(
-        project=Config.GCP_CLOUD_PROJECT,
-        location=Config.GCP_CLOUD_REGION,
-        credentials=credentials
-    )
-
-
-async def fetch_rag_corpus(callback_context: CallbackContext) -> None:
-    """Prepares the RAG corpus for the sub-agents."""
-    initialize_vertex_ai()
-
-    # Retrieve the company document ID from the callback context state
-    current_state = callback_context.state.to_dict()
-    company_doc_id = current_state.get("company_doc_id")
-
-    # Validate that company_doc_id is present
-    if not company_doc_id:
-        raise ValueError(
-            "company_doc_id is missing in the callback context state.")
-
-    # Construct the expected corpus display name
-    corpus_display_name = f"{SUB_AGENTS_RAG_CORPUS_PREFIX}_{company_doc_id}"
-
-    # Check if the corpus already exists in Vertex AI
-    existing_corpora = rag.list_corpora()
-    for existing_corpus in existing_corpora:
-        if existing_corpus.display_name == corpus_display_name:
-            print(f"Corpus '{corpus_display_name}' already exists.")
-            # Update state with corpus details for downstream tools
-            callback_context.state.update({
-                **callback_context.state.to_dict(),
-                "rag_corpus_display_name": existing_corpus.display_name,
-                "rag_corpus_name": existing_corpus.name
-            })
-            return None
-
-    # If corpus is not found, raise an error (creation is handled elsewhere)
-    raise RuntimeError(f"Corpus '{corpus_display_name}' does not exist.")
+# only the scoring guidelines and the four dimensions investors can re-weight
+benchmarking_framework_text = read_benchmark_framework_sections("scoring", "team", "market", "product", "financials")
 
 
 async def before_tool_callback(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext) -> Optional[Dict]:
@@ -157,6 +106,7 @@ root_agent = LlmAgent(
         search(query="What is the weather in New York?") 
         extract(url="https://www.example.com")
         retrieve(query="Relevant information about the startup's market potential")
+        retrieve(query="Founding team background", additional_queries=["Founders' previous exits", "Key hires and advisors"])  # several related queries in one call
     
     CRITICAL:
     - YOU MUST USE THE EXACT TOOL NAMES AS PROVIDED ABOVE WHILE MAKING TOOL CALLS. DO NOT INVENT ANY TOOL NAME OF YOUR OWN. YOU MUST DOUBLE CHECK THE TOOL NAME WITH THE ONES PROVIDED ABOVE BEFORE CALLING A TOOL.
@@ -1,3 +1,7 @@
+import subprocess
+import sys
+from pathlib import Path
+
 import vertexai
 from vertexai import agent_engines
 from agent import root_agent
@@ -8,55 +12,78 @@ PROJECT_ID = Config.GCP_CLOUD_PROJECT
 # For other options, see https://cloud.google.com/vertex-ai/generative-ai/docs/agent-engine/overview#supported-regions
 LOCATION = Config.GCP_CLOUD_REGION
 STAGING_BUCKET = Config.DEPLOYMENT_STAGING_BUCKET
+SHARED_TOOLS_DIR = Path(__file__).resolve().parents[2] / "packages" / "startup_eval_tools"
+SHARED_TOOLS_WHEEL_DIR = Path("dist")
+
+
+def build_shared_tools() -> str:
+    """Builds the shared tools wheel and the pre-parsed Benchmarking Framework; returns the wheel path."""
+    # Agent Engine installs the wheel from the uploaded extra packages
+    subprocess.run([sys.executable, "-m", "pip", "wheel", "--no-deps", "-w", str(SHARED_TOOLS_WHEEL_DIR),
+                    str(SHARED_TOOLS_DIR)], check=True)
+    wheels = sorted(SHARED_TOOLS_WHEEL_DIR.glob("startup_eval_tools-*.whl"), key=lambda p: p.stat().st_mtime)
+    if not wheels:
+        raise FileNotFoundError(f"pip wheel did not build startup_eval_tools into {SHARED_TOOLS_WHEEL_DIR.resolve()}")
+    # Ship the pre-parsed Benchmarking Framework with the assets so the deployed agent never parses the PDF
+    subprocess.run([sys.executable, "-m", "startup_eval_tools.benchmark_framework", "assets/Benchmarking_Framework.pdf"], check=True)
+    return wheels[-1].as_posix()
+
+
+def deploy(shared_tools_wheel: str):
+    """Creates the Agent Engine app; `shared_tools_wheel` is the path returned by build_shared_tools."""
+    if not Path(shared_tools_wheel).is_file():
+        raise FileNotFoundError(f"Shared tools wheel {shared_tools_wheel} does not exist; run build_shared_tools first")
+
+    # Initialize the Vertex AI SDK
+    vertexai.init(
+        project=PROJECT_ID,
+        location=LOCATION,
+        staging_bucket=f"gs://{STAGING_BUCKET}",
+    )
+
+    app = agent_engines.AdkApp(
+        agent=root_agent,
+        enable_tracing=True,
+    )
 
-# Initialize the Vertex AI SDK
-vertexai.init(
-    project=PROJECT_ID,
-    location=LOCATION,
-    staging_bucket=f"gs://{STAGING_BUCKET}",
-)
+    remote_app = agent_engines.create(
+        agent_engine=app,
+        requirements=[
+            "google-cloud-aiplatform[adk,agent_engines]",
+            "google-adk",
+            "google-cloud-storage",
+            "google-cloud-firestore",
+            "google-cloud-secret-manager",
+            "google-genai",
+            "python-dotenv",
+            "google-auth",
+            "requests",
+            f"{shared_tools_wheel}[web,search,framework,rag]",
+            "fastapi",
+            "uvicorn[standard]"
+        ],
+        extra_packages=["assets", "tools", "llm_model_config", "agent", "utils", "config", shared_tools_wheel],
+        display_name="weightage-adjust-gen-ai-recom-agent",
+        description="An agent that accepts investor weightage adjustments and generates updated startup recommendations based on Gen AI analysis.",
+        env_vars={
+            "GCS_BUCKET_NAME": Config.GCS_BUCKET_NAME,
+            "GCP_CLOUD_PROJECT": Config.GCP_CLOUD_PROJECT,
+            "GCP_CLOUD_REGION": Config.GCP_CLOUD_REGION,
+            "AGENT_MODEL": Config.AGENT_MODEL,
+            "GCP_PITCH_DECK_OUTPUT_FOLDER": Config.GCP_PITCH_DECK_OUTPUT_FOLDER,
+            "GOOGLE_GENAI_USE_VERTEXAI": "TRUE",
+            "TAVILY_API_KEY": Config.TAVILY_API_KEY,
+            "SUB_AGENTS_RAG_CORPUS_PREFIX": Config.SUB_AGENTS_RAG_CORPUS_PREFIX,
+            "COMPANY_COLLECTION_NAME": Config.COMPANY_COLLECTION_NAME,
+            "FIRESTORE_DATABASE": Config.FIRESTORE_DATABASE,
+            "DEPLOYMENT_STAGING_BUCKET": Config.DEPLOYMENT_STAGING_BUCKET,
+        },
+    )
+    return remote_app
 
-app = agent_engines.AdkApp(
-    agent=root_agent,
-    enable_tracing=True,
-)
 
-remote_app = agent_engines.create(
-    agent_engine=app,
-    requirements=[
-        "google-cloud-aiplatform[adk,agent_engines]",
-        "google-adk",
-        "google-cloud-storage",
-        "google-cloud-firestore",
-        "google-cloud-secret-manager",
-        "google-genai",
-        "python-dotenv",
-        "google-auth",
-        "requests",
-        "beautifulsoup4",
-        "tavily-python",
-        "aiohttp",
-        "fastapi",
-        "PyMuPDF",
-        "uvicorn[standard]"
-    ],
-    extra_packages=["assets", "tools", "llm_model_config", "agent", "utils", "config"],
-    display_name="weightage-adjust-gen-ai-recom-agent",
-    description="An agent that accepts investor weightage adjustments and generates updated startup recommendations based on Gen AI analysis.",
-    env_vars={
-        "GCS_BUCKET_NAME": Config.GCS_BUCKET_NAME,
-        "GCP_CLOUD_PROJECT": Config.GCP_CLOUD_PROJECT,
-        "GCP_CLOUD_REGION": Config.GCP_CLOUD_REGION,
-        "AGENT_MODEL": Config.AGENT_MODEL,
-        "GCP_PITCH_DECK_OUTPUT_FOLDER": Config.GCP_PITCH_DECK_OUTPUT_FOLDER,
-        "GOOGLE_GENAI_USE_VERTEXAI": "TRUE",
-        "TAVILY_API_KEY": Config.TAVILY_API_KEY,
-        "SUB_AGENTS_RAG_CORPUS_PREFIX": Config.SUB_AGENTS_RAG_CORPUS_PREFIX,
-        "COMPANY_COLLECTION_NAME": Config.COMPANY_COLLECTION_NAME,
-        "FIRESTORE_DATABASE": Config.FIRESTORE_DATABASE,
-        "DEPLOYMENT_STAGING_BUCKET": Config.DEPLOYMENT_STAGING_BUCKET,
-    },
-)
+if __name__ == "__main__":
+    remote_app = deploy(build_shared_tools())
 
 # Replace <RESOURCE_NAME> with your deployed agent resource name
 # remote_app = agent_engines.get("<RESOURCE_NAME>")
@@ -1,28 +1,31 @@
-from vertexai import rag
+from typing import List, Optional
+from startup_eval_tools.rag_retrieval import aretrieve_contexts
 
 
-async def retrieve(query: str, corpus_name: str, top_k: int = 10, vector_distance_threshold: float = 0.6) -> str:
+async def retrieve(query: str, corpus_name: str, top_k: int = 10, vector_distance_threshold: float = 0.6,
+                   additional_queries: Optional[List[str]] = None) -> str:
     """Retrieves relevant contexts from the RAG corpus based on the query.
-    
+
+    Served by the backend selected with RAG_RETRIEVAL_BACKEND: the managed corpus ("auto", falling
+    back to a local vector index of the corpus files when a query fails), the managed corpus only
+    ("vertex") or the local index only ("local").
+    Retrieval runs off the event loop; several queries run concurrently and their contexts are
+    merged without duplicates.
+
     Args:
         query (str): The input query string.
         corpus_name (str): The name of the RAG corpus to search.
         top_k (int): The number of top relevant contexts to retrieve. Defaults to 10.
         vector_distance_threshold (float): The threshold for vector distance to filter results. Defaults to 0.6.
+        additional_queries (List[str], optional): Further queries (e.g. other aspects of the same topic) answered in the same call.
 
     Returns:
         List[str]: The retrieved contexts as a list of strings.
     """
     print("Corpus Name:", corpus_name)
-    response = rag.retrieval_query(
-        text=query,
-        rag_resources=[
-            rag.RagResource(rag_corpus=corpus_name)
-        ],
-        rag_retrieval_config=rag.RagRetrievalConfig(top_k=top_k, filter=rag.Filter(
-            vector_distance_threshold=vector_distance_threshold)),
-    )
+    contexts = await aretrieve_contexts([query, *(additional_queries or [])], corpus_name=corpus_name,
+                                        top_k=top_k, vector_distance_threshold=vector_distance_threshold)
 
-    if not response.contexts.contexts:
+    if not contexts:
         return f'No matching result found with the query: {query}'
-    return "\n\n".join([context.text for context in response.contexts.contexts])
+    return "\n\n".join(contexts)
@@ -1,2 +1,3 @@
-from .text_sanitize import sanitize_text
-from .read_benchmark_framework import read_benchmark_framework_text
\ No newline at end of file
+from startup_eval_tools.text_sanitize import sanitize_text
+from .read_benchmark_framework import read_benchmark_framework_text, read_benchmark_framework_sections
+from .fetch_corpus_details import fetch_rag_corpus
@@ -0,0 +1,25 @@
+from google.adk.agents.callback_context import CallbackContext
+from startup_eval_tools.rag_corpus import RagCorpusResolver
+from config import Config
+
+rag_corpus_resolver = RagCorpusResolver(
+    project=Config.GCP_CLOUD_PROJECT,
+    location=Config.GCP_CLOUD_REGION,
+    database=Config.FIRESTORE_DATABASE,
+    collection=Config.COMPANY_COLLECTION_NAME,
+    corpus_prefix=Config.SUB_AGENTS_RAG_CORPUS_PREFIX,
+)
+
+
+async def fetch_rag_corpus(callback_context: CallbackContext) -> None:
+    """Prepares the RAG corpus for the sub-agents."""
+    company_doc_id = callback_context.state.get("company_doc_id")
+
+    # Validate that company_doc_id is present
+    if not company_doc_id:
+        raise ValueError(
+            "company_doc_id is missing in the callback context state.")
+
+    # Update state with corpus details for downstream tools (only the keys written here)
+    callback_context.state.update(await rag_corpus_resolver.corpus_state(company_doc_id))
+    return None
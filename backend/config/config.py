@@ -35,6 +35,10 @@ class Config:
     FIRESTORE_DATABASE = os.getenv("FIRESTORE_DATABASE", "startupevaluator")
     EXTRACT_BENCHMARK_CLOUD_RUN_JOB_NAME = os.getenv(
         "EXTRACT_BENCHMARK_CLOUD_RUN_JOB_NAME", "extract-benchmark-pitch-agent-job")
+    # "job": one Cloud Run job execution per company; "queue": enqueue for the job's worker mode
+    EXTRACT_BENCHMARK_DISPATCH_MODE = os.getenv("EXTRACT_BENCHMARK_DISPATCH_MODE", "job")
+    EXTRACT_BENCHMARK_QUEUE_COLLECTION = os.getenv(
+        "EXTRACT_BENCHMARK_QUEUE_COLLECTION", "extract_benchmark_job_queue")
     FIRESTORE_COMPANY_COLLECTION = os.getenv(
         "FIRESTORE_COMPANY_COLLECTION", "companies_applied")
     DEPLOYED_FRONTEND_URL = os.getenv("DEPLOYED_FRONTEND_URL")
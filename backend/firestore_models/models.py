@@ -60,5 +60,6 @@ class CompanyDoc(BaseModel):
     benchmark_agent_job_status: Optional[str] = None
     benchmark_agent_job_name: Optional[str] = None
     sub_agents_results: Optional[SubAgentsResultsDoc] = None
+    rag_corpus_name: Optional[str] = None
 
 
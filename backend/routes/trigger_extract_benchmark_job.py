@@ -1,6 +1,6 @@
 import logging
 from config import Config
-from google.cloud import run_v2
+from google.cloud import firestore, run_v2
 from google.cloud.run_v2.types import RunJobRequest
 
 LOG = logging.getLogger(__name__)
@@ -8,6 +8,30 @@ LOG = logging.getLogger(__name__)
 GOOGLE_CLOUD_PROJECT = Config.GOOGLE_CLOUD_PROJECT
 GOOGLE_CLOUD_REGION = Config.GOOGLE_CLOUD_REGION
 EXTRACT_BENCHMARK_CLOUD_RUN_JOB_NAME = Config.EXTRACT_BENCHMARK_CLOUD_RUN_JOB_NAME
+EXTRACT_BENCHMARK_DISPATCH_MODE = Config.EXTRACT_BENCHMARK_DISPATCH_MODE
+EXTRACT_BENCHMARK_QUEUE_COLLECTION = Config.EXTRACT_BENCHMARK_QUEUE_COLLECTION
+
+
+def enqueue_benchmark_job(firestore_doc_id: str, input_deck_filename: str, file_extension: str, founder_id: str, company_websites: list):
+    """
+    Queues the company for the worker mode of the job (JOB_MODE=worker), which claims queued
+    companies and processes several of them concurrently.
+    returns: the queue document reference (its id is the company document id).
+    """
+    firestore_client = firestore.Client(project=GOOGLE_CLOUD_PROJECT, database=Config.FIRESTORE_DATABASE)
+    queue_doc_ref = firestore_client.collection(EXTRACT_BENCHMARK_QUEUE_COLLECTION).document(firestore_doc_id)
+    queue_doc_ref.set({
+        "firestore_doc_id": firestore_doc_id,
+        "input_deck_filename": input_deck_filename,
+        "file_extension": file_extension,
+        "founder_id": founder_id,
+        "company_websites": company_websites,
+        "status": "PENDING",
+        "enqueued_at": firestore.SERVER_TIMESTAMP,
+    })
+    LOG.info("Queued company %s in %s", firestore_doc_id, EXTRACT_BENCHMARK_QUEUE_COLLECTION)
+    return queue_doc_ref
+
 
 def trigger_job_with_filename(firestore_doc_id: str, input_deck_filename: str, file_extension: str, founder_id: str, company_websites: list, tasks: int = 1, wait_for_completion: bool = False):
     """
@@ -15,6 +39,9 @@ def trigger_job_with_filename(firestore_doc_id: str, input_deck_filename: str, f
     returns: Operation (google.api_core.operation.Operation) if not waiting,
              or the job execution response if wait_for_completion True.
     """
+    if EXTRACT_BENCHMARK_DISPATCH_MODE == "queue":
+        return enqueue_benchmark_job(firestore_doc_id=firestore_doc_id, input_deck_filename=input_deck_filename, file_extension=file_extension, founder_id=founder_id, company_websites=company_websites)
+
     if not GOOGLE_CLOUD_PROJECT or not GOOGLE_CLOUD_REGION or not EXTRACT_BENCHMARK_CLOUD_RUN_JOB_NAME:
         raise RuntimeError("PROJECT/LOCATION/JOB_NAME env vars must be set")
 
@@ -0,0 +1,73 @@
+"""
+    Per-agent prompt size of the Benchmarking Framework: full text vs the selected sections.
+
+    Finds every `read_benchmark_framework_sections(...)` call in the apps of this repository
+    (apps are the directories with a utils/read_benchmark_framework.py), resolves the sections
+    it selects, and attributes the result to each agent whose instruction references the
+    variable or state key it is stored in. Tokens are estimated at 4 characters per token.
+
+    Usage:
+        python benchmarks/bench_framework_sections.py
+"""
+import ast
+import re
+import sys
+from pathlib import Path
+
+# run against the package source next to this script (works without installing it)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from startup_eval_tools.benchmark_framework import (  # noqa: E402
+    read_benchmark_framework_text, select_framework_sections)
+from startup_eval_tools.near_dedup import estimate_tokens  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+SELECTOR = "read_benchmark_framework_sections"
+
+
+def _selections(source: str):
+    """(target name, sections, outline) for every selector call assigned to a variable or a dict key."""
+    found = []
+    for node in ast.walk(ast.parse(source)):
+        pairs = []
+        if isinstance(node, ast.Assign):
+            pairs = [(t.id, node.value) for t in node.targets if isinstance(t, ast.Name)]
+        elif isinstance(node, ast.Dict):
+            pairs = [(k.value, v) for k, v in zip(node.keys, node.values) if isinstance(k, ast.Constant)]
+        for target, value in pairs:
+            if isinstance(value, ast.Call) and getattr(value.func, "id", None) == SELECTOR:
+                sections = tuple(a.value for a in value.args if isinstance(a, ast.Constant))
+                outline = any(k.arg == "outline" and getattr(k.value, "value", False) for k in value.keywords)
+                found.append((target, sections, outline))
+    return found
+
+
+def main():
+    rows = []
+    for helper in sorted(REPO_ROOT.glob("*/*/utils/read_benchmark_framework.py")):
+        app = helper.parents[1]
+        full_text = read_benchmark_framework_text(search_from=app)
+        if not full_text:
+            continue
+        sources = {p: p.read_text(encoding="utf-8") for p in app.rglob("*.py")
+                   if p != helper and "venv" not in p.parts}
+        for path, source in sources.items():
+            for target, sections, outline in _selections(source):
+                selected = select_framework_sections(full_text, sections or None, outline=outline)
+                reference = re.compile(r"\{+" + re.escape(target) + r"\}+")
+                for consumer, consumer_source in sources.items():
+                    if reference.search(consumer_source):
+                        rows.append((app.name, consumer.stem, target, estimate_tokens(full_text),
+                                     estimate_tokens(selected)))
+    if not rows:
+        print("no framework selections found")
+        return
+    print(f"{'app':<40} {'agent':<30} {'framework input':<30} {'full':>6} {'now':>6} {'saved':>6}")
+    for app, agent, target, full, now in rows:
+        print(f"{app:<40} {agent:<30} {target:<30} {full:>6} {now:>6} {1 - now / full:>6.0%}")
+    total_full = sum(r[3] for r in rows)
+    total_now = sum(r[4] for r in rows)
+    print(f"{'total per prompt':<102} {total_full:>6} {total_now:>6} {1 - total_now / total_full:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
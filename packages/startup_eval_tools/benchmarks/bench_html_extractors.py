@@ -0,0 +1,89 @@
+"""
+    Microbenchmark for the HTML extractor backends used by the `extract` tool.
+
+    Runs every backend over a directory of saved pages (*.html / *.htm, e.g. captured with
+    `curl -L <url> -o page.html`) and reports pages/sec plus output parity against the
+    reference "bs4" backend (exact title/content/paywall matches and mean content similarity).
+
+    Usage:
+        python benchmarks/bench_html_extractors.py --corpus ./saved_pages --repeat 5
+"""
+import argparse
+import difflib
+import sys
+import time
+from pathlib import Path
+
+# run against the package source next to this script (works without installing it)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from startup_eval_tools.html_extractors import EXTRACTOR_BACKENDS, LXML_AVAILABLE  # noqa: E402
+
+REFERENCE_BACKEND = "bs4"
+
+
+def _load_corpus(corpus_dir: Path) -> list:
+    pages = []
+    for path in sorted(corpus_dir.rglob("*")):
+        if path.suffix.lower() in {".html", ".htm"} and path.is_file():
+            raw = path.read_bytes()
+            # same decoding the fetcher applies
+            pages.append((path.name, raw.decode("utf-8", errors="ignore")))
+    return pages
+
+
+def _time_backend(extractor, pages: list, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, html in pages:
+            extractor(html)
+    elapsed = time.perf_counter() - start
+    return (len(pages) * repeat) / elapsed if elapsed else float("inf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", required=True, type=Path,
+                        help="Directory containing saved *.html pages")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Number of passes over the corpus per backend")
+    parser.add_argument("--show-diffs", action="store_true",
+                        help="Print the pages whose output differs from the reference backend")
+    args = parser.parse_args()
+
+    pages = _load_corpus(args.corpus)
+    if not pages:
+        sys.exit(f"No *.html pages found under {args.corpus}")
+    total_mb = sum(len(html) for _, html in pages) / 1e6
+    print(f"Corpus: {len(pages)} pages, {total_mb:.2f} MB of decoded HTML, repeat={args.repeat}")
+
+    backends = {name: fn for name, fn in EXTRACTOR_BACKENDS.items()
+                if name != "lxml" or LXML_AVAILABLE}
+    reference = {name: EXTRACTOR_BACKENDS[REFERENCE_BACKEND](html) for name, html in pages}
+
+    print(f"{'backend':<8} {'pages/sec':>10} {'title':>7} {'content':>8} {'paywall':>8} {'similarity':>11}")
+    for backend, extractor in backends.items():
+        pages_per_sec = _time_backend(extractor, pages, args.repeat)
+        same_title = same_content = same_paywall = 0
+        similarity = 0.0
+        diffs = []
+        for name, html in pages:
+            out, ref = extractor(html), reference[name]
+            same_title += out["title"].strip() == (ref["title"] or "").strip()
+            same_content += out["content"] == ref["content"]
+            same_paywall += out["paywall"] == ref["paywall"]
+            ratio = difflib.SequenceMatcher(None, out["content"], ref["content"]).ratio() \
+                if out["content"] != ref["content"] else 1.0
+            similarity += ratio
+            if ratio < 1.0 or out["title"].strip() != (ref["title"] or "").strip():
+                diffs.append((name, ratio))
+        n = len(pages)
+        print(f"{backend:<8} {pages_per_sec:>10.1f} {same_title / n:>7.1%} {same_content / n:>8.1%} "
+              f"{same_paywall / n:>8.1%} {similarity / n:>11.3f}")
+        if args.show_diffs and diffs:
+            for name, ratio in diffs:
+                print(f"    differs: {name} (content similarity {ratio:.3f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+    Recall@k and latency of the local retrieval index (startup_eval_tools.rag_retrieval).
+
+    Live mode (--corpus-name): builds the local index from the files of a managed corpus and runs
+    every query against both backends. A managed context counts as recalled when one of the local
+    top-k chunks contains at least --match-containment of its word 5-shingles (chunk boundaries
+    differ between the two indexes). Reports recall@k, index build time (cold and from the
+    embedding cache) and per-query latency of both backends.
+
+    Offline mode (--docs): indexes local files with a deterministic hashing embedder, so build and
+    query latency can be measured without GCP access (recall needs the managed corpus).
+
+    Usage:
+        python benchmarks/bench_rag_retrieval.py --project my-project --location europe-west4 \\
+            --corpus-name projects/.../ragCorpora/123 --queries queries.txt --top-k 10
+        python benchmarks/bench_rag_retrieval.py --docs ./sub_agent_results --queries queries.txt
+"""
+import argparse
+import hashlib
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# run against the package source next to this script (works without installing it)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from startup_eval_tools.rag_retrieval import (  # noqa: E402
+    EmbeddingCache, LocalIndexBackend, VertexRagBackend)
+
+DEFAULT_QUERIES = [
+    "founding team experience and background",
+    "total addressable market size and growth rate",
+    "revenue model and pricing",
+    "funding raised and current valuation",
+    "main competitors and differentiation",
+    "customer traction and monthly active users",
+    "strategic partnerships",
+    "industry trends affecting the startup",
+    "burn rate and runway",
+    "product development stage and roadmap",
+]
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _shingles(text: str, size: int = 5) -> set:
+    words = _WORD_RE.findall(text.lower())
+    return {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+
+
+def recalled(reference: str, candidates: list, min_containment: float) -> bool:
+    ref = _shingles(reference)
+    if not ref:
+        return True
+    return any(len(ref & _shingles(c)) / len(ref) >= min_containment for c in candidates)
+
+
+def hashing_embed(texts, task_type, dims: int = 256):
+    """Feature-hashed bag of words (offline stand-in for the embedding model)."""
+    vectors = []
+    for text in texts:
+        vector = [0.0] * dims
+        for word in _WORD_RE.findall(text.lower()):
+            h = int.from_bytes(hashlib.md5(word.encode()).digest()[:4], "little")
+            vector[h % dims] += 1.0 if h & 1 else -1.0
+        vectors.append(vector)
+    return vectors
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.2f} ms"
+
+
+def timed_queries(backend, queries, corpus_name, top_k, threshold):
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(backend.retrieve(query, corpus_name, top_k, threshold))
+        latencies.append(time.perf_counter() - started)
+    return results, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus-name", help="managed corpus resource name (live mode)")
+    parser.add_argument("--project")
+    parser.add_argument("--location", default="europe-west4")
+    parser.add_argument("--docs", type=Path, help="directory of *.json / *.md / *.txt files (offline mode)")
+    parser.add_argument("--queries", type=Path, help="file with one query per line")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--match-containment", type=float, default=0.5)
+    parser.add_argument("--cache", default=None, help="embedding cache path (default: a fresh temp file)")
+    args = parser.parse_args()
+    if not args.corpus_name and not args.docs:
+        parser.error("pass --corpus-name (live) or --docs (offline)")
+
+    queries = [q.strip() for q in args.queries.read_text().splitlines() if q.strip()] if args.queries \
+        else DEFAULT_QUERIES
+    cache_path = args.cache or tempfile.NamedTemporaryFile(suffix=".sqlite3", delete=False).name
+
+    if args.corpus_name:
+        import vertexai
+        vertexai.init(project=args.project, location=args.location)
+        corpus_name, embed_fn, loader = args.corpus_name, None, None
+        threshold = args.threshold
+    else:
+        documents = [p.read_text(errors="ignore") for p in sorted(args.docs.rglob("*"))
+                     if p.is_file() and p.suffix.lower() in {".json", ".md", ".txt"}]
+        corpus_name, embed_fn, loader = "offline", hashing_embed, (lambda _name: documents)
+        threshold = None  # hashing embeddings have no meaningful distance scale
+
+    kwargs = {"cache": EmbeddingCache(cache_path)}
+    if embed_fn:
+        kwargs["embed_fn"] = embed_fn
+    if loader:
+        kwargs["document_loader"] = loader
+    local = LocalIndexBackend(**kwargs)
+
+    started = time.perf_counter()
+    index = local.index_for(corpus_name)
+    cold_build = time.perf_counter() - started
+    local._indexes.clear()
+    started = time.perf_counter()
+    local.index_for(corpus_name)
+    cached_build = time.perf_counter() - started
+    print(f"index: {len(index)} chunks | build cold {_ms(cold_build)} | build from cache {_ms(cached_build)}")
+
+    _, first_latencies = timed_queries(local, queries, corpus_name, args.top_k, threshold)
+    local_results, warm_latencies = timed_queries(local, queries, corpus_name, args.top_k, threshold)
+    print(f"local  query: first median {_ms(statistics.median(first_latencies))} | "
+          f"repeated median {_ms(statistics.median(warm_latencies))} | max {_ms(max(warm_latencies))}")
+
+    if not args.corpus_name:
+        return
+    managed_results, managed_latencies = timed_queries(VertexRagBackend(), queries, corpus_name, args.top_k,
+                                                       args.threshold)
+    print(f"vertex query: median {_ms(statistics.median(managed_latencies))} | max {_ms(max(managed_latencies))}")
+
+    recalls = []
+    for query, managed, local_chunks in zip(queries, managed_results, local_results):
+        if not managed:
+            continue
+        hits = sum(recalled(context, local_chunks, args.match_containment) for context in managed)
+        recalls.append(hits / len(managed))
+        print(f"  recall@{args.top_k} {hits}/{len(managed)}  {query}")
+    if recalls:
+        print(f"mean recall@{args.top_k}: {statistics.mean(recalls):.3f} over {len(recalls)} queries")
+
+
+if __name__ == "__main__":
+    main()
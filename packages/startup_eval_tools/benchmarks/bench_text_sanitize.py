@@ -0,0 +1,102 @@
+"""
+    Throughput benchmark for startup_eval_tools.text_sanitize.sanitize_text against the previous implementation.
+
+    Loads scraped text (every *.html / *.htm / *.txt file under --corpus, split into
+    snippet-sized pieces the way search results and extracts are sanitized), checks that
+    both implementations produce identical output (plus a randomized unicode fuzz set)
+    and reports MB/s for each.
+
+    Usage:
+        python benchmarks/bench_text_sanitize.py --corpus ./saved_pages --chunk-size 4000
+"""
+import argparse
+import random
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+# run against the package source next to this script (works without installing it)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from startup_eval_tools.text_sanitize import sanitize_text  # noqa: E402
+
+
+# ---- previous implementation (reference for parity and "before" numbers) ----
+_LEGACY_PRINTABLE_ASCII_RE = re.compile(r'[^\x20-\x7E]+')
+_LEGACY_REPEAT_CHARS_RE = re.compile(r'(\w)\1{3,}')
+_LEGACY_REPEAT_ANY_RE = re.compile(r'(.)\1{10,}')
+
+
+def legacy_sanitize_text(s: str, max_len: int = 1200) -> str:
+    if not s:
+        return ""
+    s = ''.join(ch for ch in s if unicodedata.category(ch)[0] != 'C')
+    s = _LEGACY_PRINTABLE_ASCII_RE.sub(' ', s)
+    s = _LEGACY_REPEAT_CHARS_RE.sub(r'\1\1', s)
+    s = _LEGACY_REPEAT_ANY_RE.sub(r'\1\1', s)
+    s = re.sub(r'\s+', ' ', s).strip()
+    if len(s) > max_len:
+        s = s[:max_len].rsplit(' ', 1)[0] + "..."
+    return s
+
+
+def _load_snippets(corpus_dir: Path, chunk_size: int) -> list:
+    snippets = []
+    for path in sorted(corpus_dir.rglob("*")):
+        if path.is_file() and path.suffix.lower() in {".html", ".htm", ".txt"}:
+            text = path.read_bytes().decode("utf-8", errors="ignore")
+            snippets.extend(text[i:i + chunk_size] for i in range(0, len(text), chunk_size))
+    return snippets
+
+
+def _fuzz_snippets(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    alphabet = (list("abcAB01 .,-_") + ["\n", "\t", "\r", "\x00", "\x7f", "​", " ",
+                "é", "’", "中", "\ud83d", "\U0001F600", "́", "﻿", " "])
+    out = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(1, 60)):
+            ch = rng.choice(alphabet)
+            parts.append(ch * (rng.randint(1, 15) if rng.random() < 0.2 else 1))
+        out.append("".join(parts))
+    return out
+
+
+def _throughput(fn, snippets: list, total_mb: float, repeat: int, max_len: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for s in snippets:
+            fn(s, max_len=max_len)
+    return total_mb * repeat / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", required=True, type=Path,
+                        help="Directory containing scraped *.html / *.txt files")
+    parser.add_argument("--chunk-size", type=int, default=4000,
+                        help="Characters per snippet (4000 = extract content budget)")
+    parser.add_argument("--max-len", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    snippets = _load_snippets(args.corpus, args.chunk_size)
+    if not snippets:
+        sys.exit(f"No scraped text found under {args.corpus}")
+    total_mb = sum(len(s.encode("utf-8")) for s in snippets) / 1e6
+
+    mismatches = [s for s in snippets + _fuzz_snippets(20000)
+                  if sanitize_text(s, max_len=args.max_len) != legacy_sanitize_text(s, max_len=args.max_len)]
+    print(f"Corpus: {len(snippets)} snippets, {total_mb:.2f} MB; output mismatches vs previous: {len(mismatches)}")
+
+    before = _throughput(legacy_sanitize_text, snippets, total_mb, args.repeat, args.max_len)
+    after = _throughput(sanitize_text, snippets, total_mb, args.repeat, args.max_len)
+    print(f"previous: {before:8.2f} MB/s")
+    print(f"current : {after:8.2f} MB/s  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
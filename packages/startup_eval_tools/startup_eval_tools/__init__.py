@@ -0,0 +1,14 @@
+"""
+    Tools shared by the extract-benchmarking job and the agents: web search, webpage text
+    extraction, text sanitization and the Benchmarking Framework reader.
+
+    Submodules are imported explicitly (e.g. `from startup_eval_tools.web_extract import extract_webpage`)
+    so an app only pays for the dependencies of what it uses:
+        - text_sanitize: no extra dependencies
+        - html_extractors / web_extract: "web" extra (aiohttp, cachetools, lxml; "bs4" extra for the fallback parser)
+        - web_search: "search" extra (tavily-python)
+        - benchmark_framework: "framework" extra (PyMuPDF)
+        - rag_corpus: Firestore and Vertex AI from the agent's own dependencies
+"""
+
+__version__ = "0.1.0"
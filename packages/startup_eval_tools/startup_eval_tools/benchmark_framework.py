@@ -0,0 +1,232 @@
+"""Utilities to read the Benchmarking Framework PDF from the repository assets.
+
+This module locates `assets/Benchmarking_Framework.pdf` by walking up from the
+calling app's directory (then the working directory) and extracts text. It
+returns a single string containing the extracted textual content or None on failure.
+
+The extracted text is compiled into `assets/Benchmarking_Framework.parsed.json` (with the
+SHA-256 of the PDF it came from) and memoized per process, so the PDF is only parsed again
+when it changed. Build the artefact at deploy time with
+`python -m startup_eval_tools.benchmark_framework <path/to/Benchmarking_Framework.pdf>`;
+otherwise it is written on first use (to the system temp directory if assets/ is read-only).
+
+The text is also indexed by section (`parse_framework_sections`), so prompts can include only
+the parts of the framework they need (`read_benchmark_framework_sections`), without the
+citation markers and the source list.
+
+Requires the "framework" extra (PyMuPDF), which is only imported when the PDF is parsed.
+"""
+import hashlib
+import json
+import re
+import sys
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+ARTEFACT_SUFFIX = ".parsed.json"
+
+# section key -> pattern matching the start of its heading line, in document order;
+# the text before the first heading is the "overview" section
+FRAMEWORK_SECTION_HEADINGS = {
+	"scoring": r"scoring guidelines",
+	"risk": r"risk factors$",
+	"moat": r"competitive advantage \(moat\) dimensions$",
+	"financials": r"financial benchmarks$",
+	"team": r"team evaluation criteria$",
+	"market": r"market & customer benchmarks$",
+	"product": r"product-specific benchmarks$",
+	"industry": r"industry-specific considerations$",
+	"sources": r"sources:",
+}
+FRAMEWORK_SECTIONS = ("overview",) + tuple(FRAMEWORK_SECTION_HEADINGS)
+# every section except the source list
+CONTENT_SECTIONS = tuple(k for k in FRAMEWORK_SECTIONS if k != "sources")
+
+_HEADING_RES = {key: re.compile(pattern, re.IGNORECASE) for key, pattern in FRAMEWORK_SECTION_HEADINGS.items()}
+_CITATION_RE = re.compile(r"(?:\[\d+\])+")
+_BULLET_LEAD_RE = re.compile(r"^\s*•\s*([^:]{1,80}):")
+
+# (search_from, working directory) -> extracted text, for the lifetime of the process
+_framework_text_cache: Dict[tuple, Optional[str]] = {}
+
+
+def _find_assets_file(filename: str = "Benchmarking_Framework.pdf",
+					  search_from: Optional[Union[str, Path]] = None) -> Optional[Path]:
+	"""Search `search_from`, the working directory and their parent directories for assets/<filename>.
+
+	Returns the Path if found, otherwise None.
+	"""
+	starts = [Path(search_from).resolve()] if search_from else []
+	starts.append(Path.cwd().resolve())
+	for start in starts:
+		for p in [start] + list(start.parents):
+			candidate = p / "assets" / filename
+			if candidate.is_file():
+				return candidate
+	return None
+
+
+def _extract_pdf_text(pdf_path: Path) -> Optional[str]:
+	# Use PyMuPDF (fitz) for extraction. Requirements include PyMuPDF.
+	try:
+		import fitz  # PyMuPDF
+
+		text_parts = []
+		with fitz.open(str(pdf_path)) as doc:
+			for page in doc:
+				try:
+					page_text = page.get_text("text") or ""
+				except Exception:
+					page_text = ""
+				if page_text:
+					text_parts.append(page_text)
+
+		return "\n\n".join(text_parts) if text_parts else None
+	except Exception:
+		# No fallback: surface failure as None
+		return None
+
+
+def _artefact_paths(pdf_path: Path, source_sha256: str):
+	"""Artefact next to the PDF first, then a hash-named one in the temp directory."""
+	return [pdf_path.with_name(pdf_path.stem + ARTEFACT_SUFFIX),
+			Path(tempfile.gettempdir()) / f"{pdf_path.stem}-{source_sha256[:16]}{ARTEFACT_SUFFIX}"]
+
+
+def _load_artefact(pdf_path: Path, source_sha256: str) -> Optional[str]:
+	for artefact in _artefact_paths(pdf_path, source_sha256):
+		try:
+			data = json.loads(artefact.read_text(encoding="utf-8"))
+		except (OSError, ValueError):
+			continue
+		if data.get("source_sha256") == source_sha256 and data.get("text"):
+			return data["text"]
+	return None
+
+
+def _write_artefact(pdf_path: Path, source_sha256: str, text: str) -> Optional[Path]:
+	payload = json.dumps({"source": pdf_path.name, "source_sha256": source_sha256, "text": text}, ensure_ascii=False)
+	for artefact in _artefact_paths(pdf_path, source_sha256):
+		try:
+			artefact.write_text(payload, encoding="utf-8")
+			return artefact
+		except OSError:
+			continue
+	return None
+
+
+def compile_benchmark_framework(pdf_path: Union[str, Path]) -> Optional[Path]:
+	"""Parse the PDF and write its text artefact; returns the artefact path (None if parsing or writing failed)."""
+	pdf_path = Path(pdf_path).resolve()
+	text = _extract_pdf_text(pdf_path)
+	if not text:
+		return None
+	return _write_artefact(pdf_path, hashlib.sha256(pdf_path.read_bytes()).hexdigest(), text)
+
+
+def read_benchmark_framework_text(search_from: Optional[Union[str, Path]] = None) -> Optional[str]:
+	"""Locate `assets/Benchmarking_Framework.pdf` and return its text (memoized, artefact-backed).
+
+	Args:
+		search_from: Directory to start the search from (usually the calling app's package directory).
+
+	Returns:
+		str: Extracted text if successful.
+		None: if the file is missing or text extraction fails.
+	"""
+	cache_key = (str(search_from), str(Path.cwd()))
+	if cache_key in _framework_text_cache:
+		return _framework_text_cache[cache_key]
+	pdf_path = _find_assets_file(search_from=search_from)
+	if not pdf_path:
+		return None
+
+	try:
+		source_sha256 = hashlib.sha256(pdf_path.read_bytes()).hexdigest()
+	except OSError:
+		return None
+	text = _load_artefact(pdf_path, source_sha256)
+	if text is None:
+		text = _extract_pdf_text(pdf_path)
+		if text:
+			_write_artefact(pdf_path, source_sha256, text)
+	_framework_text_cache[cache_key] = text
+	return text
+
+
+
+@lru_cache(maxsize=4)
+def _parse_sections(text: str) -> Tuple[Tuple[str, str], ...]:
+	sections = {"overview": []}
+	current = "overview"
+	for line in text.splitlines():
+		stripped = line.strip()
+		key = next((k for k, heading in _HEADING_RES.items() if k not in sections and heading.match(stripped)), None)
+		if key:
+			current = key
+			sections[key] = []
+		sections[current].append(line.rstrip())
+	return tuple((key, "\n".join(lines).strip()) for key, lines in sections.items())
+
+
+def parse_framework_sections(text: str) -> Dict[str, str]:
+	"""Split the framework text into {section key: section text (heading included)} in document order.
+
+	Only "overview" is returned when none of FRAMEWORK_SECTION_HEADINGS is found.
+	"""
+	return dict(_parse_sections(text or ""))
+
+
+def _outline(section_text: str) -> str:
+	"""Heading plus the lead-in of every bullet ("• Team: ..." -> "- Team")."""
+	lines = section_text.splitlines()
+	leads = [f"- {m.group(1).strip()}" for m in map(_BULLET_LEAD_RE.match, lines[1:]) if m]
+	return "\n".join(lines[:1] + leads)
+
+
+def select_framework_sections(text: str, sections: Optional[Iterable[str]] = None,
+							  strip_citations: bool = True, outline: bool = False) -> str:
+	"""Text of the requested sections (default CONTENT_SECTIONS), in document order.
+
+	Args:
+		text: Full framework text.
+		sections: Keys from FRAMEWORK_SECTIONS.
+		strip_citations: Drop "[1][2]"-style citation markers.
+		outline: Only headings and bullet lead-ins (for checking coverage rather than scoring).
+
+	Raises:
+		ValueError: If a section key is unknown.
+	"""
+	wanted = set(CONTENT_SECTIONS if sections is None else sections)
+	unknown = wanted - set(FRAMEWORK_SECTIONS)
+	if unknown:
+		raise ValueError(f"Unknown framework sections {sorted(unknown)}, expected keys from {FRAMEWORK_SECTIONS}")
+	parsed = parse_framework_sections(text)
+	if len(parsed) == 1:
+		# headings not recognised (framework changed): fall back to the whole text
+		parts = [parsed["overview"]]
+	else:
+		parts = [body for key, body in parsed.items() if key in wanted]
+	if outline:
+		parts = [_outline(part) for part in parts]
+	selected = "\n\n".join(p for p in parts if p)
+	return _CITATION_RE.sub("", selected) if strip_citations else selected
+
+
+def read_benchmark_framework_sections(sections: Optional[Iterable[str]] = None,
+									  search_from: Optional[Union[str, Path]] = None,
+									  strip_citations: bool = True, outline: bool = False) -> Optional[str]:
+	"""`read_benchmark_framework_text` narrowed to `sections` (see select_framework_sections); None if unreadable."""
+	text = read_benchmark_framework_text(search_from=search_from)
+	if not text:
+		return None
+	return select_framework_sections(text, sections, strip_citations=strip_citations, outline=outline)
+
+if __name__ == "__main__":
+	for pdf in sys.argv[1:]:
+		built = compile_benchmark_framework(pdf)
+		print(f"{pdf} -> {built}" if built else f"{pdf}: could not compile")
+		if not built:
+			sys.exit(1)
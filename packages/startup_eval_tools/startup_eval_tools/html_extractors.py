@@ -0,0 +1,281 @@
+"""
+    Pluggable HTML -> text extractors used by the `extract` tool.
+
+    Every backend takes the raw HTML of a page and returns a dict with the keys
+    "title", "content" and "paywall". The "lxml" backend walks the document once
+    with a streaming parser target (no tree is built) and collects the title,
+    paragraphs, meta description and paywall hints in that single pass. The
+    "bs4" backend is the original BeautifulSoup implementation and is kept as a
+    fallback when lxml is not installed.
+
+    The lxml backend can also be fed chunk by chunk (see `new_incremental_extractor`),
+    which lets the fetcher stop downloading as soon as enough article text was collected.
+
+    The backend is selected with the HTML_EXTRACTOR_BACKEND env var ("lxml" by default).
+"""
+import logging
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("html_extractors")
+
+# optional lxml parser
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+HTML_EXTRACTOR_BACKEND = os.getenv("HTML_EXTRACTOR_BACKEND", "lxml")
+
+PAYWALL_SIGNS = ("subscribe", "paywall", "sign in to continue", "members only",
+                 "subscription", "read more behind", "you are reading a premium article")
+
+# containers searched for paragraphs, in order of preference (the whole document is the last resort)
+_ARTICLE_SCOPES = ("article", "article-content", "post-content")
+_SKIP_TEXT_TAGS = {"script", "style"}
+
+
+def _has_paywall_sign(text: str) -> bool:
+    lower_text = text.lower()
+    return any(sig in lower_text for sig in PAYWALL_SIGNS)
+
+
+class _PageTextCollector:
+    """
+    lxml parser target that collects everything the `extract` tool needs while the
+    document is being parsed, mirroring the selection rules of the bs4 backend:
+        - title: og:title meta content, otherwise the first <title> text.
+        - content: <p> texts of the first <article>, else of the first `.article-content`,
+          else of the first `.post-content`, else of the whole document. Falls back to
+          the meta description when the chosen container has no paragraph text.
+        - paywall: True if any text, comment or attribute value contains a paywall sign.
+    """
+
+    def __init__(self):
+        self.og_title: Optional[str] = None
+        self.meta_description: Optional[str] = None
+        self.title_parts: List[str] = []
+        self.paywall = False
+        self.paragraphs: Dict[str, List[str]] = {
+            scope: [] for scope in _ARTICLE_SCOPES + ("document",)}
+        self.paragraph_chars: Dict[str, int] = {
+            scope: 0 for scope in _ARTICLE_SCOPES + ("document",)}
+        # scope -> depth of its element while open, "closed" once it ended, missing if never seen
+        self._scopes: Dict[str, object] = {}
+        self._depth = 0
+        self._skip_depth = 0
+        self._title_state = None  # None: not seen, "open", "done"
+        self._p_depth = 0
+        self._p_parts: List[str] = []
+        self._p_scopes: Tuple[str, ...] = ()
+        self._text_buffer: List[str] = []
+
+    # ---- helpers ----
+    def _flush_text(self):
+        if not self._text_buffer:
+            return
+        text = "".join(self._text_buffer)
+        self._text_buffer = []
+        if not self.paywall and _has_paywall_sign(text):
+            self.paywall = True
+        if self._skip_depth:
+            return
+        if self._title_state == "open":
+            self.title_parts.append(text)
+        if self._p_depth:
+            stripped = text.strip()
+            if stripped:
+                self._p_parts.append(stripped)
+
+    def _open_scopes(self) -> Tuple[str, ...]:
+        return tuple(scope for scope, state in self._scopes.items() if state != "closed")
+
+    # ---- lxml target interface ----
+    def start(self, tag, attrib):
+        self._flush_text()
+        self._depth += 1
+        if not self.paywall and any(_has_paywall_sign(v) for v in attrib.values() if v):
+            self.paywall = True
+        if tag in _SKIP_TEXT_TAGS:
+            self._skip_depth += 1
+            return
+        if tag == "meta":
+            if self.og_title is None and attrib.get("property") == "og:title":
+                self.og_title = attrib.get("content") or ""
+            elif self.meta_description is None and attrib.get("name") == "description":
+                self.meta_description = attrib.get("content") or ""
+        elif tag == "title" and self._title_state is None:
+            self._title_state = "open"
+        elif tag == "p":
+            if not self._p_depth:
+                self._p_parts = []
+                self._p_scopes = self._open_scopes()
+            self._p_depth += 1
+
+        if tag == "article" and "article" not in self._scopes:
+            self._scopes["article"] = self._depth
+        classes = attrib.get("class")
+        if classes:
+            class_names = classes.split()
+            for scope in ("article-content", "post-content"):
+                if scope not in self._scopes and scope in class_names:
+                    self._scopes[scope] = self._depth
+
+    def end(self, tag):
+        self._flush_text()
+        if tag in _SKIP_TEXT_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "title" and self._title_state == "open":
+            self._title_state = "done"
+        elif tag == "p" and self._p_depth:
+            self._p_depth -= 1
+            if not self._p_depth:
+                paragraph = " ".join(self._p_parts)
+                if paragraph:
+                    for scope in self._p_scopes + ("document",):
+                        self.paragraphs[scope].append(paragraph)
+                        self.paragraph_chars[scope] += len(paragraph) + 2
+        for scope, state in self._scopes.items():
+            if state == self._depth:
+                self._scopes[scope] = "closed"
+        self._depth -= 1
+
+    def data(self, data):
+        if self._skip_depth:
+            # script/style bodies are never part of the text; only look for paywall hints
+            if not self.paywall and _has_paywall_sign(data):
+                self.paywall = True
+            return
+        self._text_buffer.append(data)
+
+    def comment(self, text):
+        self._flush_text()
+        if not self.paywall and text and _has_paywall_sign(text):
+            self.paywall = True
+
+    def close(self) -> dict:
+        self._flush_text()
+        return self.result()
+
+    # ---- result ----
+    @property
+    def chosen_scope(self) -> str:
+        return next((scope for scope in _ARTICLE_SCOPES if scope in self._scopes), "document")
+
+    def content_chars(self) -> int:
+        """Approximate length of the content collected so far for the preferred container."""
+        return self.paragraph_chars[self.chosen_scope]
+
+    def result(self) -> dict:
+        content = "\n\n".join(self.paragraphs[self.chosen_scope])
+        if not content.strip():
+            content = self.meta_description or ""
+        title = self.og_title or "".join(self.title_parts)
+        return {"title": title, "content": content, "paywall": self.paywall}
+
+
+def extract_with_lxml(html: str) -> dict:
+    """Single pass extraction using lxml's C parser with a streaming target."""
+    if not html:
+        return {"title": "", "content": "", "paywall": False}
+    collector = _PageTextCollector()
+    parser = etree.HTMLParser(target=collector, remove_comments=False)
+    parser.feed(html)
+    return parser.close()
+
+
+class LxmlIncrementalExtractor:
+    """
+    Feed-as-you-go wrapper around `_PageTextCollector`.
+
+    Usage:
+        extractor = LxmlIncrementalExtractor()
+        extractor.feed(decoded_chunk)  # repeatedly
+        if extractor.has_enough_text(4000): stop reading
+        page = extractor.close()
+    """
+
+    def __init__(self):
+        self._collector = _PageTextCollector()
+        self._parser = etree.HTMLParser(target=self._collector, remove_comments=False)
+        self._fed = False
+
+    def feed(self, text: str):
+        if text:
+            self._parser.feed(text)
+            self._fed = True
+
+    def has_enough_text(self, min_chars: int) -> bool:
+        return self._collector.content_chars() >= min_chars
+
+    def close(self) -> dict:
+        if not self._fed:
+            return {"title": "", "content": "", "paywall": False}
+        return self._parser.close()
+
+
+def extract_text_from_soup(soup):
+    article = soup.find("article") or soup.select_one(
+        ".article-content") or soup.select_one(".post-content") or soup
+    paragraphs = [p.get_text(" ", strip=True)
+                  for p in article.find_all("p")] if article else []
+    content = "\n\n".join([p for p in paragraphs if p])
+    if not content.strip():
+        meta = (soup.find("meta", {"name": "description"}) or {}).get(
+            "content", "")
+        content = meta or ""
+    return content
+
+
+def _is_paywalled_html(html: str):
+    if not html:
+        return False
+    return _has_paywall_sign(html)
+
+
+def extract_with_bs4(html: str) -> dict:
+    """Original BeautifulSoup (html.parser) extraction; builds a full tree."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    title = (soup.find("meta", {"property": "og:title"}) or {}).get(
+        "content") or (soup.title.string if soup.title else "")
+    content = extract_text_from_soup(soup) or ""
+    return {"title": title or "", "content": content, "paywall": _is_paywalled_html(html)}
+
+
+EXTRACTOR_BACKENDS: Dict[str, Callable[[str], dict]] = {
+    "lxml": extract_with_lxml,
+    "bs4": extract_with_bs4,
+}
+
+
+# backends that can parse a page chunk by chunk while it is being downloaded
+INCREMENTAL_BACKENDS = {
+    "lxml": LxmlIncrementalExtractor,
+}
+
+
+def new_incremental_extractor(name: str):
+    """Return a fresh incremental extractor for the backend, or None if it only parses whole documents."""
+    factory = INCREMENTAL_BACKENDS.get(name)
+    return factory() if factory else None
+
+
+def get_html_extractor(name: Optional[str] = None) -> Tuple[str, Callable[[str], dict]]:
+    """
+    Resolve an extractor backend by name (defaults to HTML_EXTRACTOR_BACKEND).
+
+    Falls back to "bs4" when the requested backend is unknown or lxml is not installed.
+
+    Returns:
+        tuple: (backend_name, extractor_function)
+    """
+    name = (name or HTML_EXTRACTOR_BACKEND or "lxml").lower()
+    if name not in EXTRACTOR_BACKENDS:
+        logger.warning("Unknown HTML extractor backend '%s'; using bs4", name)
+        name = "bs4"
+    if name == "lxml" and not LXML_AVAILABLE:
+        name = "bs4"
+    return name, EXTRACTOR_BACKENDS[name]
@@ -0,0 +1,92 @@
+"""
+    Near-duplicate suppression for web search results and extracted pages.
+
+    Texts are normalized to lowercase word tokens and cut into overlapping word shingles.
+    Each text gets a bottom-k MinHash signature (the k smallest shingle hashes) and two texts
+    are near-duplicates when the Jaccard similarity estimated from their signatures reaches
+    NEAR_DUP_THRESHOLD. Syndicated copies of the same press release only differ in their
+    boilerplate, so they collapse into the best ranked copy; the other URLs are kept on it as
+    "duplicate_urls" so they can still be cited.
+"""
+import heapq
+import logging
+import os
+import re
+import zlib
+from typing import Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("near_dedup")
+
+SHINGLE_SIZE = 5  # words per shingle
+SIGNATURE_SIZE = 64  # hashes kept per signature
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.7"))
+# texts with fewer words are never treated as duplicates (titles, empty snippets)
+MIN_WORDS = int(os.getenv("NEAR_DUP_MIN_WORDS", "20"))
+# rough chars-per-token ratio used for the "tokens saved" report
+CHARS_PER_TOKEN = 4
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+
+def minhash_signature(text: str, shingle_size: int = SHINGLE_SIZE,
+                      signature_size: int = SIGNATURE_SIZE) -> Tuple[int, ...]:
+    """Bottom-k MinHash signature of the word shingles of `text` (empty if it has fewer than MIN_WORDS words)."""
+    words = _WORD_RE.findall((text or "").lower())
+    if len(words) < max(MIN_WORDS, 1):
+        return ()
+    shingles = {" ".join(words[i:i + shingle_size])
+                for i in range(max(len(words) - shingle_size + 1, 1))}
+    return tuple(heapq.nsmallest(signature_size, {zlib.crc32(s.encode()) for s in shingles}))
+
+
+def estimate_jaccard(sig_a: Sequence[int], sig_b: Sequence[int], signature_size: int = SIGNATURE_SIZE) -> float:
+    """Jaccard similarity estimate: share of the k smallest hashes of the union present in both signatures."""
+    if not sig_a or not sig_b:
+        return 0.0
+    set_a, set_b = set(sig_a), set(sig_b)
+    union_bottom = heapq.nsmallest(signature_size, set_a | set_b)
+    shared = sum(1 for h in union_bottom if h in set_a and h in set_b)
+    return shared / len(union_bottom)
+
+
+def collapse_near_duplicates(items: List[dict], text_of: Callable[[dict], str],
+                             threshold: Optional[float] = None) -> Tuple[List[dict], dict]:
+    """
+    Drop items whose text is a near-duplicate of an earlier (better ranked) item.
+
+    Args:
+        items: result dicts ordered best first; each should have a "url".
+        text_of: returns the text compared for an item (snippet or extracted content).
+        threshold: estimated Jaccard similarity at or above which items are duplicates.
+
+    Returns:
+        tuple: (kept_items, stats) where kept items that absorbed duplicates get a
+               "duplicate_urls" list and stats holds "near_duplicates_removed" and "tokens_saved".
+    """
+    threshold = NEAR_DUP_THRESHOLD if threshold is None else threshold
+    kept: List[dict] = []
+    kept_signatures: List[Tuple[int, ...]] = []
+    removed = 0
+    tokens_saved = 0
+    for item in items:
+        signature = minhash_signature(text_of(item))
+        match = None
+        if signature:
+            match = next((i for i, kept_sig in enumerate(kept_signatures)
+                          if estimate_jaccard(signature, kept_sig) >= threshold), None)
+        if match is None:
+            kept.append(item)
+            kept_signatures.append(signature)
+            continue
+        removed += 1
+        url = item.get("url") or ""
+        if url:
+            kept[match].setdefault("duplicate_urls", []).append(url)
+        # the dropped text and title no longer reach the model; its url still does
+        tokens_saved += estimate_tokens(text_of(item)) + estimate_tokens(item.get("title") or "") \
+            - estimate_tokens(url)
+    return kept, {"near_duplicates_removed": removed, "tokens_saved": max(tokens_saved, 0)}
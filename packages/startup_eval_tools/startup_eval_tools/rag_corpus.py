@@ -0,0 +1,123 @@
+"""
+    Resolves the Vertex AI RAG corpus of a company for the agents' `retrieve` tool.
+
+    The benchmarking job creates one corpus per company (display name `<prefix>_<company_doc_id>`)
+    and stores its resource name in the company document. `RagCorpusResolver.resolve` reads it with a
+    point read, caches it in the process, and only scans `list_corpora` for companies whose document
+    has no name yet (writing the result back). Firestore, Vertex AI and google-auth come from the
+    agent's own dependencies and are imported on first use.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger("rag_corpus")
+
+# company document field the benchmarking job stores the corpus resource name in
+RAG_CORPUS_NAME_FIELD = "rag_corpus_name"
+# seconds a resolved corpus name is reused without reading Firestore again
+RAG_CORPUS_NAME_CACHE_TTL = int(os.getenv("RAG_CORPUS_NAME_CACHE_TTL", "900"))
+
+
+class RagCorpusResolver:
+    """Corpus resource name of a company, from the process cache, the company document or a corpus scan."""
+
+    def __init__(self, project: str, location: str, database: str, collection: str, corpus_prefix: str,
+                 cache_ttl: int = RAG_CORPUS_NAME_CACHE_TTL):
+        self.project = project
+        self.location = location
+        self.database = database
+        self.collection = collection
+        self.corpus_prefix = corpus_prefix
+        self.cache_ttl = cache_ttl
+        # company_doc_id -> (corpus resource name, expiry as time.monotonic())
+        self._names: Dict[str, Tuple[str, float]] = {}
+        # an async client is bound to the event loop it was created on
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, object]" = weakref.WeakKeyDictionary()
+        self._vertex_ai_initialized = False
+        self._init_lock = threading.Lock()
+
+    def display_name(self, company_doc_id: str) -> str:
+        return f"{self.corpus_prefix}_{company_doc_id}"
+
+    def _init_vertex_ai(self) -> None:
+        with self._init_lock:
+            if self._vertex_ai_initialized:
+                return
+            import vertexai
+            from google import auth
+            credentials, _ = auth.default(scopes=["https://www.googleapis.com/auth/cloud-platform"])
+            vertexai.init(project=self.project, location=self.location, credentials=credentials)
+            self._vertex_ai_initialized = True
+
+    async def initialize_vertex_ai(self) -> None:
+        """Initializes the Vertex AI SDK once per process (the retrieval tools rely on it)."""
+        if not self._vertex_ai_initialized:
+            await asyncio.to_thread(self._init_vertex_ai)
+
+    def firestore_client(self):
+        """Firestore AsyncClient of the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            from google.cloud import firestore
+            client = self._clients[loop] = firestore.AsyncClient(project=self.project, database=self.database)
+        return client
+
+    def _find_corpus_name_by_display_name(self, corpus_display_name: str) -> Optional[str]:
+        """Fallback for companies whose document has no corpus name yet: scans every corpus in the project."""
+        from vertexai import rag
+        for existing_corpus in rag.list_corpora():
+            if existing_corpus.display_name == corpus_display_name:
+                return existing_corpus.name
+        return None
+
+    async def resolve(self, company_doc_id: str) -> str:
+        """
+        Resolves the RAG corpus resource name of a company.
+
+        Order: process cache, then a point read of `rag_corpus_name` on the company document, then
+        (only when the document has no name) a `list_corpora` scan by display name whose result is
+        written back to the document so the next lookup is a point read.
+
+        Raises:
+            RuntimeError: If the company has no corpus.
+        """
+        cached = self._names.get(company_doc_id)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        company_doc_ref = self.firestore_client().collection(self.collection).document(company_doc_id)
+        corpus_name = None
+        try:
+            snapshot = await company_doc_ref.get(field_paths=[RAG_CORPUS_NAME_FIELD])
+            corpus_name = (snapshot.to_dict() or {}).get(RAG_CORPUS_NAME_FIELD)
+        except Exception as e:
+            logger.warning("Could not read corpus name of %s from Firestore: %s", company_doc_id, e)
+
+        if not corpus_name:
+            corpus_display_name = self.display_name(company_doc_id)
+            await self.initialize_vertex_ai()
+            corpus_name = await asyncio.to_thread(self._find_corpus_name_by_display_name, corpus_display_name)
+            # If corpus is not found, raise an error (creation is handled elsewhere)
+            if not corpus_name:
+                raise RuntimeError(f"Corpus '{corpus_display_name}' does not exist.")
+            try:
+                await company_doc_ref.update({RAG_CORPUS_NAME_FIELD: corpus_name})
+            except Exception as e:
+                logger.warning("Failed to save corpus name to Firestore document %s: %s", company_doc_id, e)
+
+        self._names[company_doc_id] = (corpus_name, time.monotonic() + self.cache_ttl)
+        return corpus_name
+
+    async def corpus_state(self, company_doc_id: str) -> Dict[str, str]:
+        """Session state keys the retrieval tools read: the corpus display name and resource name."""
+        await self.initialize_vertex_ai()
+        return {
+            "rag_corpus_display_name": self.display_name(company_doc_id),
+            "rag_corpus_name": await self.resolve(company_doc_id),
+        }
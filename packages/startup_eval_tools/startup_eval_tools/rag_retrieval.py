@@ -0,0 +1,382 @@
+"""
+    Retrieval backends for the agents' `retrieve` tool.
+
+    "vertex" sends every query to the managed Vertex AI RAG corpus (rag.retrieval_query).
+    "local" keeps an in-process vector index per corpus: the GCS files the corpus was imported
+    from (the company's sub agent result JSONs) are chunked, embedded with the corpus's embedding
+    model and searched by brute-force cosine distance with NumPy. Embeddings are stored in a
+    persistent SQLite cache keyed by a hash of (model, task type, text), so rebuilding an index or
+    repeating a query needs no embedding call and a repeated query is answered in a few ms.
+    "auto" (default) queries the managed corpus and falls back to the local index only when a
+    managed query fails (and NumPy is installed). Building the local index downloads and embeds the
+    whole corpus, so it is never the primary backend unless selected with "local"; set
+    RAG_EMBEDDING_CACHE_PATH to a persistent volume to keep its embeddings across instances.
+
+    `aretrieve_contexts` is the non-blocking entry point: it runs one or several queries concurrently
+    on a bounded thread pool (the Vertex SDK has no async retrieval call) and merges the contexts,
+    dropping duplicates and near-duplicates.
+
+    Select the backend with RAG_RETRIEVAL_BACKEND. The local backend requires the "rag" extra;
+    Vertex AI and GCS come from the agent's own dependencies and are imported on first use.
+"""
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .near_dedup import collapse_near_duplicates
+
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+logger = logging.getLogger("rag_retrieval")
+
+# the corpora are created with this model (see prepare_rag_corpus in the benchmarking job)
+EMBEDDING_MODEL = os.getenv("RAG_EMBEDDING_MODEL", "text-multilingual-embedding-002")
+# ~1024 tokens with ~200 overlap, the managed corpus' default chunking
+CHUNK_CHARS = int(os.getenv("RAG_LOCAL_CHUNK_CHARS", "4000"))
+CHUNK_OVERLAP_CHARS = int(os.getenv("RAG_LOCAL_CHUNK_OVERLAP_CHARS", "800"))
+# texts per embedding request (the model accepts at most 20k tokens per request)
+EMBED_BATCH_SIZE = 16
+# seconds a local index is reused before the corpus files are listed again
+LOCAL_INDEX_TTL = int(os.getenv("RAG_LOCAL_INDEX_TTL", "900"))
+# concurrent retrievals across all calls, and most queries accepted by one aretrieve_contexts call
+RAG_RETRIEVAL_MAX_WORKERS = int(os.getenv("RAG_RETRIEVAL_MAX_WORKERS", "8"))
+MAX_QUERIES_PER_CALL = int(os.getenv("RAG_MAX_QUERIES_PER_CALL", "5"))
+DEFAULT_EMBEDDING_CACHE_PATH = os.path.join(tempfile.gettempdir(), "startup_eval_embeddings.sqlite3")
+
+EmbedFn = Callable[[List[str], str], List[List[float]]]
+
+
+def chunk_text(text: str, chunk_chars: int = CHUNK_CHARS, overlap_chars: int = CHUNK_OVERLAP_CHARS) -> List[str]:
+    """Overlapping windows of about `chunk_chars`, cut at whitespace when one is close to the window end."""
+    text = (text or "").strip()
+    if len(text) <= chunk_chars:
+        return [text] if text else []
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_chars, len(text))
+        if end < len(text):
+            cut = text.rfind(" ", start + chunk_chars // 2, end)
+            end = cut if cut > 0 else end
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap_chars, start + 1)
+    return [c for c in chunks if c]
+
+
+class EmbeddingCache:
+    """Persistent text-hash -> float32 vector store (SQLite, safe to share between threads)."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("RAG_EMBEDDING_CACHE_PATH", DEFAULT_EMBEDDING_CACHE_PATH)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @staticmethod
+    def key(model: str, task_type: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\x00{task_type}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        return self._conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part)
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+        self.hits += len(found)
+        self.misses += len(set(keys)) - len(found)
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]]) -> None:
+        if not vectors:
+            return
+        with self._lock:
+            conn = self._connection()
+            conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                             [(key, array("f", values).tobytes()) for key, values in vectors.items()])
+            conn.commit()
+
+
+@lru_cache(maxsize=4)
+def _embedding_model(model_name: str):
+    from vertexai.language_models import TextEmbeddingModel
+    return TextEmbeddingModel.from_pretrained(model_name)
+
+
+def vertex_embed(texts: List[str], task_type: str, model_name: str = EMBEDDING_MODEL) -> List[List[float]]:
+    """Embed `texts` with the Vertex AI text embedding model (requires vertexai.init)."""
+    from vertexai.language_models import TextEmbeddingInput
+    model = _embedding_model(model_name)
+    vectors = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        batch = [TextEmbeddingInput(text=t, task_type=task_type) for t in texts[start:start + EMBED_BATCH_SIZE]]
+        vectors.extend(e.values for e in model.get_embeddings(batch))
+    return vectors
+
+
+def embed_texts(texts: List[str], task_type: str, embed_fn: EmbedFn, cache: EmbeddingCache,
+                model_name: str = EMBEDDING_MODEL) -> List[List[float]]:
+    """Embeddings for `texts`, calling `embed_fn` only for texts missing from `cache`."""
+    keys = [EmbeddingCache.key(model_name, task_type, t) for t in texts]
+    found = cache.get_many(keys)
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in found:
+            missing.setdefault(key, text)
+    if missing:
+        computed = dict(zip(missing, embed_fn(list(missing.values()), task_type)))
+        cache.put_many(computed)
+        found.update(computed)
+    return [found[key] for key in keys]
+
+
+class LocalVectorIndex:
+    """Brute-force cosine index over text chunks (rows are L2-normalized, so search is one matrix product)."""
+
+    def __init__(self, chunks: List[str], vectors):
+        import numpy as np
+        self.chunks = chunks
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(chunks), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self._matrix = matrix / np.where(norms == 0, 1, norms)
+
+    @classmethod
+    def build(cls, documents: List[str], embed_fn: EmbedFn, cache: EmbeddingCache,
+              model_name: str = EMBEDDING_MODEL) -> "LocalVectorIndex":
+        chunks = [chunk for document in documents for chunk in chunk_text(document)]
+        vectors = embed_texts(chunks, "RETRIEVAL_DOCUMENT", embed_fn, cache, model_name) if chunks else []
+        return cls(chunks, vectors)
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def search(self, query_vector: List[float], top_k: int = 10,
+               vector_distance_threshold: Optional[float] = None) -> List[Tuple[str, float]]:
+        """(chunk, cosine distance) pairs, closest first, at most `top_k` and within the threshold."""
+        import numpy as np
+        if not self.chunks or top_k <= 0:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1)
+        distances = 1.0 - self._matrix @ query
+        k = min(top_k, len(self.chunks))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest])]
+        return [(self.chunks[i], float(distances[i])) for i in nearest
+                if vector_distance_threshold is None or distances[i] <= vector_distance_threshold]
+
+
+def _download_gcs_text(gcs_uri: str) -> str:
+    from google.cloud import storage
+    bucket_name, _, blob_name = gcs_uri.removeprefix("gs://").partition("/")
+    return storage.Client().bucket(bucket_name).blob(blob_name).download_as_text()
+
+
+def load_corpus_documents(corpus_name: str) -> List[str]:
+    """Texts of the GCS files imported into the managed corpus."""
+    from vertexai import rag
+    uris = sorted({uri for rag_file in rag.list_files(corpus_name=corpus_name)
+                   for uri in rag_file.gcs_source.uris})
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        return list(pool.map(_download_gcs_text, uris))
+
+
+@lru_cache(maxsize=64)
+def _rag_resources(corpus_name: str) -> tuple:
+    from vertexai import rag
+    return (rag.RagResource(rag_corpus=corpus_name),)
+
+
+@lru_cache(maxsize=32)
+def _rag_retrieval_config(top_k: int, vector_distance_threshold: float):
+    from vertexai import rag
+    return rag.RagRetrievalConfig(top_k=top_k, filter=rag.Filter(vector_distance_threshold=vector_distance_threshold))
+
+
+class VertexRagBackend:
+    name = "vertex"
+
+    def retrieve(self, query: str, corpus_name: str, top_k: int = 10,
+                 vector_distance_threshold: float = 0.6) -> List[str]:
+        from vertexai import rag
+        # resource and config objects are built once per corpus / (top_k, threshold) and reused
+        response = rag.retrieval_query(
+            text=query,
+            rag_resources=list(_rag_resources(corpus_name)),
+            rag_retrieval_config=_rag_retrieval_config(top_k, vector_distance_threshold),
+        )
+        return [context.text for context in response.contexts.contexts]
+
+
+class LocalIndexBackend:
+    """
+    Serves queries from a LocalVectorIndex per corpus, built on first use and rebuilt after
+    `index_ttl` seconds (cheap: unchanged chunks come from the embedding cache).
+    """
+    name = "local"
+
+    def __init__(self, embed_fn: Optional[EmbedFn] = None, cache: Optional[EmbeddingCache] = None,
+                 document_loader: Callable[[str], List[str]] = load_corpus_documents,
+                 index_ttl: int = LOCAL_INDEX_TTL, model_name: str = EMBEDDING_MODEL):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("The local retrieval backend requires NumPy (install the 'rag' extra).")
+        self.embed_fn = embed_fn or (lambda texts, task_type: vertex_embed(texts, task_type, model_name))
+        self.cache = cache or EmbeddingCache()
+        self.document_loader = document_loader
+        self.index_ttl = index_ttl
+        self.model_name = model_name
+        self._indexes: Dict[str, Tuple[LocalVectorIndex, float]] = {}
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def index_for(self, corpus_name: str) -> LocalVectorIndex:
+        entry = self._indexes.get(corpus_name)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        with self._locks_guard:
+            build_lock = self._build_locks.setdefault(corpus_name, threading.Lock())
+        with build_lock:
+            entry = self._indexes.get(corpus_name)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+            started = time.perf_counter()
+            index = LocalVectorIndex.build(self.document_loader(corpus_name), self.embed_fn, self.cache,
+                                           self.model_name)
+            self._indexes[corpus_name] = (index, time.monotonic() + self.index_ttl)
+            logger.info("Built local index for %s: %d chunks in %.2fs (embedding cache hits %d, misses %d)",
+                        corpus_name, len(index), time.perf_counter() - started, self.cache.hits, self.cache.misses)
+            return index
+
+    def retrieve(self, query: str, corpus_name: str, top_k: int = 10,
+                 vector_distance_threshold: float = 0.6) -> List[str]:
+        index = self.index_for(corpus_name)
+        query_vector = embed_texts([query], "RETRIEVAL_QUERY", self.embed_fn, self.cache, self.model_name)[0]
+        return [chunk for chunk, _ in index.search(query_vector, top_k, vector_distance_threshold)]
+
+
+class AutoBackend:
+    """
+    Managed corpus first; the local index answers only the queries the managed corpus fails on. The
+    local backend is created on the first failure (never, when NumPy is not installed).
+    """
+    name = "auto"
+
+    def __init__(self, remote=None, local_factory: Optional[Callable[[], LocalIndexBackend]] = None):
+        self.remote = remote or VertexRagBackend()
+        self.local_factory = local_factory or (LocalIndexBackend if NUMPY_AVAILABLE else None)
+        self._local: Optional[LocalIndexBackend] = None
+        self._local_guard = threading.Lock()
+
+    def _local_backend(self) -> Optional[LocalIndexBackend]:
+        with self._local_guard:
+            if self._local is None and self.local_factory is not None:
+                self._local = self.local_factory()
+            return self._local
+
+    def retrieve(self, query: str, corpus_name: str, top_k: int = 10,
+                 vector_distance_threshold: float = 0.6) -> List[str]:
+        try:
+            return self.remote.retrieve(query, corpus_name, top_k, vector_distance_threshold)
+        except Exception as e:
+            local = self._local_backend()
+            if local is None:
+                raise
+            logger.warning("Managed retrieval failed for %s, querying the local index: %s", corpus_name, e)
+            try:
+                return local.retrieve(query, corpus_name, top_k, vector_distance_threshold)
+            except Exception as local_error:
+                logger.warning("Local retrieval failed for %s as well: %s", corpus_name, local_error)
+                raise e
+
+
+_BACKENDS = {"vertex": VertexRagBackend, "local": LocalIndexBackend, "auto": AutoBackend}
+_backend_instances: Dict[str, object] = {}
+
+
+def get_retrieval_backend(name: Optional[str] = None):
+    """Shared backend instance for `name` (default: RAG_RETRIEVAL_BACKEND, else "auto")."""
+    name = (name or os.getenv("RAG_RETRIEVAL_BACKEND", "auto")).lower()
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown retrieval backend '{name}', expected one of {sorted(_BACKENDS)}")
+    if name not in _backend_instances:
+        _backend_instances[name] = _BACKENDS[name]()
+    return _backend_instances[name]
+
+
+def retrieve_contexts(query: str, corpus_name: str, top_k: int = 10, vector_distance_threshold: float = 0.6,
+                      backend: Optional[str] = None) -> List[str]:
+    """Texts of the `top_k` corpus chunks closest to `query` (cosine distance at most the threshold)."""
+    return get_retrieval_backend(backend).retrieve(query, corpus_name, top_k, vector_distance_threshold)
+
+
+_retrieval_pool = ThreadPoolExecutor(max_workers=RAG_RETRIEVAL_MAX_WORKERS, thread_name_prefix="rag-retrieval")
+
+
+def merge_contexts(per_query: Sequence[List[str]]) -> Tuple[List[str], dict]:
+    """
+    Interleave per-query contexts by rank (every query's best context first) and drop exact and
+    near-duplicate contexts, keeping the best ranked copy.
+    """
+    merged, seen = [], set()
+    for rank in range(max((len(c) for c in per_query), default=0)):
+        for contexts in per_query:
+            if rank < len(contexts):
+                key = " ".join(contexts[rank].split()).lower()
+                if key not in seen:
+                    seen.add(key)
+                    merged.append(contexts[rank])
+    exact_removed = sum(len(c) for c in per_query) - len(merged)
+    kept, stats = collapse_near_duplicates([{"text": c} for c in merged], text_of=lambda item: item["text"])
+    return [item["text"] for item in kept], {"duplicates_removed": exact_removed, **stats}
+
+
+async def aretrieve_contexts(queries, corpus_name: str, top_k: int = 10, vector_distance_threshold: float = 0.6,
+                             backend: Optional[str] = None) -> List[str]:
+    """
+    Non-blocking retrieval of one query or a list of queries (at most MAX_QUERIES_PER_CALL, run concurrently).
+
+    Returns the merged, deduplicated contexts; a query that fails is logged and contributes nothing
+    unless every query failed, in which case the first error is raised.
+    """
+    queries = [queries] if isinstance(queries, str) else list(dict.fromkeys(q for q in queries if q))
+    queries = queries[:MAX_QUERIES_PER_CALL]
+    retrieval_backend = get_retrieval_backend(backend)
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(
+        loop.run_in_executor(_retrieval_pool, retrieval_backend.retrieve, query, corpus_name, top_k,
+                             vector_distance_threshold)
+        for query in queries), return_exceptions=True)
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors and len(errors) == len(results):
+        raise errors[0]
+    for query, result in zip(queries, results):
+        if isinstance(result, BaseException):
+            logger.warning("Retrieval failed for %r: %s", query, result)
+    per_query = [r for r in results if not isinstance(r, BaseException)]
+    if len(per_query) == 1:
+        return per_query[0]
+    contexts, stats = merge_contexts(per_query)
+    logger.info("Merged %d queries into %d contexts (%s)", len(per_query), len(contexts), stats)
+    return contexts
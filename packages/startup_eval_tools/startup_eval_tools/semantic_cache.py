@@ -0,0 +1,93 @@
+"""
+    Semantic result cache for agent tools.
+
+    Results are stored per namespace (tool name plus the arguments that must match exactly, e.g.
+    the corpus of a `retrieve` call) together with the embedding of the query that produced them.
+    A new query whose embedding has a cosine similarity of at least SEMANTIC_CACHE_THRESHOLD with a
+    stored query returns that result instead of calling the tool again. Identical queries (after
+    whitespace/case normalization) hit without an embedding call; keys such as URLs are exact only.
+
+    Query embeddings go through startup_eval_tools.rag_retrieval's persistent embedding cache.
+    If embedding fails the cache degrades to exact matching.
+"""
+import logging
+import math
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .rag_retrieval import EMBEDDING_MODEL, EmbeddingCache, embed_texts, vertex_embed
+
+logger = logging.getLogger("semantic_cache")
+
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.93"))
+# stored results per namespace (oldest dropped first)
+MAX_ENTRIES_PER_NAMESPACE = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "128"))
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def _unit(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class SemanticCache:
+    """Per-namespace list of (query, unit embedding, result); lookups scan the namespace."""
+
+    def __init__(self, threshold: Optional[float] = None,
+                 embed_fn: Optional[Callable[[List[str], str], List[List[float]]]] = None,
+                 embedding_cache: Optional[EmbeddingCache] = None, model_name: str = EMBEDDING_MODEL,
+                 max_entries: int = MAX_ENTRIES_PER_NAMESPACE):
+        self.threshold = SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        self.embed_fn = embed_fn or (lambda texts, task_type: vertex_embed(texts, task_type, model_name))
+        self.embedding_cache = embedding_cache or EmbeddingCache()
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, List[Tuple[str, Optional[List[float]], Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str) -> Optional[List[float]]:
+        try:
+            vector = embed_texts([text], "SEMANTIC_SIMILARITY", self.embed_fn, self.embedding_cache,
+                                 self.model_name)[0]
+            return _unit(vector)
+        except Exception as e:
+            logger.warning("Semantic cache embedding failed, using exact matching: %s", e)
+            return None
+
+    def lookup(self, namespace: str, query: str, semantic: bool = True) -> Optional[Tuple[Any, str, float]]:
+        """(result, cached query, similarity) of the closest stored query at or above the threshold, else None."""
+        entries = self._entries.get(namespace) or []
+        key = _normalize(query)
+        match = next(((result, cached, 1.0) for cached, _, result in reversed(entries)
+                      if _normalize(cached) == key), None)
+        if match is None and semantic and entries:
+            vector = self._embed(query)
+            if vector is not None:
+                best = max(((sum(a * b for a, b in zip(vector, cached_vector)), cached, result)
+                            for cached, cached_vector, result in entries if cached_vector is not None),
+                           default=None, key=lambda item: item[0])
+                if best is not None and best[0] >= self.threshold:
+                    match = (best[2], best[1], round(best[0], 4))
+        with self._lock:
+            if match is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return match
+
+    def store(self, namespace: str, query: str, result: Any, semantic: bool = True) -> None:
+        vector = self._embed(query) if semantic else None
+        with self._lock:
+            entries = self._entries.setdefault(namespace, [])
+            entries.append((query, vector, result))
+            del entries[:-self.max_entries]
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "threshold": self.threshold,
+                "entries": sum(len(e) for e in self._entries.values())}
@@ -0,0 +1,81 @@
+"""
+    Some extracted content from web URLs contains non printable / garbled characters. This helper is to sanitize such texts.
+
+    All passes run inside the C implementations of `re` / `str.translate`; the only Python-level
+    work is one (cached) callback per run of non-ASCII characters.
+
+    Created By:- Arnab Ghosh (https://github.com/ARNABGHOSH123)
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+PRINTABLE_ASCII_RE = re.compile(r'[^\x20-\x7E]+')   # non-printable/basic-ascii
+# 4+ repeated word chars -> collapse
+REPEAT_CHARS_RE = re.compile(r'(\w)\1{3,}')
+# 11+ any-char repeats -> collapse
+REPEAT_ANY_RE = re.compile(r'(.)\1{10,}')
+# after the non-printable pass the only whitespace left is ' ', so runs of 2+ spaces are all that need collapsing
+MULTI_SPACE_RE = re.compile(r' {2,}')
+# 4+ repeats of any non-space char; candidates for both collapse rules in a single scan
+REPEAT_NON_SPACE_RE = re.compile(r'([^ ])\1{3,}')
+_ASCII_WORD_CHARS = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_")
+
+
+class _ControlCharTable(dict):
+    """str.translate table that deletes unicode control categories (C*), filled lazily per code point."""
+
+    def __missing__(self, code_point: int):
+        value = None if unicodedata.category(chr(code_point))[0] == 'C' else code_point
+        self[code_point] = value
+        return value
+
+
+_CONTROL_CHAR_TABLE = _ControlCharTable()
+
+
+@lru_cache(maxsize=4096)
+def _non_printable_run_replacement(run: str) -> str:
+    # Same as removing the control chars first and then replacing what is left of the run with one space
+    return ' ' if any(unicodedata.category(ch)[0] != 'C' for ch in run) else ''
+
+
+def _replace_non_printable_run(match: re.Match) -> str:
+    return _non_printable_run_replacement(match.group())
+
+
+def _collapse_ascii_run(match: re.Match) -> str:
+    # Same outcome as REPEAT_CHARS_RE followed by REPEAT_ANY_RE on printable ASCII text
+    run = match.group()
+    ch = run[0]
+    return ch + ch if ch in _ASCII_WORD_CHARS or len(run) >= 11 else run
+
+
+def remove_control_chars(s: str) -> str:
+    # Remove unicode control categories (C*) and non-printable ASCII
+    return s.translate(_CONTROL_CHAR_TABLE)
+
+
+def collapse_repeats(s: str) -> str:
+    # collapse runs of the same letter (e.g., 'aaaaa' -> 'aa') and very long any-char runs
+    # keep at most 2 repeats for word chars
+    s = REPEAT_CHARS_RE.sub(r'\1\1', s)
+    # keep at most 2 repeats for any char
+    s = REPEAT_ANY_RE.sub(r'\1\1', s)
+    return s
+
+
+def sanitize_text(s: str, max_len: int = 1200) -> str:
+    if not s:
+        return ""
+    # 1) + 2) remove control chars and replace every remaining run of non-printable / non-ASCII chars with a space
+    s = PRINTABLE_ASCII_RE.sub(_replace_non_printable_run, s)
+    # 3) collapse multiple whitespace (before the repeat pass so space runs never reach its callback)
+    s = MULTI_SPACE_RE.sub(' ', s)
+    # 4) collapse repeated characters (text is printable ASCII now) and trim
+    s = REPEAT_NON_SPACE_RE.sub(_collapse_ascii_run, s).strip()
+    # 5) truncate
+    if len(s) > max_len:
+        s = s[:max_len].rsplit(' ', 1)[0] + "..."
+    return s
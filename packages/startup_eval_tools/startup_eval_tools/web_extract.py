@@ -0,0 +1,457 @@
+"""
+    Webpage text extraction shared by every agent's `extract` tool.
+
+    Tavily extract is tried first (when `tavily-python` is installed and TAVILY_API_KEY is set),
+    then the page is fetched with a shared aiohttp session and parsed by the configured
+    HTML extractor backend. Results are cached in-process.
+
+    Requires the "web" extra; Tavily is optional ("search" extra) and only imported on first use.
+"""
+import logging
+import asyncio
+import codecs
+import importlib.util
+import os
+import re
+import atexit
+import signal
+from typing import List
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+from aiohttp import TCPConnector
+from .html_extractors import get_html_extractor, new_incremental_extractor
+from .near_dedup import collapse_near_duplicates
+from .text_sanitize import sanitize_text
+
+# optional Tavily client (imported lazily in _do_tavily_extract)
+TAVILY_AVAILABLE = importlib.util.find_spec("tavily") is not None
+
+logger = logging.getLogger("extract")
+
+_SESSION_REQS = 0
+_SESSION_RECREATE_EVERY = 1000  # or less
+DEFAULT_MAX_CONTENT_CHARS = 4000
+DEFAULT_TIMEOUT = 8  # seconds
+# raw byte budget for backends that need the whole document in memory (bs4)
+DEFAULT_MAX_READ_BYTES = DEFAULT_MAX_CONTENT_CHARS * 8
+# hard cap on bytes streamed through the incremental parser when a page never yields enough text
+MAX_STREAM_BYTES = int(os.getenv("MAX_STREAM_BYTES", str(2 * 1024 * 1024)))
+_READ_CHUNK_SIZE = 8192
+# batch extraction: most URLs per call and total content characters returned across all pages
+MAX_BATCH_URLS = int(os.getenv("MAX_BATCH_URLS", "20"))
+DEFAULT_BATCH_MAX_TOTAL_CHARS = int(os.getenv("BATCH_MAX_TOTAL_CHARS", "24000"))
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; EillaAgent/1.0)"}
+CACHE_TTL = int(os.getenv("SITE_EXTRACT_CACHE_TTL", str(24 * 3600)))
+_MAX_CONCURRENT_FETCHES = int(os.getenv("MAX_CONCURRENT_FETCHES", "16"))
+_fetch_semaphore = asyncio.BoundedSemaphore(_MAX_CONCURRENT_FETCHES)
+_TAVILY_POOL = ThreadPoolExecutor(max_workers=8)
+
+_cache = TTLCache(maxsize=200, ttl=CACHE_TTL)
+_cache_lock = asyncio.Lock()
+
+# shared aiohttp session (lazy init)
+_session = None
+
+def _sync_close_session(timeout: float = 2.0):
+    """
+    Synchronous wrapper for closing the shared aiohttp session.
+    - If the event loop is running, schedule a task to close the session.
+    - Otherwise, run the async close synchronously with asyncio.run.
+    This is safe to call from atexit or signal handlers.
+    """
+    try:
+        loop = None
+        try:
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None and loop.is_running():
+            # schedule coroutine to close session (do not block here)
+            try:
+                loop.create_task(_close_session_async())
+            except Exception:
+                # fallback to running quickly (non-blocking best-effort)
+                pass
+        else:
+            # no running loop: run closing synchronously
+            try:
+                asyncio.run(_close_session_async())
+            except Exception:
+                pass
+    except Exception:
+        # swallow exceptions in cleanup path
+        logger.debug("sync close session failed", exc_info=True)
+
+def _register_shutdown_handlers():
+    """
+    Wire signal handlers and atexit to attempt to close our shared session.
+    Call this once on module import.
+    """
+    # Register atexit synchronous cleanup (best-effort)
+    try:
+        atexit.register(_sync_close_session)
+    except Exception:
+        logger.debug("atexit register failed", exc_info=True)
+
+    # Register POSIX signal handlers to close session gracefully.
+    # In some environments loop.add_signal_handler is not available (Windows), so fallback to signal.signal.
+    try:
+        loop = asyncio.get_event_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                # schedule async close on signal
+                loop.add_signal_handler(sig, lambda s=sig: loop.create_task(_close_session_async()))
+            except NotImplementedError:
+                # fallback for Windows or restricted envs
+                signal.signal(sig, lambda *_: _sync_close_session())
+    except Exception:
+        # If anything fails, ensure at least the atexit hook exists.
+        logger.debug("register_shutdown_handlers failed", exc_info=True)
+
+async def _close_session_async():
+    """Close the shared aiohttp session if open."""
+    global _session
+    try:
+        if _session and not _session.closed:
+            await _session.close()
+            _session = None
+    except Exception as e:
+        logger.debug("Error while closing session: %s", e)
+
+
+async def _get_session():
+    global _session, _SESSION_REQS
+    if _session is None or _session.closed:
+        connector = TCPConnector(limit=100, limit_per_host=10, force_close=False)
+        _session = aiohttp.ClientSession(headers=HEADERS, connector=connector)
+        _SESSION_REQS = 0
+    _SESSION_REQS += 1
+    if _SESSION_REQS >= _SESSION_RECREATE_EVERY:
+        await _close_session_async()
+    return _session
+
+
+def _resolve_charset(header_charset, head: bytes) -> str:
+    """Pick the page encoding: Content-Type charset, then <meta charset> in the first bytes, then utf-8."""
+    match = _META_CHARSET_RE.search(head[:4096]) if head else None
+    meta_charset = match.group(1).decode("ascii", errors="ignore") if match else None
+    for candidate in (header_charset, meta_charset):
+        if not candidate:
+            continue
+        try:
+            return codecs.lookup(candidate).name
+        except LookupError:
+            continue
+    return "utf-8"
+
+
+async def _read_and_extract(resp, backend: str, extractor) -> dict:
+    """
+    Read the response body and extract the page.
+
+    Incremental backends are fed chunk by chunk, skipping script/style bodies, and reading
+    stops as soon as enough article text was collected (or MAX_STREAM_BYTES is hit), so
+    pages with huge <head> sections or inline scripts still reach their paragraphs.
+    Other backends read up to DEFAULT_MAX_READ_BYTES and parse the whole buffer.
+    """
+    incremental = new_incremental_extractor(backend)
+    decoder = None
+    read_bytes = bytearray()
+    total_read = 0
+    async for chunk in resp.content.iter_chunked(_READ_CHUNK_SIZE):
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(
+                _resolve_charset(resp.charset, chunk))(errors="ignore")
+        total_read += len(chunk)
+        if incremental is not None:
+            incremental.feed(decoder.decode(chunk))
+            done = incremental.has_enough_text(DEFAULT_MAX_CONTENT_CHARS) or total_read >= MAX_STREAM_BYTES
+        else:
+            read_bytes.extend(chunk)
+            done = total_read >= DEFAULT_MAX_READ_BYTES
+        if done:
+            try:
+                await resp.release()
+            except Exception:
+                pass
+            break
+
+    if incremental is not None:
+        if decoder is not None:
+            incremental.feed(decoder.decode(b"", final=True))
+        return incremental.close()
+    text = decoder.decode(bytes(read_bytes), final=True) if decoder else ""
+    return extractor(text)
+
+
+async def _fetch_and_parse(url: str, timeout: int = DEFAULT_TIMEOUT):
+    session = await _get_session()
+    backend, extractor = get_html_extractor()
+    try:
+        async with session.get(url, timeout=timeout) as resp:
+            status = resp.status
+            page = await _read_and_extract(resp, backend, extractor)
+    except asyncio.TimeoutError:
+        return {"url": url, "status": "error", "error": "timeout", "content": ""}
+    except aiohttp.ClientError as e:
+        logger.debug("aiohttp fetch failed for %s: %s", url, e)
+        return {"url": url, "status": "error", "error": "fetch_error", "content": ""}
+    except Exception as e:
+        logger.debug("%s extraction failed for %s: %s", backend, url, e)
+        return {"url": url, "status": "error", "error": "parse_error", "content": ""}
+
+    title = page.get("title")
+    content = page.get("content") or ""
+    paywalled = page.get("paywall")
+    truncated = content[:DEFAULT_MAX_CONTENT_CHARS]
+    snippet = (truncated[:400] + "...") if truncated else ""
+    out = {
+        "url": url,
+        "status": status or "success",
+        "title": sanitize_text(title or ""),
+        "snippet": sanitize_text(snippet, max_len=400),
+        "content": sanitize_text(truncated, max_len=DEFAULT_MAX_CONTENT_CHARS),
+        "provider": f"aiohttp_{backend}"
+    }
+    if paywalled:
+        out["paywall"] = True
+    return out
+
+
+async def _do_tavily_extract(url: str, extract_depth: str = "advanced"):
+    if not TAVILY_AVAILABLE:
+        return None
+    try:
+        # Tavily extract is likely blocking; wrap in thread
+        def extract_sync(u):
+            from tavily import TavilyClient
+
+            client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+            resp = client.extract(u, extract_depth=extract_depth)
+            return resp
+
+        resp = await asyncio.get_running_loop().run_in_executor(_TAVILY_POOL, extract_sync, url)
+        if not resp or not resp.get("results"):
+            return None
+        results_found = resp.get("results")[0]
+        title = results_found.get("title") or ""
+        content = results_found.get("raw_content") or resp.get("content") or ""
+        if not content:
+            return None
+        # use content
+        snippet = (content[:400] + "...") if content else ""
+        return {
+            "url": url,
+            "status": "success",
+            "title": title,
+            "snippet": snippet,
+            "content": content,
+            "provider": "tavily"
+        }
+    except Exception as e:
+        logger.debug("tavily extract failed: %s", e)
+        return None
+
+
+async def _get_from_cache(url: str):
+    async with _cache_lock:
+        item = _cache.get(url)
+        if not item:
+            return None
+        # expire check
+        if (item.get("ts", 0) + CACHE_TTL) < asyncio.get_event_loop().time():
+            del _cache[url]
+            return None
+        return item.get("value")
+
+
+async def _set_cache(url: str, result_dict: dict):
+    async with _cache_lock:
+        _cache[url] = {"value": result_dict,
+                       "ts": asyncio.get_event_loop().time()}
+
+
+async def extract_webpage(url: str, extract_depth: str = "advanced") -> dict:
+    """
+    Extract the textual content of a webpage.
+
+    Uses Tavily extraction if available, otherwise falls back to fetching the page and parsing
+    the HTML. Results are cached for CACHE_TTL seconds.
+
+    Args:
+        url (str): The URL of the webpage to extract content from.
+        extract_depth (str): Tavily extract depth ("basic" or "advanced").
+
+    Returns:
+        dict: A dictionary containing extracted information with keys:
+            - url (str): The URL of the webpage.
+            - status (str): "success" indicates the tool execution was succesful and "error" indicates failure.
+            - title (str): The page title if available.
+            - snippet (str): A short snippet of the extracted content.
+            - content (str): The main extracted textual content (truncated).
+            - provider (str): Extraction method used (e.g., 'tavily', 'aiohttp_lxml', 'aiohttp_bs4').
+            - error (str, optional): Error message if extraction failed.
+            - paywall (bool, optional): True if the page is paywalled.
+    """
+    async with _fetch_semaphore:
+        try:
+            if not url:
+                return {"url": url, "status": "error", "error": "no_url_provided", "content": ""}
+
+            # check cache first
+            cached = await _get_from_cache(url)
+            if cached:
+                return cached
+
+            # 1) Try Tavily extract if available
+            if TAVILY_AVAILABLE:
+                tavily_res = await _do_tavily_extract(url, extract_depth=extract_depth)
+                if tavily_res and tavily_res.get("content"):
+                    # truncate to max length
+                    content = tavily_res["content"][:DEFAULT_MAX_CONTENT_CHARS]
+                    tavily_res["content"] = content
+                    tavily_res["snippet"] = (
+                        content[:400] + "...") if content else ""
+                    # write to cache
+                    j = tavily_res
+                    await _set_cache(url, j)
+                    return j
+
+            # 2) Fallback: aiohttp + HTML parsing (lxml, or bs4 when lxml is unavailable)
+            result = await _fetch_and_parse(url, timeout=DEFAULT_TIMEOUT)
+            j = result
+            # store in cache
+            try:
+                await _set_cache(url, j)
+            except Exception as e:
+                logger.debug("inmem cache set failed: %s", e)
+            return j
+
+        except Exception as e:
+            logger.exception("extract failure: %s", e)
+            return {"url": None, "status": "error", "error": "exception", "content": ""}
+
+def _batch_char_budgets(lengths: list, max_total_chars: int, max_chars_per_page: int) -> list:
+    """
+    Split `max_total_chars` across pages: every page gets an equal share capped at
+    `max_chars_per_page`, and whatever short pages leave unused is handed to the longer ones.
+    """
+    budgets = [0] * len(lengths)
+    remaining = max_total_chars
+    # smallest pages first so their unused share rolls over to the rest
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    for position, i in enumerate(order):
+        share = remaining // (len(order) - position)
+        budgets[i] = min(lengths[i], share, max_chars_per_page)
+        remaining -= budgets[i]
+    return budgets
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    if max_chars <= 3:
+        return ""
+    # keep the "..." marker inside the budget
+    return text[:max_chars - 3].rsplit(' ', 1)[0] + "..."
+
+
+async def extract_webpages(urls: List[str], extract_depth: str = "advanced",
+                           max_total_chars: int = DEFAULT_BATCH_MAX_TOTAL_CHARS,
+                           max_chars_per_page: int = DEFAULT_MAX_CONTENT_CHARS) -> dict:
+    """
+    Extract several webpages concurrently and return a compact, length-budgeted bundle.
+
+    Every URL goes through `extract_webpage` (same semaphore, cache and Tavily -> aiohttp
+    fallback chain). Duplicate URLs are fetched once and at most MAX_BATCH_URLS are processed;
+    pages with near-identical content are collapsed into the first one (see near_dedup).
+    Page contents share `max_total_chars`; snippets are dropped since the content already holds them.
+
+    Args:
+        urls (list[str]): The URLs of the webpages to extract content from.
+        extract_depth (str): Tavily extract depth ("basic" or "advanced").
+        max_total_chars (int): Character budget for the contents of all pages together.
+        max_chars_per_page (int): Character cap for a single page.
+
+    Returns:
+        dict: A dictionary with keys:
+            - status (str): "success" if at least one page was extracted, otherwise "error".
+            - results (list[dict]): One entry per extracted page with url, title, content, provider
+              and optionally paywall (bool), truncated (bool) and duplicate_urls (list[str]).
+            - failed (list[dict]): url and error for every page that could not be extracted.
+            - skipped (list[str]): URLs beyond MAX_BATCH_URLS that were not fetched.
+            - total_chars (int): Characters of content returned.
+            - dedup (dict): near_duplicates_removed and (estimated) tokens_saved.
+    """
+    unique_urls = list(dict.fromkeys(u.strip() for u in (urls or []) if u and u.strip()))
+    batch, skipped = unique_urls[:MAX_BATCH_URLS], unique_urls[MAX_BATCH_URLS:]
+    if not batch:
+        return {"status": "error", "error": "no_url_provided", "results": [], "failed": [], "skipped": [],
+                "total_chars": 0, "dedup": {"near_duplicates_removed": 0, "tokens_saved": 0}}
+
+    pages = await asyncio.gather(*(extract_webpage(u, extract_depth=extract_depth) for u in batch),
+                                 return_exceptions=True)
+
+    extracted, failed = [], []
+    for url, page in zip(batch, pages):
+        if isinstance(page, BaseException) or not isinstance(page, dict):
+            failed.append({"url": url, "error": "exception"})
+        elif page.get("status") == "error" or not page.get("content"):
+            failed.append({"url": url, "error": page.get("error") or "no_content"})
+        else:
+            extracted.append((url, page))
+
+    # near-identical pages (syndicated articles, mirrors) are returned once; budget goes to distinct pages
+    distinct, dedup_stats = collapse_near_duplicates([dict(page, url=url) for url, page in extracted],
+                                                     text_of=lambda p: p.get("content", ""))
+    if dedup_stats["near_duplicates_removed"]:
+        logger.info("extract batch: collapsed %d near-duplicate pages (~%d tokens saved)",
+                    dedup_stats["near_duplicates_removed"], dedup_stats["tokens_saved"])
+    extracted = [(page["url"], page) for page in distinct]
+
+    budgets = _batch_char_budgets([len(page["content"]) for _, page in extracted],
+                                  max_total_chars, max_chars_per_page)
+    results = []
+    for (url, page), budget in zip(extracted, budgets):
+        content = _truncate(page["content"], budget)
+        item = {"url": url, "title": page.get("title") or "", "content": content,
+                "provider": page.get("provider")}
+        if page.get("paywall"):
+            item["paywall"] = True
+        if page.get("duplicate_urls"):
+            item["duplicate_urls"] = page["duplicate_urls"]
+        if len(content) < len(page["content"]):
+            item["truncated"] = True
+        results.append(item)
+
+    return {
+        "status": "success" if results else "error",
+        "results": results,
+        "failed": failed,
+        "skipped": skipped,
+        "total_chars": sum(len(r["content"]) for r in results),
+        "dedup": dedup_stats,
+    }
+
+# clear cache function
+
+
+async def clear_site_extract_cache():
+    """
+    Clear the in-memory cache used for site extraction.
+
+    This ensures that repeated web extractions do not use stale data and frees resources once a run is over. It clears all cached webpage content and closes the shared HTTP session.
+
+    Returns:
+        bool: True if the cache was successfully cleared and the session closed.
+    """
+    async with _cache_lock:
+        _cache.clear()
+        await _close_session_async()
+    return True
+
+# _register_shutdown_handlers()
@@ -0,0 +1,145 @@
+"""
+    Tavily web search shared by every agent's `search` tool.
+
+    Requires the "search" extra; the Tavily client is only imported on the first search and the
+    API key is read from TAVILY_API_KEY at call time.
+"""
+from typing import List
+import asyncio
+import importlib.util
+import logging
+import os
+
+from .near_dedup import collapse_near_duplicates, estimate_tokens
+from .text_sanitize import sanitize_text
+
+logger = logging.getLogger("search")
+
+# optional Tavily client (imported lazily in tavily_search)
+TAVILY_AVAILABLE = importlib.util.find_spec("tavily") is not None
+
+MAX_QUERY_LEN = 380   # keep margin under 400
+DEFAULT_MAX_RESULTS = 8
+
+
+def _split_long_query(query: str, max_len: int = MAX_QUERY_LEN) -> List[str]:
+    """
+    Simple split strategy:
+    - If < max_len return [query]
+    - If longer, split on ' OR ' tokens. If still too long, split in half.
+    """
+    if len(query) <= max_len:
+        return [query]
+    # try split on OR tokens if user provided them
+    parts = [p.strip() for p in query.split(' OR ') if p.strip()]
+    if parts and all(len(p) <= max_len for p in parts):
+        # return single-term queries
+        return parts
+    # fallback: chop into slices of max_len
+    out = []
+    i = 0
+    while i < len(query):
+        out.append(query[i:i+max_len])
+        i += max_len
+    return out
+
+
+def _normalize_tavily_result(r):
+    title = sanitize_text(r.get("title", "") or "")
+    url = r.get("url", "") or ""
+    snippet_raw = (r.get("content") or r.get("raw_content") or "")[:1200]
+    snippet = sanitize_text(snippet_raw, max_len=1200)
+    score = r.get("score", 0)
+
+    return {
+        "title": title,
+        "url": url,
+        "snippet": snippet,
+        "score": score,
+        "provider": "tavily"
+    }
+
+
+def _dedup_stats_in_window(window: List[dict], distinct: List[dict]) -> dict:
+    """
+    Near-duplicates among the results that would have been returned without deduplication; the
+    ones ranked below max_results were cut anyway and save nothing.
+    """
+    kept_urls = {r.get("url") for r in distinct}
+    removed = [r for r in window if r.get("url") not in kept_urls]
+    # the dropped snippet and title no longer reach the model; the url still does (duplicate_urls)
+    tokens_saved = sum(estimate_tokens(r.get("snippet") or "") + estimate_tokens(r.get("title") or "")
+                       - estimate_tokens(r.get("url") or "") for r in removed)
+    return {"near_duplicates_removed": len(removed), "tokens_saved": max(tokens_saved, 0)}
+
+
+async def tavily_search(query: str, max_results: int = 4, search_depth: str = "advanced") -> dict:
+    """
+    Perform a web search using the Tavily API.
+
+    Splits long queries, runs the sub-queries concurrently, keeps the best scored result per URL,
+    collapses near-duplicate snippets (see near_dedup) and normalizes the output for downstream analysis.
+
+    Args:
+        query (str): The search query.
+        max_results (int): Maximum number of search results to return.
+        search_depth (str): Tavily search depth ("basic" or "advanced").
+
+    Returns:
+        dict: Dictionary containing the original query, an optional answer, a list of normalized search results,
+              a request ID and "dedup" stats (near_duplicates_removed, tokens_saved), counted among the top
+              max_results. Each result includes title, URL, snippet, score, provider and, when near-duplicates
+              were collapsed into it, duplicate_urls.
+    """
+    if not TAVILY_AVAILABLE:
+        # Return an empty consistent JSON if Tavily not installed
+        return {"query": query, "results": []}
+
+    from tavily import TavilyClient
+
+    def run_search(q):
+        client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+        return client.search(query=q, max_results=max_results, include_raw_content=True, search_depth=search_depth)
+
+    subqueries = _split_long_query(query)
+    collected = {}
+    results = []
+    tasks = [asyncio.to_thread(run_search, q) for q in subqueries]
+    results = []
+    for coro in asyncio.as_completed(tasks):
+        try:
+            resp = await coro
+        except Exception:
+            continue
+        for r in resp.get("results", [])[:max_results]:
+            norm = _normalize_tavily_result(r)
+            url = norm.get("url", "")
+            if not url:
+                continue
+            key = url
+            if key in collected:
+                existing = collected[key]
+                if norm.get("score", 0) > existing.get("score", 0):
+                    collected[key] = norm
+            else:
+                collected[key] = norm
+
+    ranked = sorted(collected.values(), key=lambda x: x.get("score", 0), reverse=True)
+    # syndicated copies of the same story come back under different URLs; keep the best scored one
+    # (the slots they free go to the next distinct results)
+    distinct, _ = collapse_near_duplicates(ranked, text_of=lambda x: x.get("snippet", ""))
+    results = distinct[:max_results]
+    dedup_stats = _dedup_stats_in_window(ranked[:max_results], distinct)
+    if dedup_stats["near_duplicates_removed"]:
+        logger.info("search %r: collapsed %d near-duplicate results (~%d tokens saved)",
+                    query, dedup_stats["near_duplicates_removed"], dedup_stats["tokens_saved"])
+    request_id = None
+    answer = None
+    try:
+        answer = resp.get("answer")
+        request_id = resp.get("request_id")
+    except Exception:
+        pass
+
+    return {"query": query, "answer": answer, "results": results, "request_id": request_id,
+            "dedup": dedup_stats}
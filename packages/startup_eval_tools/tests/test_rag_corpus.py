@@ -0,0 +1,92 @@
+"""Corpus name resolution against an in-memory stand-in for the Firestore AsyncClient."""
+import asyncio
+import pytest
+
+firestore = pytest.importorskip("google.cloud.firestore")
+
+from startup_eval_tools.rag_corpus import RAG_CORPUS_NAME_FIELD, RagCorpusResolver  # noqa: E402
+
+
+class FakeDocument:
+    def __init__(self, store, doc_id):
+        self.store, self.doc_id = store, doc_id
+
+    async def get(self, field_paths=None):
+        self.store.reads += 1
+        data = self.store.documents.get(self.doc_id)
+        return type("Snapshot", (), {"to_dict": lambda _: data})()
+
+    async def update(self, values):
+        self.store.documents.setdefault(self.doc_id, {}).update(values)
+
+
+class FakeAsyncClient:
+    """Documents shared by every client; each client remembers the event loop it was created on."""
+    documents = {}
+    reads = 0
+    created = []
+
+    def __init__(self, project=None, database=None):
+        self.loop = asyncio.get_running_loop()
+        FakeAsyncClient.created.append(self)
+
+    def collection(self, name):
+        return type("Collection", (), {"document": lambda _, doc_id: FakeDocument(FakeAsyncClient, doc_id)})()
+
+
+@pytest.fixture
+def resolver(monkeypatch):
+    FakeAsyncClient.documents, FakeAsyncClient.reads, FakeAsyncClient.created = {}, 0, []
+    monkeypatch.setattr(firestore, "AsyncClient", FakeAsyncClient)
+    resolver = RagCorpusResolver(project="test-project", location="europe-west4", database="test-db",
+                                 collection="companies", corpus_prefix="sub_agents_rag_corpus")
+    # the Vertex AI SDK is only needed by the list_corpora fallback and the retrieval tools
+    resolver._vertex_ai_initialized = True
+    return resolver
+
+
+def test_resolve_reads_the_company_document_once(resolver):
+    FakeAsyncClient.documents["acme"] = {RAG_CORPUS_NAME_FIELD: "projects/p/locations/l/ragCorpora/1"}
+
+    async def resolve_twice():
+        return [await resolver.resolve("acme"), await resolver.resolve("acme")]
+
+    assert asyncio.run(resolve_twice()) == ["projects/p/locations/l/ragCorpora/1"] * 2
+    assert FakeAsyncClient.reads == 1
+
+
+def test_missing_corpus_name_falls_back_to_the_corpus_scan_and_is_written_back(resolver, monkeypatch):
+    scanned = []
+    monkeypatch.setattr(resolver, "_find_corpus_name_by_display_name",
+                        lambda display_name: scanned.append(display_name) or "projects/p/locations/l/ragCorpora/2")
+
+    assert asyncio.run(resolver.resolve("beta")) == "projects/p/locations/l/ragCorpora/2"
+    assert scanned == ["sub_agents_rag_corpus_beta"]
+    assert FakeAsyncClient.documents["beta"] == {RAG_CORPUS_NAME_FIELD: "projects/p/locations/l/ragCorpora/2"}
+
+
+def test_unknown_corpus_raises(resolver, monkeypatch):
+    monkeypatch.setattr(resolver, "_find_corpus_name_by_display_name", lambda display_name: None)
+
+    with pytest.raises(RuntimeError, match="sub_agents_rag_corpus_gamma"):
+        asyncio.run(resolver.resolve("gamma"))
+
+
+def test_one_firestore_client_per_event_loop(resolver):
+    async def client():
+        return resolver.firestore_client(), resolver.firestore_client()
+
+    first_a, first_b = asyncio.run(client())
+    second, _ = asyncio.run(client())
+
+    assert first_a is first_b
+    assert second is not first_a and second.loop is not first_a.loop
+
+
+def test_corpus_state_writes_only_the_corpus_keys(resolver):
+    FakeAsyncClient.documents["acme"] = {RAG_CORPUS_NAME_FIELD: "projects/p/locations/l/ragCorpora/1"}
+
+    assert asyncio.run(resolver.corpus_state("acme")) == {
+        "rag_corpus_display_name": "sub_agents_rag_corpus_acme",
+        "rag_corpus_name": "projects/p/locations/l/ragCorpora/1",
+    }
@@ -0,0 +1,158 @@
+"""Offline tests of the retrieval backends: a fake embedder and corpus files in a temporary directory."""
+import asyncio
+import re
+from pathlib import Path
+import pytest
+
+pytest.importorskip("numpy")
+
+from startup_eval_tools import rag_retrieval  # noqa: E402
+from startup_eval_tools.rag_retrieval import (  # noqa: E402
+    AutoBackend, EmbeddingCache, LocalIndexBackend, LocalVectorIndex, aretrieve_contexts, chunk_text, embed_texts)
+
+VOCABULARY = ("founder", "team", "revenue", "pricing", "market", "competitor", "funding", "partnership")
+
+CORPUS_FILES = {
+    "team_profiling_sub_agent_result.json": '{"founder_profiles": "The founder team has two prior exits; team of 12."}',
+    "business_model_sub_agent_result.json": '{"revenue_model": "Subscription revenue with usage based pricing."}',
+    "competitor_analysis_sub_agent_result.json": '{"competitors": "Three competitor products share the market."}',
+    "funding_and_financials_sub_agent_result.json": '{"funding_history": "Seed funding of $2M led by a partnership fund."}',
+}
+
+
+class FakeEmbedder:
+    """Counts of VOCABULARY words (deterministic, no model); records every text it embeds."""
+
+    def __init__(self):
+        self.embedded = []
+
+    def __call__(self, texts, task_type):
+        self.embedded.extend(texts)
+        return [[float(len(re.findall(rf"\b{word}", text.lower()))) for word in VOCABULARY] for text in texts]
+
+
+@pytest.fixture
+def corpus_dir(tmp_path: Path) -> Path:
+    for name, content in CORPUS_FILES.items():
+        (tmp_path / name).write_text(content, encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def local_backend(corpus_dir: Path, tmp_path: Path):
+    loaded = []
+
+    def load_documents(corpus_name):
+        loaded.append(corpus_name)
+        return [path.read_text(encoding="utf-8") for path in sorted(corpus_dir.glob("*.json"))]
+
+    backend = LocalIndexBackend(embed_fn=FakeEmbedder(), cache=EmbeddingCache(str(tmp_path / "embeddings.sqlite3")),
+                                document_loader=load_documents)
+    backend.loaded = loaded
+    return backend
+
+
+class FailingBackend:
+    name = "failing"
+
+    def retrieve(self, query, corpus_name, top_k=10, vector_distance_threshold=0.6):
+        raise RuntimeError("managed corpus unavailable")
+
+
+class StaticBackend:
+    name = "static"
+
+    def __init__(self, contexts):
+        self.contexts = contexts
+
+    def retrieve(self, query, corpus_name, top_k=10, vector_distance_threshold=0.6):
+        return self.contexts[:top_k]
+
+
+def test_chunk_text_overlaps_and_covers_the_text():
+    text = " ".join(f"word{i}" for i in range(400))
+    chunks = chunk_text(text, chunk_chars=500, overlap_chars=100)
+    assert len(chunks) > 1
+    assert chunks[0].startswith("word0 ") and chunks[-1].endswith("word399")
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    # consecutive chunks share their boundary words
+    assert chunks[0].split()[-1] in chunks[1].split()
+    assert chunk_text("  ") == []
+
+
+def test_embedding_cache_persists_and_embeds_only_missing_texts(tmp_path: Path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    embedder = FakeEmbedder()
+    first = embed_texts(["founder team", "market"], "RETRIEVAL_DOCUMENT", embedder, EmbeddingCache(path))
+
+    reopened = EmbeddingCache(path)
+    second = embed_texts(["market", "founder team", "pricing"], "RETRIEVAL_DOCUMENT", embedder, reopened)
+
+    assert embedder.embedded == ["founder team", "market", "pricing"]
+    assert second[:2] == [first[1], first[0]]
+    assert (reopened.hits, reopened.misses) == (2, 1)
+    # the task type is part of the key
+    embed_texts(["market"], "RETRIEVAL_QUERY", embedder, reopened)
+    assert embedder.embedded[-1] == "market"
+
+
+def test_local_vector_index_ranks_by_cosine_distance():
+    embedder = FakeEmbedder()
+    index = LocalVectorIndex(["revenue pricing", "founder team", "market"], embedder(
+        ["revenue pricing", "founder team", "market"], "RETRIEVAL_DOCUMENT"))
+    query = embedder(["who is on the founder team"], "RETRIEVAL_QUERY")[0]
+
+    results = index.search(query, top_k=2)
+
+    assert [chunk for chunk, _ in results][0] == "founder team"
+    assert results[0][1] == pytest.approx(0.0, abs=1e-6)
+    assert index.search(query, top_k=3, vector_distance_threshold=0.5) == [results[0]]
+
+
+def test_local_backend_answers_from_the_corpus_files_and_reuses_its_index(local_backend):
+    contexts = local_backend.retrieve("founder team background", "corpus-1", top_k=1, vector_distance_threshold=None)
+    assert contexts == [CORPUS_FILES["team_profiling_sub_agent_result.json"]]
+
+    embedded = len(local_backend.embed_fn.embedded)
+    contexts = local_backend.retrieve("revenue and pricing", "corpus-1", top_k=1, vector_distance_threshold=None)
+    assert contexts == [CORPUS_FILES["business_model_sub_agent_result.json"]]
+    # the index is built once per corpus and only the new query is embedded
+    assert local_backend.loaded == ["corpus-1"]
+    assert local_backend.embed_fn.embedded[embedded:] == ["revenue and pricing"]
+
+
+def test_auto_backend_prefers_the_managed_corpus(local_backend):
+    built = []
+    backend = AutoBackend(remote=StaticBackend(["managed context"]),
+                          local_factory=lambda: built.append(True) or local_backend)
+
+    assert backend.retrieve("founder team", "corpus-1") == ["managed context"]
+    assert built == [] and local_backend.loaded == []
+
+
+def test_auto_backend_falls_back_to_the_local_index_when_the_managed_corpus_fails(local_backend):
+    backend = AutoBackend(remote=FailingBackend(), local_factory=lambda: local_backend)
+
+    contexts = backend.retrieve("seed funding", "corpus-1", top_k=1, vector_distance_threshold=None)
+
+    assert contexts == [CORPUS_FILES["funding_and_financials_sub_agent_result.json"]]
+
+
+def test_auto_backend_raises_the_managed_error_without_a_local_index():
+    backend = AutoBackend(remote=FailingBackend())
+    # as when NumPy is not installed
+    backend.local_factory = None
+
+    with pytest.raises(RuntimeError, match="managed corpus unavailable"):
+        backend.retrieve("seed funding", "corpus-1")
+
+
+def test_aretrieve_contexts_merges_queries_without_duplicates(monkeypatch, local_backend):
+    monkeypatch.setitem(rag_retrieval._backend_instances, "local", local_backend)
+
+    contexts = asyncio.run(aretrieve_contexts(["founder team", "team founder", "competitor market"], "corpus-1",
+                                              top_k=2, vector_distance_threshold=None, backend="local"))
+
+    assert len(contexts) == len(set(contexts))
+    assert CORPUS_FILES["team_profiling_sub_agent_result.json"] in contexts
+    assert CORPUS_FILES["competitor_analysis_sub_agent_result.json"] in contexts
@@ -0,0 +1,56 @@
+"""Near-duplicate accounting of tavily_search against a stand-in for the Tavily client."""
+import asyncio
+import pytest
+
+tavily = pytest.importorskip("tavily")
+
+from startup_eval_tools.web_search import tavily_search  # noqa: E402
+
+STORY = ("Acme raised a seed round of two million dollars led by Example Ventures to expand its "
+         "logistics platform across Europe and hire twenty engineers over the next eighteen months")
+OTHER = ("Beta Robotics opened a new factory in Ohio that will produce warehouse robots for retailers "
+         "and create three hundred local jobs according to the state development agency today")
+
+
+def _result(url, content, score):
+    return {"title": url, "url": f"https://{url}", "content": content, "score": score}
+
+
+@pytest.fixture
+def search_results(monkeypatch):
+    """query -> results the fake client returns for it (a long query is split into sub-queries on ' OR ')."""
+    results = {}
+
+    class FakeTavilyClient:
+        def __init__(self, api_key=None):
+            pass
+
+        def search(self, query, max_results, **kwargs):
+            return {"results": results.get(query, [])[:max_results], "answer": None, "request_id": "req-1"}
+
+    monkeypatch.setattr(tavily, "TavilyClient", FakeTavilyClient)
+    return results
+
+
+def test_duplicates_inside_the_returned_window_are_counted(search_results):
+    search_results["acme seed round"] = [_result("a.com/story", STORY, 0.9), _result("b.com/copy", STORY + " copy", 0.8),
+                                         _result("c.com/other", OTHER, 0.7)]
+
+    response = asyncio.run(tavily_search("acme seed round", max_results=3))
+
+    assert [r["url"] for r in response["results"]] == ["https://a.com/story", "https://c.com/other"]
+    assert response["results"][0]["duplicate_urls"] == ["https://b.com/copy"]
+    assert response["dedup"]["near_duplicates_removed"] == 1
+    assert response["dedup"]["tokens_saved"] > 0
+
+
+def test_duplicates_below_max_results_save_nothing(search_results):
+    first, second = "acme seed round " + "a" * 300, "acme funding " + "b" * 300
+    search_results[first] = [_result("a.com/story", STORY, 0.9), _result("c.com/other", OTHER, 0.8)]
+    # ranked third: max_results cuts it whether or not it is a duplicate
+    search_results[second] = [_result("b.com/copy", STORY + " copy", 0.7)]
+
+    response = asyncio.run(tavily_search(f"{first} OR {second}", max_results=2))
+
+    assert [r["url"] for r in response["results"]] == ["https://a.com/story", "https://c.com/other"]
+    assert response["dedup"] == {"near_duplicates_removed": 0, "tokens_saved": 0}